@@ -0,0 +1,10 @@
+# Benchmarks
+# ----------------
+#
+# Micro-benchmarks that run parts of MLSC in isolation, without audio hardware or processes.
+# Run them from the server folder, e.g.:
+#   python3 -m benchmarks.bench_effects --save effects_baseline.json
+#   python3 -m benchmarks.bench_effects --compare effects_baseline.json
+#   python3 -m benchmarks.bench_dsp --compare dsp_baseline.json
+#   python3 -m benchmarks.bench_raspi
+#   python3 -m benchmarks.bench_mqtt
@@ -0,0 +1,53 @@
+import platform
+import json
+import time
+
+
+def save_baseline(file_path, results, settings):
+    """
+    Write the results into a JSON baseline file. results is a dict: case key -> {metric name: value}.
+    """
+    baseline = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "python": platform.python_version()
+        },
+        "settings": settings,
+        "results": results
+    }
+
+    with open(file_path, "w") as baseline_file:
+        json.dump(baseline, baseline_file, indent=4, sort_keys=True)
+
+
+def load_baseline(file_path):
+    with open(file_path, "r") as baseline_file:
+        return json.load(baseline_file)
+
+
+def compare_results(baseline_results, results, metrics, threshold=0.25):
+    """
+    Compare the results with a baseline. metrics is a dict: metric name -> minimal absolute difference.
+    A metric regressed if it grew by more than threshold (relative) and by more than its minimal difference,
+    so the noise of very fast cases is not flagged.
+
+    Returns a list of (case key, metric name, baseline value, new value) of all regressions.
+    """
+    regressions = []
+
+    for key, values in results.items():
+        if key not in baseline_results:
+            continue
+
+        for metric_name, min_difference in metrics.items():
+            old_value = baseline_results[key].get(metric_name)
+            new_value = values.get(metric_name)
+            if old_value is None or new_value is None:
+                continue
+
+            if new_value > old_value * (1 + threshold) and new_value - old_value > min_difference:
+                regressions.append((key, metric_name, old_value, new_value))
+
+    return regressions
@@ -0,0 +1,378 @@
+# DSP Benchmark
+# ----------------
+#
+# Runs the DSP over synthetic signals for several combinations of the audio settings.
+# It measures the time and the allocations of the audio hot path and checks the results:
+# - Tones at known frequencies must peak in the mel band of their frequency.
+# - Click trains at a known BPM must be detected with this tempo.
+# - Every FFT_HOP_SIZE samples must produce one spectrum, also if the hop is smaller than the audio buffer.
+# - With --compare, the mel spectrums must equal the ones of the baseline, so optimizations can be verified
+#   as numerically equivalent.
+#
+# Examples:
+#   python3 -m benchmarks.bench_dsp
+#   python3 -m benchmarks.bench_dsp --sample-rates 48000 --frames-per-buffer 256 512 --n-fft-bins 24
+#   python3 -m benchmarks.bench_dsp --fft-window-sizes 0 1536 --fft-hop-sizes 0 128
+#   python3 -m benchmarks.bench_dsp --save dsp_baseline.json
+#   python3 -m benchmarks.bench_dsp --compare dsp_baseline.json
+
+from libs.offline_renderer import OfflineAudioAnalyzer  # pylint: disable=E0611, E0401
+from libs.dsp import DSP, ExpFilter, Melbank  # pylint: disable=E0611, E0401
+
+from benchmarks.baseline import save_baseline, load_baseline, compare_results
+
+from time import perf_counter
+import numpy as np
+import tracemalloc
+import itertools
+import argparse
+import copy
+import json
+import sys
+import os
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "libs", "config_template.json")
+
+TONE_FREQUENCIES = [100, 250, 440, 1000, 2500, 5000, 10000]
+CLICK_BPMS = [90, 120, 150]
+TONE_SECONDS = 1.0
+CLICK_SECONDS = 12.0
+
+# Metrics of the comparison and their minimal absolute difference for a regression.
+COMPARED_METRICS = {
+    "dsp_us": 5.0,
+    "dsp_p99_us": 100.0,
+    "analysis_us": 10.0,
+    "exp_filter_us": 1.0,
+    "melmat_ms": 0.5,
+    "alloc_kib": 4.0
+}
+
+
+def get_tone(frequency, sample_rate, duration, amplitude=0.5):
+    times = np.arange(int(sample_rate * duration)) / sample_rate
+    return (np.sin(2 * np.pi * frequency * times) * amplitude * 2**15).astype(np.int16)
+
+
+def get_click_train(bpm, sample_rate, duration, amplitude=0.8, seed=0):
+    """
+    Returns short noise bursts every beat, with an exponential decay of 10 ms.
+    """
+    rng = np.random.RandomState(seed)
+    samples = np.zeros(int(sample_rate * duration))
+    click_length = int(sample_rate * 0.05)
+    click = rng.uniform(-1, 1, click_length) * np.exp(-np.arange(click_length) / (sample_rate * 0.01))
+
+    beat_interval = 60.0 / bpm
+    for beat_time in np.arange(0, duration, beat_interval):
+        start = int(beat_time * sample_rate)
+        end = min(start + click_length, len(samples))
+        samples[start:end] += click[:end - start]
+
+    return (np.clip(samples * amplitude, -1, 1) * (2**15 - 1)).astype(np.int16)
+
+
+def get_buffers(samples, frames_per_buffer):
+    return [samples[start:start + frames_per_buffer] for start in range(0, len(samples) - frames_per_buffer + 1, frames_per_buffer)]
+
+
+def get_expected_band(frequency, general_settings):
+    """
+    Returns the mel band whose center is closest to the frequency, on the mel scale.
+    """
+    melbank = Melbank()
+    center_frequencies_mel, _, _ = melbank.melfrequencies_mel_filterbank(
+        general_settings["N_FFT_BINS"],
+        general_settings["MIN_FREQUENCY"],
+        general_settings["MAX_FREQUENCY"],
+        0
+    )
+    return int(np.argmin(np.abs(center_frequencies_mel - melbank.hertz_to_mel(frequency))))
+
+
+def get_case_config(config, sample_rate, frames_per_buffer, n_rolling_history, n_fft_bins, fft_window_size=0, fft_hop_size=0):
+    case_config = copy.deepcopy(config)
+    general_settings = case_config["general_settings"]
+    general_settings["DEFAULT_SAMPLE_RATE"] = sample_rate
+    general_settings["FRAMES_PER_BUFFER"] = frames_per_buffer
+    general_settings["N_ROLLING_HISTORY"] = n_rolling_history
+    general_settings["N_FFT_BINS"] = n_fft_bins
+    # Zero: The window follows FRAMES_PER_BUFFER and N_ROLLING_HISTORY, the hop is one audio buffer.
+    general_settings["FFT_WINDOW_SIZE"] = fft_window_size
+    general_settings["FFT_HOP_SIZE"] = fft_hop_size
+    return case_config
+
+
+def run_dsp(config, samples, times=None):
+    """
+    Run a new DSP over the samples. Returns the mel spectrums of all frames
+    and the number of frames until the rolling window is full.
+    The seconds of every DSP.update() call are appended to times.
+    """
+    np.random.seed(0)
+    dsp = DSP(config)
+    mels = []
+
+    for audio_samples in get_buffers(samples, config["general_settings"]["FRAMES_PER_BUFFER"]):
+        start_time = perf_counter()
+        audio_datas = dsp.update(audio_samples)
+        if times is not None:
+            times.append(perf_counter() - start_time)
+
+        for audio_data in audio_datas:
+            mels.append(np.array(audio_data["mel"]))
+
+    return np.array(mels), int(np.ceil(dsp.window_size / dsp.hop_size))
+
+
+def measure_allocations(config, samples, frames):
+    """
+    Returns the average peak KiB that one DSP.update() call allocates.
+    """
+    np.random.seed(0)
+    dsp = DSP(config)
+    buffers = get_buffers(samples, config["general_settings"]["FRAMES_PER_BUFFER"])
+
+    # Fill the rolling window first.
+    for audio_samples in buffers[:config["general_settings"]["N_ROLLING_HISTORY"]]:
+        dsp.update(audio_samples)
+
+    alloc_sizes = []
+    tracemalloc.start()
+    for audio_samples in buffers[config["general_settings"]["N_ROLLING_HISTORY"]:][:frames]:
+        current_size = tracemalloc.get_traced_memory()[0]
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.stop()
+            tracemalloc.start()
+            current_size = 0
+        dsp.update(audio_samples)
+        alloc_sizes.append(tracemalloc.get_traced_memory()[1] - current_size)
+    tracemalloc.stop()
+
+    return float(np.mean(alloc_sizes)) / 1024 if alloc_sizes else 0.0
+
+
+def measure_exp_filter(n_fft_bins, repetitions=2000):
+    """
+    Returns the µs of one ExpFilter.update() call with n_fft_bins values.
+    """
+    rng = np.random.RandomState(0)
+    exp_filter = ExpFilter(np.tile(1e-1, n_fft_bins), alpha_decay=0.5, alpha_rise=0.99)
+    values = rng.rand(64, n_fft_bins)
+
+    start_time = perf_counter()
+    for index in range(repetitions):
+        exp_filter.update(values[index % len(values)])
+    return (perf_counter() - start_time) / repetitions * 1e6
+
+
+def measure_melmat(general_settings, repetitions=5):
+    """
+    Returns the ms of Melbank.compute_melmat() and compress_melmat(), the fastest of some repetitions.
+    """
+    melbank = Melbank()
+    np.random.seed(0)
+    fft_size = DSP({"general_settings": general_settings}).stft.fft_size
+    durations = []
+
+    for _ in range(repetitions):
+        start_time = perf_counter()
+        melmat, _ = melbank.compute_melmat(
+            num_mel_bands=general_settings["N_FFT_BINS"],
+            freq_min=general_settings["MIN_FREQUENCY"],
+            freq_max=general_settings["MAX_FREQUENCY"],
+            num_fft_bands=fft_size // 2,
+            sample_rate=general_settings["DEFAULT_SAMPLE_RATE"]
+        )
+        melbank.compress_melmat(melmat)
+        durations.append(perf_counter() - start_time)
+
+    return min(durations) * 1000
+
+
+def benchmark_case(config, alloc_frames):
+    """
+    Returns the stats, the accuracy checks and the mel outputs of one combination of the audio settings.
+    """
+    general_settings = config["general_settings"]
+    sample_rate = general_settings["DEFAULT_SAMPLE_RATE"]
+
+    dsp_times = []
+    outputs = {}
+    tone_checks = []
+    spectrum_counts = []
+
+    for frequency in TONE_FREQUENCIES:
+        if not general_settings["MIN_FREQUENCY"] < frequency < min(general_settings["MAX_FREQUENCY"], sample_rate / 2):
+            continue
+
+        tone = get_tone(frequency, sample_rate, TONE_SECONDS)
+        mels, warmup_frames = run_dsp(config, tone, dsp_times)
+        spectrum_counts.append(len(mels))
+        # Skip the frames until the rolling window is full.
+        mels = mels[warmup_frames:]
+        mean_mel = mels.mean(axis=0)
+
+        expected_band = get_expected_band(frequency, general_settings)
+        measured_band = int(np.argmax(mean_mel))
+        tone_checks.append((frequency, expected_band, measured_band))
+        outputs[f"tone_{frequency}"] = mean_mel.tolist()
+
+    bpm_checks = []
+    analysis_times = []
+
+    for bpm in CLICK_BPMS:
+        samples = get_click_train(bpm, sample_rate, CLICK_SECONDS)
+        mels, _ = run_dsp(config, samples, dsp_times)
+        outputs[f"clicks_{bpm}"] = mels.mean(axis=0).tolist()
+
+        # The whole analysis of the audio process, including the onset detection and the beat tracking.
+        np.random.seed(0)
+        analyzer = OfflineAudioAnalyzer(config)
+        analyzer.process_samples(samples)
+        analysis_times.extend(analyzer.dsp_times)
+        bpm_checks.append((bpm, analyzer.bpm))
+
+    dsp_times_us = np.array(dsp_times) * 1e6
+    noise = np.random.RandomState(0).randint(-2**14, 2**14, sample_rate, dtype=np.int16)
+
+    stats = {
+        "dsp_us": float(np.mean(dsp_times_us)),
+        "dsp_p99_us": float(np.percentile(dsp_times_us, 99)),
+        "analysis_us": float(np.mean(analysis_times)) * 1e6 if analysis_times else 0.0,
+        "exp_filter_us": measure_exp_filter(general_settings["N_FFT_BINS"]),
+        "melmat_ms": measure_melmat(general_settings),
+        "alloc_kib": measure_allocations(config, noise, alloc_frames),
+        "outputs": outputs
+    }
+
+    return stats, tone_checks, bpm_checks, spectrum_counts
+
+
+def compare_outputs(baseline_results, results, rtol, atol):
+    """
+    Returns (case key, signal name, max absolute difference) of all mel outputs that differ from the baseline.
+    """
+    differences = []
+
+    for key, values in results.items():
+        baseline_outputs = baseline_results.get(key, {}).get("outputs", {})
+        for signal_name, output in values["outputs"].items():
+            if signal_name not in baseline_outputs:
+                continue
+
+            old_output = np.array(baseline_outputs[signal_name])
+            new_output = np.array(output)
+            if old_output.shape != new_output.shape:
+                differences.append((key, signal_name, float("inf")))
+            elif not np.allclose(new_output, old_output, rtol=rtol, atol=atol):
+                differences.append((key, signal_name, float(np.max(np.abs(new_output - old_output)))))
+
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the DSP and check its output with synthetic signals.")
+    parser.add_argument("--sample-rates", nargs="+", type=int, default=[44100, 48000], help="DEFAULT_SAMPLE_RATE values.")
+    parser.add_argument("--frames-per-buffer", nargs="+", type=int, default=[256, 512, 1024], help="FRAMES_PER_BUFFER values.")
+    parser.add_argument("--n-rolling-history", nargs="+", type=int, default=[2, 4], help="N_ROLLING_HISTORY values.")
+    parser.add_argument("--n-fft-bins", nargs="+", type=int, default=[24, 64], help="N_FFT_BINS values.")
+    parser.add_argument("--fft-window-sizes", nargs="+", type=int, default=[0, 1536], help="FFT_WINDOW_SIZE values. 0 follows the buffer and history.")
+    parser.add_argument("--fft-hop-sizes", nargs="+", type=int, default=[0, 128], help="FFT_HOP_SIZE values. 0 is one audio buffer.")
+    parser.add_argument("--alloc-frames", type=int, default=20, help="DSP updates for the allocation measurement.")
+    parser.add_argument("--bpm-tolerance", type=float, default=0.05, help="Allowed relative error of the detected BPM.")
+    parser.add_argument("-c", "--config", help="Config file. Default: The config template.")
+    parser.add_argument("--save", help="Write the results into this baseline file.")
+    parser.add_argument("--compare", help="Compare the results with this baseline file. Exits with 1 on regressions or different outputs.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Relative growth that counts as regression.")
+    parser.add_argument("--rtol", type=float, default=1e-5, help="Relative tolerance of the output comparison.")
+    parser.add_argument("--atol", type=float, default=1e-7, help="Absolute tolerance of the output comparison.")
+    args = parser.parse_args()
+
+    with open(args.config or TEMPLATE_PATH, "r") as config_file:
+        config = json.load(config_file)
+
+    results = {}
+    failed_checks = []
+    print(f'{"Rate/Buffer/History/Bins":<36} {"DSP us":>8} {"p99 us":>8} {"Analysis":>9} {"Filter us":>10} {"Melmat ms":>10} {"KiB":>7} {"Tones":>6} {"BPM":>4}')
+
+    cases = itertools.product(args.sample_rates, args.frames_per_buffer, args.n_rolling_history, args.n_fft_bins, args.fft_window_sizes, args.fft_hop_sizes)
+    for sample_rate, frames_per_buffer, n_rolling_history, n_fft_bins, fft_window_size, fft_hop_size in cases:
+        # The window and the hop are only part of the key if they are set, so older baselines still match.
+        key = f"{sample_rate}/{frames_per_buffer}/{n_rolling_history}/{n_fft_bins}"
+        if fft_window_size:
+            key += f"/w{fft_window_size}"
+        if fft_hop_size:
+            key += f"/h{fft_hop_size}"
+        case_config = get_case_config(config, sample_rate, frames_per_buffer, n_rolling_history, n_fft_bins, fft_window_size, fft_hop_size)
+        stats, tone_checks, bpm_checks, spectrum_counts = benchmark_case(case_config, args.alloc_frames)
+        results[key] = stats
+
+        # Every complete hop of the tone produces one spectrum.
+        hop_size = fft_hop_size or frames_per_buffer
+        expected_count = len(get_buffers(np.zeros(int(sample_rate * TONE_SECONDS)), frames_per_buffer)) * frames_per_buffer // hop_size
+        for spectrum_count in set(spectrum_counts):
+            if spectrum_count != expected_count:
+                failed_checks.append(f"{key}: {spectrum_count} spectrums for {TONE_SECONDS} s, expected {expected_count}")
+
+        # Neighbour bands overlap, so a peak in the next band is still a correct placement.
+        tones_ok = 0
+        for frequency, expected_band, measured_band in tone_checks:
+            if abs(measured_band - expected_band) <= 1:
+                tones_ok += 1
+            else:
+                failed_checks.append(f"{key}: {frequency} Hz peaks in band {measured_band}, expected band {expected_band}")
+
+        bpms_ok = 0
+        for bpm, detected_bpm in bpm_checks:
+            if abs(detected_bpm - bpm) <= bpm * args.bpm_tolerance:
+                bpms_ok += 1
+            else:
+                failed_checks.append(f"{key}: Click train of {bpm} BPM detected as {detected_bpm:.1f} BPM")
+
+        print(f'{key:<36} {stats["dsp_us"]:>8.1f} {stats["dsp_p99_us"]:>8.1f} {stats["analysis_us"]:>9.1f} {stats["exp_filter_us"]:>10.2f} {stats["melmat_ms"]:>10.2f} {stats["alloc_kib"]:>7.1f} {tones_ok:>3}/{len(tone_checks):<2} {bpms_ok}/{len(bpm_checks)}')
+
+    exit_code = 0
+
+    if failed_checks:
+        print("Failed accuracy checks:")
+        for failed_check in failed_checks:
+            print(f"  {failed_check}")
+        exit_code = 1
+
+    settings = {
+        "tone_frequencies": TONE_FREQUENCIES,
+        "click_bpms": CLICK_BPMS
+    }
+
+    if args.save is not None:
+        save_baseline(args.save, results, settings)
+        print(f"Baseline written to: {args.save}")
+
+    if args.compare is not None:
+        baseline = load_baseline(args.compare)
+        regressions = compare_results(baseline["results"], results, COMPARED_METRICS, args.threshold)
+        differences = compare_outputs(baseline["results"], results, args.rtol, args.atol)
+
+        if not regressions and not differences:
+            print(f"No regressions and equal outputs compared with: {args.compare}")
+
+        if regressions:
+            print(f"Regressions compared with: {args.compare}")
+            for key, metric_name, old_value, new_value in regressions:
+                print(f"  {key} {metric_name}: {old_value:.3f} -> {new_value:.3f} ({(new_value / old_value - 1) * 100 if old_value else float('inf'):+.0f}%)")
+            exit_code = 1
+
+        if differences:
+            print(f"Outputs that differ from: {args.compare}")
+            for key, signal_name, max_difference in differences:
+                print(f"  {key} {signal_name}: Max difference {max_difference:.3g}")
+            exit_code = 1
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
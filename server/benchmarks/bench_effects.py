@@ -0,0 +1,239 @@
+# Effect Benchmark
+# ----------------
+#
+# Times run() of every effect of the EffectService at several LED counts, with a stub device.
+# The audio data is synthetic or recorded from a WAV file, so the effects get new audio data every frame.
+#
+# Examples:
+#   python3 -m benchmarks.bench_effects
+#   python3 -m benchmarks.bench_effects --effects effect_bars effect_scroll --led-counts 300 1000
+#   python3 -m benchmarks.bench_effects --save effects_baseline.json
+#   python3 -m benchmarks.bench_effects --compare effects_baseline.json
+
+from libs.offline_renderer import OfflineDevice, OfflineAudioAnalyzer  # pylint: disable=E0611, E0401
+from libs.audio_sources.audio_source_file import AudioSourceFile  # pylint: disable=E0611, E0401
+from libs.animation_clock import AnimationClock  # pylint: disable=E0611, E0401
+from libs.effect_service import EffectService  # pylint: disable=E0611, E0401
+from libs.shared_audio_data import SharedAudioData  # pylint: disable=E0611, E0401
+
+from benchmarks.baseline import save_baseline, load_baseline, compare_results
+
+from time import perf_counter
+import numpy as np
+import tracemalloc
+import argparse
+import logging
+import random
+import copy
+import json
+import sys
+import os
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "libs", "config_template.json")
+
+DEFAULT_LED_COUNTS = [60, 300, 1000, 5000, 10000]
+
+# Metrics of the comparison and their minimal absolute difference for a regression.
+COMPARED_METRICS = {
+    "mean_ms": 0.01,
+    "p99_ms": 0.05,
+    "alloc_kib": 4.0
+}
+
+
+def get_synthetic_audio_datas(n_fft_bins, count, fps, seed=0):
+    """
+    Returns audio data for count frames: A spectrum that changes slowly, with a beat every half second.
+    """
+    rng = np.random.RandomState(seed)
+    base_spectrum = np.linspace(1.0, 0.2, n_fft_bins)
+    freq_ranges = SharedAudioData.FREQ_RANGES
+    freq_detect_counts = {name: 0 for name in freq_ranges}
+    beat_interval = max(int(fps / 2), 1)
+
+    audio_datas_list = []
+    for index in range(count):
+        beat = index % beat_interval == 0
+        if beat:
+            for name in freq_ranges:
+                freq_detect_counts[name] += 1
+
+        envelope = 1.0 if beat else 0.3 + 0.2 * np.sin(index / 10)
+        mel = np.clip(base_spectrum * envelope + rng.rand(n_fft_bins) * 0.2, 0, None)
+
+        audio_datas_list.append({
+            "mel": mel,
+            "vol": 0.1 + 0.4 * envelope,
+            "x": np.arange(n_fft_bins, dtype=float),
+            "y": mel,
+            "freq_detects": {name: beat for name in freq_ranges},
+            "freq_detect_counts": dict(freq_detect_counts),
+            "onset_strength": envelope,
+            "bpm": 120.0,
+            "beat_phase": (index % beat_interval) / beat_interval,
+            "capture_time": index / fps
+        })
+
+    return audio_datas_list
+
+
+def get_recorded_audio_datas(config, file_path):
+    """
+    Returns the audio data of a WAV file, like the audio process would publish it.
+    """
+    analyzer = OfflineAudioAnalyzer(config)
+    samples = AudioSourceFile.load_samples(file_path, analyzer.sample_rate)
+    return analyzer.process_samples(samples)
+
+
+def get_percentile(values, percentile):
+    return float(np.percentile(values, percentile)) if len(values) else 0.0
+
+
+def benchmark_effect(config, effect_class, led_count, fps, audio_datas_list, frames, warmup_frames, max_seconds, alloc_frames):
+    """
+    Returns the stats of one effect at one LED count: mean and p99 ms/frame and the peak KiB allocated per frame.
+    """
+    device_config = copy.deepcopy(config["default_device"])
+    device_config["LED_Count"] = led_count
+    device_config["LED_Mid"] = led_count // 2
+    device_config["FPS"] = fps
+
+    random.seed(0)
+    np.random.seed(0)
+
+    device = OfflineDevice(config, device_config)
+    effect = effect_class(device)
+
+    current_time = [0.0]
+    effect.animation_clock = AnimationClock(fps, clock=lambda: current_time[0])
+
+    def run_frame(frame_index):
+        current_time[0] = frame_index / fps
+        device.shared_audio_data.write(audio_datas_list[frame_index % len(audio_datas_list)])
+        effect.animation_clock.tick()
+
+        start_time = perf_counter()
+        effect.run()
+        duration = perf_counter() - start_time
+
+        # Take the frame like the output would do it.
+        device.frame_mailbox.read()
+        return duration
+
+    for frame_index in range(warmup_frames):
+        run_frame(frame_index)
+
+    times = []
+    start_time = perf_counter()
+    frame_index = warmup_frames
+    while len(times) < frames and perf_counter() - start_time < max_seconds:
+        times.append(run_frame(frame_index))
+        frame_index += 1
+
+    # tracemalloc slows every allocation down, so the allocations are measured in an own pass.
+    alloc_sizes = []
+    tracemalloc.start()
+    for _ in range(alloc_frames):
+        current_size = tracemalloc.get_traced_memory()[0]
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.stop()
+            tracemalloc.start()
+            current_size = 0
+        run_frame(frame_index)
+        frame_index += 1
+        alloc_sizes.append(tracemalloc.get_traced_memory()[1] - current_size)
+    tracemalloc.stop()
+
+    times_ms = np.array(times) * 1000
+    return {
+        "mean_ms": float(np.mean(times_ms)) if len(times_ms) else 0.0,
+        "p50_ms": get_percentile(times_ms, 50),
+        "p99_ms": get_percentile(times_ms, 99),
+        "alloc_kib": float(np.mean(alloc_sizes)) / 1024 if alloc_sizes else 0.0,
+        "frames": len(times_ms),
+        "budget_percent": float(np.mean(times_ms)) * fps / 10 if len(times_ms) else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time run() of every effect at several LED counts.")
+    parser.add_argument("--effects", nargs="+", help="Effects to measure. Default: All effects of the EffectService.")
+    parser.add_argument("--led-counts", nargs="+", type=int, default=DEFAULT_LED_COUNTS, help="LED counts to measure.")
+    parser.add_argument("--fps", nargs="+", type=float, default=[60], help="FPS targets. The budget column is the share of the frame time.")
+    parser.add_argument("--frames", type=int, default=200, help="Measured frames per case.")
+    parser.add_argument("--warmup", type=int, default=20, help="Frames before the measurement.")
+    parser.add_argument("--max-seconds", type=float, default=2.0, help="Maximal measuring time per case. Slow cases measure fewer frames.")
+    parser.add_argument("--alloc-frames", type=int, default=10, help="Frames for the allocation measurement. 0 disables it.")
+    parser.add_argument("--audio", help="WAV file for recorded audio data. Default: Synthetic audio data.")
+    parser.add_argument("-c", "--config", help="Config file. Default: The config template.")
+    parser.add_argument("--save", help="Write the results into this baseline file.")
+    parser.add_argument("--compare", help="Compare the results with this baseline file. Exits with 1 on regressions.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Relative growth that counts as regression.")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(asctime)s - %(levelname)-8s - %(name)-15s - %(message)s", level=logging.WARNING)
+
+    with open(args.config or TEMPLATE_PATH, "r") as config_file:
+        config = json.load(config_file)
+
+    available_effects = {effect_enum.name: effect_class for effect_enum, effect_class in EffectService().get_available_effects().items()}
+    effect_ids = args.effects or list(available_effects.keys())
+    for effect_id in effect_ids:
+        if effect_id not in available_effects:
+            parser.error(f'Unknown effect: "{effect_id}". Available effects: {", ".join(available_effects)}')
+
+    results = {}
+    print(f'{"Effect":<26} {"LEDs":>6} {"FPS":>5} {"Mean ms":>9} {"p99 ms":>9} {"KiB/frame":>10} {"Budget":>8}')
+
+    for fps in args.fps:
+        if args.audio is not None:
+            audio_datas_list = get_recorded_audio_datas(config, args.audio)
+        else:
+            audio_datas_list = get_synthetic_audio_datas(config["general_settings"]["N_FFT_BINS"], 1000, fps)
+
+        for effect_id in effect_ids:
+            for led_count in args.led_counts:
+                key = f"{effect_id}/{led_count}/{fps:g}"
+                try:
+                    stats = benchmark_effect(
+                        config, available_effects[effect_id], led_count, fps, audio_datas_list,
+                        args.frames, args.warmup, args.max_seconds, args.alloc_frames
+                    )
+                except Exception as e:
+                    print(f"{effect_id:<26} {led_count:>6} {fps:>5g} failed: {e}")
+                    continue
+
+                results[key] = stats
+                print(f'{effect_id:<26} {led_count:>6} {fps:>5g} {stats["mean_ms"]:>9.3f} {stats["p99_ms"]:>9.3f} {stats["alloc_kib"]:>10.1f} {stats["budget_percent"]:>7.1f}%')
+
+    settings = {
+        "frames": args.frames,
+        "warmup": args.warmup,
+        "audio": args.audio or "synthetic"
+    }
+
+    if args.save is not None:
+        save_baseline(args.save, results, settings)
+        print(f"Baseline written to: {args.save}")
+
+    if args.compare is not None:
+        baseline = load_baseline(args.compare)
+        regressions = compare_results(baseline["results"], results, COMPARED_METRICS, args.threshold)
+
+        if not regressions:
+            print(f"No regressions compared with: {args.compare}")
+            return 0
+
+        print(f"Regressions compared with: {args.compare}")
+        for key, metric_name, old_value, new_value in regressions:
+            print(f"  {key} {metric_name}: {old_value:.3f} -> {new_value:.3f} ({(new_value / old_value - 1) * 100 if old_value else float('inf'):+.0f}%)")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+# MQTT Output Benchmark
+# ----------------
+#
+# Runs OutputMQTT against a local broker stand-in, so no MQTT broker has to be installed.
+# It measures the time of show() on the render thread and checks three cases:
+# - A fast broker receives the frames and the newest frame is complete.
+# - A slow broker makes the output drop frames, while show() stays fast.
+# - After a restart of the broker, the output reconnects and publishes again.
+#
+# Examples:
+#   python3 -m benchmarks.bench_mqtt
+#   python3 -m benchmarks.bench_mqtt --led-count 1000 --fps 100 --slow-delay 0.05
+
+from libs.outputs.output_mqtt import OutputMQTT  # pylint: disable=E0611, E0401
+
+from threading import Thread, Lock
+from time import perf_counter, sleep, monotonic
+import numpy as np
+import argparse
+import socket
+import copy
+import json
+import sys
+import os
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "libs", "config_template.json")
+
+
+class StubBroker():
+    """
+    Accepts MQTT connections and records the published messages. QoS 0 only.
+    publish_delay delays every publish, like a slow broker or network.
+    """
+    def __init__(self, port=0, publish_delay=0.0):
+        self.publish_delay = publish_delay
+        self.messages = []
+        self.connections = 0
+        self._lock = Lock()
+        self._client_socks = []
+        self._running = True
+
+        self._server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # A small receive buffer, so a slow broker does not hide behind the buffers of the kernel.
+        self._server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        self._server_sock.bind(("127.0.0.1", port))
+        self._server_sock.listen(5)
+        self.port = self._server_sock.getsockname()[1]
+
+        Thread(target=self.accept_routine, daemon=True).start()
+
+    def accept_routine(self):
+        while self._running:
+            try:
+                client_sock, _ = self._server_sock.accept()
+            except OSError:
+                return
+            with self._lock:
+                self._client_socks.append(client_sock)
+                self.connections += 1
+            Thread(target=self.client_routine, args=(client_sock,), daemon=True).start()
+
+    def read_exactly(self, sock, length):
+        data = b""
+        while len(data) < length:
+            chunk = sock.recv(length - len(data))
+            if not chunk:
+                raise ConnectionError("Closed")
+            data += chunk
+        return data
+
+    def read_packet(self, sock):
+        packet_type = self.read_exactly(sock, 1)[0]
+        length = 0
+        multiplier = 1
+        while True:
+            digit = self.read_exactly(sock, 1)[0]
+            length += (digit & 0x7F) * multiplier
+            multiplier *= 128
+            if not digit & 0x80:
+                break
+        return packet_type, self.read_exactly(sock, length)
+
+    def client_routine(self, sock):
+        try:
+            while self._running:
+                packet_type, body = self.read_packet(sock)
+
+                if packet_type & 0xF0 == OutputMQTT.CONNECT:
+                    sock.sendall(bytes([OutputMQTT.CONNACK, 2, 0, 0]))
+                elif packet_type & 0xF0 == OutputMQTT.PUBLISH:
+                    topic_length = int.from_bytes(body[0:2], "big")
+                    if self.publish_delay:
+                        sleep(self.publish_delay)
+                    with self._lock:
+                        self.messages.append((body[2:2 + topic_length].decode("utf-8"), body[2 + topic_length:]))
+                elif packet_type & 0xF0 == OutputMQTT.PINGREQ:
+                    sock.sendall(bytes([0xD0, 0]))
+                elif packet_type & 0xF0 == OutputMQTT.DISCONNECT:
+                    break
+        except (OSError, ConnectionError):
+            pass
+        sock.close()
+
+    def stop(self):
+        self._running = False
+        # Shutdown wakes up the accept() of the other thread, so the port is free again.
+        try:
+            self._server_sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._server_sock.close()
+        with self._lock:
+            for client_sock in self._client_socks:
+                try:
+                    client_sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                client_sock.close()
+
+
+class FakeDevice():
+    def __init__(self, device_config):
+        self.device_config = device_config
+
+
+def wait_for(condition, timeout):
+    end_time = monotonic() + timeout
+    while monotonic() < end_time:
+        if condition():
+            return True
+        sleep(0.01)
+    return condition()
+
+
+def run_frames(output, frames, fps, led_count, rng):
+    """
+    Show frames with the FPS. Returns the times of show() in ms and the last frame.
+    """
+    times = []
+    output_array = None
+    for _ in range(frames):
+        output_array = rng.randint(0, 256, (3, led_count)).astype(np.uint8)
+        start_time = perf_counter()
+        output.show(output_array)
+        times.append(perf_counter() - start_time)
+        sleep(1.0 / fps)
+    return np.array(times) * 1000, output_array
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the MQTT output against a local broker stand-in.")
+    parser.add_argument("--led-count", type=int, default=300, help="Number of LEDs.")
+    parser.add_argument("--fps", type=float, default=60, help="Frames per second.")
+    parser.add_argument("--frames", type=int, default=120, help="Frames per case.")
+    parser.add_argument("--slow-delay", type=float, default=0.05, help="Seconds the slow broker needs for every publish.")
+    args = parser.parse_args()
+
+    with open(TEMPLATE_PATH, "r") as config_file:
+        config = json.load(config_file)
+
+    broker = StubBroker()
+    device_config = copy.deepcopy(config["default_device"])
+    device_config["LED_Count"] = args.led_count
+    device_config["output"]["output_mqtt"]["MQTT_Broker"] = "127.0.0.1"
+    device_config["output"]["output_mqtt"]["MQTT_Port"] = broker.port
+    topic = device_config["output"]["output_mqtt"]["MQTT_Path"]
+
+    rng = np.random.RandomState(0)
+    failed_checks = []
+    output = OutputMQTT(FakeDevice(device_config))
+    if not wait_for(lambda: output.connected, 5):
+        print("Could not connect to the broker stand-in.")
+        return 1
+
+    print(f'{"Case":<10} {"show() ms":>10} {"p99 ms":>8} {"Shown":>6} {"Received":>9} {"Dropped":>8}')
+
+    def report(case_name, times, received, send_errors_before):
+        dropped = output.send_errors - send_errors_before
+        print(f"{case_name:<10} {np.mean(times):>10.4f} {np.percentile(times, 99):>8.4f} {len(times):>6} {received:>9} {dropped:>8}")
+
+    # Fast broker: Every frame arrives and the last one is complete.
+    send_errors = output.send_errors
+    times, last_frame = run_frames(output, args.frames, args.fps, args.led_count, rng)
+    wait_for(lambda: len(broker.messages) >= args.frames, 2)
+    report("fast", times, len(broker.messages), send_errors)
+    if not broker.messages or broker.messages[-1] != (topic, last_frame.tobytes("F")):
+        failed_checks.append("The last message does not match the last frame.")
+
+    # Slow broker: Frames are dropped, show() does not wait for the broker.
+    broker.publish_delay = args.slow_delay
+    received_before = len(broker.messages)
+    send_errors = output.send_errors
+    times, _ = run_frames(output, args.frames, args.fps, args.led_count, rng)
+    sleep(args.slow_delay * 3)
+    report("slow", times, len(broker.messages) - received_before, send_errors)
+    if output.send_errors == send_errors and args.slow_delay > 1.0 / args.fps:
+        failed_checks.append("The slow broker did not drop frames.")
+    if np.percentile(times, 99) > 1000.0 / args.fps:
+        failed_checks.append("show() blocked on the slow broker.")
+
+    # Broker restart: The output reconnects with its backoff.
+    broker.stop()
+    wait_for(lambda: not output.connected, 5)
+    broker = StubBroker(broker.port)
+    send_errors = output.send_errors
+    if not wait_for(lambda: output.connected, OutputMQTT.MAX_BACKOFF):
+        failed_checks.append("The output did not reconnect.")
+    times, last_frame = run_frames(output, args.frames, args.fps, args.led_count, rng)
+    wait_for(lambda: len(broker.messages) >= args.frames, 2)
+    report("reconnect", times, len(broker.messages), send_errors)
+    if not broker.messages or broker.messages[-1] != (topic, last_frame.tobytes("F")):
+        failed_checks.append("No frames arrived after the reconnect.")
+
+    output.clear()
+    broker.stop()
+
+    if failed_checks:
+        print("Failed checks:")
+        for failed_check in failed_checks:
+            print(f"  {failed_check}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+# Raspberry Pi Output Benchmark
+# ----------------
+#
+# Compares the two paths of OutputRaspi.show(): One ws2811_led_set() call per LED and the bulk write
+# into the LED array of the channel. A fake _rpi_ws281x module replaces the real bindings, so it runs
+# on every machine. The fake module stores the LEDs in a ctypes array, like the C library does.
+#
+# Examples:
+#   python3 -m benchmarks.bench_raspi
+#   python3 -m benchmarks.bench_raspi --led-counts 300 1000 --save raspi_baseline.json
+
+from benchmarks.baseline import save_baseline, load_baseline, compare_results
+
+from time import perf_counter
+import numpy as np
+import argparse
+import ctypes
+import types
+import copy
+import json
+import sys
+import os
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "libs", "config_template.json")
+
+DEFAULT_LED_COUNTS = [60, 300, 1000, 5000, 10000]
+
+# Metrics of the comparison and their minimal absolute difference for a regression.
+COMPARED_METRICS = {
+    "mean_ms": 0.01,
+    "p99_ms": 0.05
+}
+
+STRIP_TYPES = [
+    "SK6812_STRIP_RGBW", "SK6812_STRIP_RBGW", "SK6812_STRIP_GRBW", "SK6812_STRIP_GBRW", "SK6812_STRIP_BRGW",
+    "SK6812_STRIP_BGRW", "SK6812_SHIFT_WMASK", "WS2811_STRIP_RGB", "WS2811_STRIP_RBG", "WS2811_STRIP_GRB",
+    "WS2811_STRIP_GBR", "WS2811_STRIP_BRG", "WS2811_STRIP_BGR", "WS2812_STRIP", "SK6812_STRIP", "SK6812W_STRIP"
+]
+
+
+class FakeChannel():
+    def __init__(self):
+        self.count = 0
+        self.leds = None
+
+
+class FakeLeds():
+    def __init__(self):
+        self.channels = [FakeChannel(), FakeChannel()]
+
+
+class FakePointer():
+    """
+    Stands in for a SWIG pointer, which returns its address with int().
+    """
+    def __init__(self, address):
+        self._address = address
+
+    def __int__(self):
+        return self._address
+
+
+def create_fake_ws():
+    """
+    Returns a module with the functions of _rpi_ws281x that OutputRaspi uses.
+    """
+    ws = types.ModuleType("_rpi_ws281x")
+    ws.WS2811_SUCCESS = 0
+
+    for index, strip_type in enumerate(STRIP_TYPES):
+        setattr(ws, strip_type, index)
+
+    def ws2811_init(leds):
+        for channel in leds.channels:
+            channel.leds = (ctypes.c_uint32 * max(channel.count, 1))()
+        return ws.WS2811_SUCCESS
+
+    def ws2811_led_set(channel, index, value):
+        if not 0 <= index < channel.count:
+            return -1
+        channel.leds[index] = value
+        return 0
+
+    def ws2811_channel_t_count_set(channel, count):
+        channel.count = count
+
+    def do_nothing(*args):
+        return None
+
+    ws.new_ws2811_t = FakeLeds
+    ws.ws2811_channel_get = lambda leds, index: leds.channels[index]
+    ws.ws2811_channel_t_count_set = ws2811_channel_t_count_set
+    ws.ws2811_channel_t_leds_get = lambda channel: FakePointer(ctypes.addressof(channel.leds))
+    ws.ws2811_led_set = ws2811_led_set
+    ws.ws2811_init = ws2811_init
+    ws.ws2811_render = lambda leds: ws.WS2811_SUCCESS
+    ws.ws2811_get_return_t_str = lambda code: f"Error {code}"
+
+    for name in ("ws2811_channel_t_strip_type_set", "ws2811_channel_t_gpionum_set", "ws2811_channel_t_invert_set",
+                 "ws2811_channel_t_brightness_set", "ws2811_t_freq_set", "ws2811_t_dmanum_set"):
+        setattr(ws, name, do_nothing)
+
+    return ws
+
+
+class FakeDevice():
+    def __init__(self, device_config):
+        self.device_config = device_config
+
+
+def get_expected_leds(output_array):
+    """
+    Returns the packed colors like the original per LED implementation computed them.
+    """
+    output_array = output_array.clip(0, 255).astype(int)
+    return (output_array[0] << 16) | (output_array[1] << 8) | output_array[2]
+
+
+def benchmark_path(output, output_arrays, frames):
+    for output_array in output_arrays[:5]:
+        output.show(output_array)
+
+    times = []
+    for index in range(frames):
+        start_time = perf_counter()
+        output.show(output_arrays[index % len(output_arrays)])
+        times.append(perf_counter() - start_time)
+
+    times_ms = np.array(times) * 1000
+    return {
+        "mean_ms": float(np.mean(times_ms)),
+        "p99_ms": float(np.percentile(times_ms, 99))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the per LED and the bulk path of OutputRaspi.show().")
+    parser.add_argument("--led-counts", nargs="+", type=int, default=DEFAULT_LED_COUNTS, help="LED counts to measure.")
+    parser.add_argument("--frames", type=int, default=200, help="Measured frames per case.")
+    parser.add_argument("--save", help="Write the results into this baseline file.")
+    parser.add_argument("--compare", help="Compare the results with this baseline file. Exits with 1 on regressions.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Relative growth that counts as regression.")
+    args = parser.parse_args()
+
+    # The fake module has to be registered before OutputRaspi imports it.
+    sys.modules["_rpi_ws281x"] = create_fake_ws()
+    from libs.outputs.output_raspi import OutputRaspi  # pylint: disable=E0611, E0401
+
+    with open(TEMPLATE_PATH, "r") as config_file:
+        config = json.load(config_file)
+
+    results = {}
+    exit_code = 0
+    rng = np.random.RandomState(0)
+    print(f'{"LEDs":>6} {"Per LED ms":>11} {"Bulk ms":>9} {"Speedup":>8} {"Equal":>6}')
+
+    for led_count in args.led_counts:
+        device_config = copy.deepcopy(config["default_device"])
+        device_config["LED_Count"] = led_count
+        output_arrays = [rng.randint(0, 256, (3, led_count)).astype(np.uint8) for _ in range(8)]
+
+        path_stats = {}
+        path_leds = {}
+        for path_name, bulk_write in (("per_led", False), ("bulk", True)):
+            output = OutputRaspi(FakeDevice(device_config))
+            output.bulk_write = bulk_write
+            path_stats[path_name] = benchmark_path(output, output_arrays, args.frames)
+            results[f"{path_name}/{led_count}"] = path_stats[path_name]
+
+            # Both paths have to leave the same colors in the LED array.
+            output.show(output_arrays[0])
+            path_leds[path_name] = np.array(output.channel.leds[:led_count], dtype=np.int64)
+
+        expected_leds = get_expected_leds(output_arrays[0])
+        equal = all(np.array_equal(leds, expected_leds) for leds in path_leds.values())
+        if not equal:
+            exit_code = 1
+
+        per_led_ms = path_stats["per_led"]["mean_ms"]
+        bulk_ms = path_stats["bulk"]["mean_ms"]
+        print(f'{led_count:>6} {per_led_ms:>11.3f} {bulk_ms:>9.3f} {per_led_ms / bulk_ms if bulk_ms else 0:>7.1f}x {"yes" if equal else "NO":>6}')
+
+    if args.save is not None:
+        save_baseline(args.save, results, {"frames": args.frames})
+        print(f"Baseline written to: {args.save}")
+
+    if args.compare is not None:
+        baseline = load_baseline(args.compare)
+        regressions = compare_results(baseline["results"], results, COMPARED_METRICS, args.threshold)
+
+        if not regressions:
+            print(f"No regressions compared with: {args.compare}")
+        else:
+            print(f"Regressions compared with: {args.compare}")
+            for key, metric_name, old_value, new_value in regressions:
+                print(f"  {key} {metric_name}: {old_value:.3f} -> {new_value:.3f} ({(new_value / old_value - 1) * 100 if old_value else float('inf'):+.0f}%)")
+            exit_code = 1
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
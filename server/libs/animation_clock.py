@@ -0,0 +1,57 @@
+from time import monotonic
+
+
+class AnimationClock():
+    """
+    Time base of an effect, so its animations move with the time and not with the number of rendered frames.
+
+    tick() is called once before every run() of the effect. After it, delta is the time since the last tick
+    and elapsed the time since the first tick, both in seconds. frames is delta in frames of the reference fps,
+    e.g. 2.0 if the device renders with half its configured FPS.
+
+    Effects that only render when new audio data arrived skip many ticks. They move with lap(), the time since
+    their last movement, so no time is lost or counted twice.
+
+    All times are limited to max_delta, so an effect that was paused or not shown does not jump on its next frame.
+    """
+    def __init__(self, reference_fps, max_delta=0.25, clock=monotonic):
+        self.reference_fps = reference_fps
+        self.max_delta = max_delta
+
+        self._clock = clock
+        self._current_time = None
+        self._lap_times = {}
+
+        self.delta = 1.0 / reference_fps
+        self.elapsed = 0.0
+
+    def tick(self):
+        current_time = self._clock()
+
+        if self._current_time is not None:
+            self.delta = min(max(current_time - self._current_time, 0.0), self.max_delta)
+            self.elapsed += self.delta
+
+        self._current_time = current_time
+        return self.delta
+
+    def lap(self, name="move"):
+        """
+        Returns the time from the last lap with this name to the current tick in seconds.
+        The first lap returns 0, so an effect starts at its start position.
+        """
+        current_time = self._current_time
+        if current_time is None:
+            current_time = self._clock()
+
+        last_time = self._lap_times.get(name)
+        self._lap_times[name] = current_time
+
+        if last_time is None:
+            return 0.0
+        return min(max(current_time - last_time, 0.0), self.max_delta)
+
+    def get_frames(self):
+        return self.delta * self.reference_fps
+
+    frames = property(get_frames)
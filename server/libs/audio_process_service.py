@@ -1,36 +1,47 @@
+from libs.audio_sources.audio_source_synthetic import AudioSourceSynthetic  # pylint: disable=E0611, E0401
+from libs.audio_sources.audio_source_pyaudio import AudioSourcePyAudio  # pylint: disable=E0611, E0401
+from libs.audio_sources.audio_source_file import AudioSourceFile  # pylint: disable=E0611, E0401
+from libs.audio_sources.audio_source_pipe import AudioSourcePipe  # pylint: disable=E0611, E0401
 from libs.notification_item import NotificationItem  # pylint: disable=E0611, E0401
 from libs.notification_enum import NotificationEnum  # pylint: disable=E0611, E0401
+from libs.audio_source_enum import AudioSourcesEnum  # pylint: disable=E0611, E0401
+from libs.audio_ring_buffer import AudioRingBuffer  # pylint: disable=E0611, E0401
 from libs.config_service import ConfigService  # pylint: disable=E0611, E0401
-from libs.fps_limiter import FPSLimiter  # pylint: disable=E0611, E0401
-from libs.dsp import DSP  # pylint: disable=E0611, E0401
+from libs.dsp import DSP, OnsetDetector, BeatTracker  # pylint: disable=E0611, E0401
+from libs.latency_stats import LatencyTracker  # pylint: disable=E0611, E0401
+from libs.process_stats import ProcessStatsReporter  # pylint: disable=E0611, E0401
 
-from multiprocessing import Queue
 from queue import Empty
-
 from time import time
 import numpy as np
-import pyaudio
 import logging
 
 
 class AudioProcessService:
-    def start(self, config_lock, notification_queue_in, notification_queue_out, audio_queue):
+    # Seconds a paused routine waits for the next notification, so the stats are still published.
+    PAUSE_TIMEOUT = 1.0
+
+    def start(self, config_lock, notification_queue_in, notification_queue_out, shared_audio_data, latency_stats, process_stats):
         self.logger = logging.getLogger(__name__)
 
         self._config_lock = config_lock
         self._notification_queue_in = notification_queue_in
         self._notification_queue_out = notification_queue_out
-        self._audio_queue = audio_queue
+        self._shared_audio_data = shared_audio_data
+        self._latency_stats = latency_stats
 
-        self.audio_buffer_queue = Queue(2)
-        self.stream = None
+        self._ring_buffer = None
+        self._audio_source = None
+
+        self._stats_reporter = ProcessStatsReporter(process_stats, "audio", get_values=self.get_stats_values)
 
         self.init_audio_service(show_output=True)
 
         while True:
             try:
                 self.audio_service_routine()
-                self._fps_limiter.fps_limiter()
+                # The routine blocks on the ring buffer or, while paused, on the notification queue.
+                self._stats_reporter.tick()
             except KeyboardInterrupt:
                 break
 
@@ -40,60 +51,17 @@ class AudioProcessService:
             ConfigService.instance(self._config_lock).load_config()
             self._config = ConfigService.instance(self._config_lock).config
 
-            # Init FPS Limiter.
-            self._fps_limiter = FPSLimiter(120)
-
-            # Init pyaudio.
-            self._py_audio = pyaudio.PyAudio()
-
             self._skip_routine = False
 
-            self._numdevices = self._py_audio.get_device_count()
-            self._default_device_id = self._py_audio.get_default_input_device_info()['index']
-            self._devices = []
-
-            self.log_output(show_output, logging.INFO, "Found the following audio sources:")
-
-            # Select the audio device you want to use.
-            selected_device_list_index = self._config["general_settings"]["DEVICE_ID"]
-
-            # Check if the index is inside the list.
-            foundMicIndex = False
-
-            # For each audio device, add to list of devices.
-            for i in range(0, self._numdevices):
-                try:
-                    device_info = self._py_audio.get_device_info_by_host_api_device_index(0, i)
-
-                    if device_info["maxInputChannels"] >= 1:
-                        self._devices.append(device_info)
-                        self.log_output(show_output, logging.INFO, f'{device_info["index"]} - {device_info["name"]} - {device_info["defaultSampleRate"]}')
-
-                        if device_info["index"] == selected_device_list_index:
-                            foundMicIndex = True
-                except Exception as e:
-                    self.log_output(show_output, logging.ERROR, "Could not get device infos.")
-                    self.logger.exception(f"Unexpected error in AudioProcessService: {e}")
-
-            # Could not find a mic with the selected mic id, so I will use the first device I found.
-            if not foundMicIndex:
-                self.log_output(show_output, logging.ERROR, "********************************************************")
-                self.log_output(show_output, logging.ERROR, "*                      Error                           *")
-                self.log_output(show_output, logging.ERROR, "********************************************************")
-                self.log_output(show_output, logging.ERROR, f"Could not find the mic with the id: {selected_device_list_index}")
-                self.log_output(show_output, logging.ERROR, "Using the first mic as fallback.")
-                self.log_output(show_output, logging.ERROR, "Please change the id of the mic inside the config.")
-                selected_device_list_index = self._devices[0]["index"]
-
-            for device in self._devices:
-                if device["index"] == selected_device_list_index:
-                    self.log_output(show_output, logging.INFO, f"Selected ID: {selected_device_list_index}")
-                    self.log_output(show_output, logging.INFO, f'Using {device["index"]} - {device["name"]} - {device["defaultSampleRate"]}')
-                    self._device_id = device["index"]
-                    self._device_name = device["name"]
-                    self._device_rate = self._config["general_settings"]["DEFAULT_SAMPLE_RATE"]
-                    self._frames_per_buffer = self._config["general_settings"]["FRAMES_PER_BUFFER"]
-                    self.n_fft_bins = self._config["general_settings"]["N_FFT_BINS"]
+            self._available_audio_sources = {
+                AudioSourcesEnum.audio_source_pyaudio: AudioSourcePyAudio,
+                AudioSourcesEnum.audio_source_file: AudioSourceFile,
+                AudioSourcesEnum.audio_source_synthetic: AudioSourceSynthetic,
+                AudioSourcesEnum.audio_source_pipe: AudioSourcePipe
+            }
+
+            self._frames_per_buffer = self._config["general_settings"]["FRAMES_PER_BUFFER"]
+            self.n_fft_bins = self._config["general_settings"]["N_FFT_BINS"]
 
             self.start_time_1 = time()
             self.ten_seconds_counter_1 = time()
@@ -101,48 +69,63 @@ class AudioProcessService:
             self.ten_seconds_counter_2 = time()
 
             self._dsp = DSP(self._config)
+            # Beat and tempo detection runs once here, so the effects only read the results.
+            self._onset_detector = OnsetDetector(self.n_fft_bins)
+            self._beat_tracker = BeatTracker(self._dsp.frame_rate)
+            # Latency from the audio capture to the end of the DSP and to the publishing of the audio data.
+            self._latency_tracker = LatencyTracker(self._latency_stats, "audio")
 
-            self.audio = np.empty((self._frames_per_buffer), dtype="int16")
-
-            # Reinit buffer queue
-            self.audio_buffer_queue = Queue(2)
+            # Reinit the ring buffer. The callback and the routine run inside this process, so no queue is required.
+            self._ring_buffer = AudioRingBuffer(self._frames_per_buffer)
 
-            # callback function to stream audio, another thread.
-            def callback(in_data, frame_count, time_info, status):
-                if self._skip_routine:
-                    return (self.audio, pyaudio.paContinue)
-
-                try:
-                    self.audio_buffer_queue.put(in_data)
-                except Exception as e:
-                    pass
-
-                self.end_time_1 = time()
-
-                if time() - self.ten_seconds_counter_1 > 10:
-                    self.ten_seconds_counter_1 = time()
-                    time_dif = self.end_time_1 - self.start_time_1
-                    fps = 1 / time_dif
-                    self.logger.info(f"Callback | FPS: {fps:.2f}")
-
-                self.start_time_1 = time()
-
-                return (self.audio, pyaudio.paContinue)
-
-            self.log_output(show_output, logging.DEBUG, "Starting Open Audio Stream...")
-            self.stream = self._py_audio.open(
-                format=pyaudio.paInt16,
-                channels=1,
-                rate=self._device_rate,
-                input=True,
-                input_device_index=self._device_id,
-                frames_per_buffer=self._frames_per_buffer,
-                stream_callback=callback
-            )
+            # Select the audio source. Every source feeds the same ring buffer and DSP path.
+            audio_source_string = self._config["general_settings"].get("AUDIO_SOURCE", AudioSourcesEnum.audio_source_pyaudio.name)
+            try:
+                current_audio_source_enum = AudioSourcesEnum[audio_source_string]
+            except KeyError:
+                self.log_output(show_output, logging.ERROR, f"Unknown audio source: {audio_source_string}. Using PyAudio as fallback.")
+                current_audio_source_enum = AudioSourcesEnum.audio_source_pyaudio
+
+            self.log_output(show_output, logging.INFO, f"Found audio source: {current_audio_source_enum.name}")
+            self._audio_source = self._available_audio_sources[current_audio_source_enum](self._config, show_output)
+            self._audio_source.start(self.audio_source_callback)
         except Exception as e:
             self.logger.error("Could not init AudioService.")
             self.logger.exception(f"Unexpected error in init_audio_service: {e}")
 
+    def audio_source_callback(self, in_data, capture_time=0.0):
+        """
+        Receive one raw audio frame and its capture time from the audio source. Runs inside the thread of the audio source.
+        Returns False if the frame could not be stored.
+        """
+        if self._skip_routine:
+            return True
+
+        # Never block inside the real-time callback. A full buffer is counted as overflow.
+        accepted = self._ring_buffer.write(in_data, capture_time)
+
+        self.end_time_1 = time()
+
+        if time() - self.ten_seconds_counter_1 > 10:
+            self.ten_seconds_counter_1 = time()
+            time_dif = self.end_time_1 - self.start_time_1
+            fps = 1 / time_dif
+            self.logger.info(f"Callback | FPS: {fps:.2f} | Overflows: {self._ring_buffer.overflow_count}")
+
+        self.start_time_1 = time()
+
+        return accepted
+
+    def get_stats_values(self):
+        if self._ring_buffer is None:
+            return {}
+
+        return {
+            "queue_depth": self._ring_buffer.pending_count,
+            "overflows": self._ring_buffer.overflow_count,
+            "underruns": self._ring_buffer.underrun_count
+        }
+
     def log_output(self, show_output, log_level, message):
         if show_output:
             if log_level == logging.INFO:
@@ -156,15 +139,46 @@ class AudioProcessService:
         else:
             self.logger.debug(message)
 
+    def publish_audio_data(self, audio_datas, capture_time):
+        """
+        Add the beat detection to the audio data of one fft hop and publish it to all effects.
+        """
+        audio_datas["capture_time"] = capture_time
+        self._latency_tracker.add("dsp", capture_time)
+
+        # Check if value is higher than min value.
+        if audio_datas["vol"] < self._config["general_settings"]["MIN_VOLUME_THRESHOLD"]:
+            # Fill the array with zeros, to fade out the effect.
+            audio_datas["mel"] = np.zeros(self.n_fft_bins)
+
+        self._onset_detector.update(audio_datas["mel"], time() - audio_datas["hop_delay"])
+        self._beat_tracker.update(self._onset_detector.onset_strength)
+        audio_datas["freq_detects"] = dict(self._onset_detector.freq_detects)
+        audio_datas["freq_detect_counts"] = dict(self._onset_detector.freq_detect_counts)
+        audio_datas["onset_strength"] = self._onset_detector.onset_strength
+        audio_datas["bpm"] = self._beat_tracker.bpm
+        audio_datas["beat_phase"] = self._beat_tracker.beat_phase
+
+        # Publish the audio data to all effects at once.
+        self._shared_audio_data.write(audio_datas)
+        self._latency_tracker.add("publish", capture_time)
+        self._stats_reporter.add_frame()
+
     def audio_service_routine(self):
         try:
-            if not self._notification_queue_in.empty():
-                current_notification_item = self._notification_queue_in.get()
-
+            try:
+                if self._skip_routine:
+                    # Nothing to do until the process continues, so sleep until the next notification arrives.
+                    current_notification_item = self._notification_queue_in.get(timeout=self.PAUSE_TIMEOUT)
+                else:
+                    current_notification_item = self._notification_queue_in.get_nowait()
+            except Empty:
+                current_notification_item = None
+
+            if current_notification_item is not None:
                 if current_notification_item.notification_enum is NotificationEnum.config_refresh:
-                    if self.stream is not None:
-                        self.stream.stop_stream()
-                        self.stream.close()
+                    if self._audio_source is not None:
+                        self._audio_source.stop()
                     self.init_audio_service()
                     self._notification_queue_out.put(NotificationItem(NotificationEnum.config_refresh_finished, current_notification_item.device_id))
                 elif current_notification_item.notification_enum is NotificationEnum.process_continue:
@@ -175,33 +189,23 @@ class AudioProcessService:
             if self._skip_routine:
                 return
 
-            try:
-                in_data = self.audio_buffer_queue.get(block=True, timeout=1)
-            except Empty as e:
-                self.logger.debug("Audio in timeout. Queue is Empty")
+            # Get a view of the next raw audio frame. The ring buffer is preallocated, so nothing is copied here.
+            y = self._ring_buffer.read(timeout=1)
+            if y is None:
+                self.logger.debug("Audio in timeout. Ring buffer is empty.")
                 return
 
-            # Convert the raw string audio stream to an array.
-            y = np.fromstring(in_data, dtype=np.int16)
-            # Use the type float32.
-            y = y.astype(np.float32)
-
-            # Process the audio stream.
-            audio_datas = self._dsp.update(y)
-
-            # Check if value is higher than min value.
-            if audio_datas["vol"] < self._config["general_settings"]["MIN_VOLUME_THRESHOLD"]:
-                # Fill the array with zeros, to fade out the effect.
-                audio_datas["mel"] = np.zeros(self.n_fft_bins)
-
-            if self._audio_queue.full():
-                try:
-                    pre_audio_data = self._audio_queue.get(block=True, timeout=0.033)
-                    del pre_audio_data
-                except Exception as e:
-                    pass
+            # Process the audio stream. The dsp converts the int16 samples into its own float32 window.
+            # Every completed fft hop inside the audio frame produces its own audio data.
+            audio_datas_list = self._dsp.update(y)
+            if not audio_datas_list:
+                # Not enough new samples for the next fft hop.
+                return
 
-            self._audio_queue.put(audio_datas, False)
+            # The spectrum is as old as the newest audio sample inside its window.
+            capture_time = self._ring_buffer.read_timestamp
+            for audio_datas in audio_datas_list:
+                self.publish_audio_data(audio_datas, capture_time - audio_datas["hop_delay"])
 
             self.end_time_2 = time()
 
@@ -209,7 +213,7 @@ class AudioProcessService:
                 self.ten_seconds_counter_2 = time()
                 time_dif = self.end_time_2 - self.start_time_2
                 fps = 1 / time_dif
-                self.logger.info(f"Routine | FPS: {fps:.2f}")
+                self.logger.info(f"Routine | FPS: {fps:.2f} | Underruns: {self._ring_buffer.underrun_count} | {self._latency_tracker.get_log_text()}")
 
             self.start_time_2 = time()
 
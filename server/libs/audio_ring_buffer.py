@@ -0,0 +1,104 @@
+from threading import Event
+import numpy as np
+
+
+class AudioRingBuffer():
+    """
+    Preallocated single producer / single consumer ring buffer for raw int16 audio frames.
+
+    The producer is the audio callback thread and the consumer is the audio process routine.
+    Both live inside the same process, so there is no need to pickle the frames through a pipe.
+
+    The producer only moves the write counter and the consumer only moves the read counter.
+    The callback never waits: if the buffer is full, the new frame is dropped and counted as overflow.
+    """
+    def __init__(self, frames_per_buffer, capacity=8):
+        if capacity < 2:
+            raise ValueError("The ring buffer needs at least two slots.")
+
+        self._frames_per_buffer = int(frames_per_buffer)
+        self._capacity = int(capacity)
+
+        # One contiguous block of memory for all slots. The numpy view is created only once.
+        self._buffer = bytearray(self._capacity * self._frames_per_buffer * np.dtype(np.int16).itemsize)
+        self._frames = np.frombuffer(self._buffer, dtype=np.int16).reshape(self._capacity, self._frames_per_buffer)
+        # Capture time of every slot, see AudioSource.get_capture_time().
+        self._timestamps = np.zeros(self._capacity)
+        self._read_timestamp = 0.0
+
+        # Monotonic counters. Only the producer writes _write_count, only the consumer writes _read_count.
+        self._write_count = 0
+        self._read_count = 0
+
+        self.overflow_count = 0
+        self.underrun_count = 0
+
+        self._data_available = Event()
+
+    def write(self, in_data, timestamp=0.0):
+        """
+        Copy one raw audio buffer and its capture time into the next free slot.
+        This is called from the audio callback and never blocks.
+
+        Returns
+        -------
+        accepted : bool
+            False if the buffer was full and the frame was dropped.
+        """
+        # Keep one slot free, it holds the frame the consumer is currently processing.
+        if self._write_count - self._read_count >= self._capacity - 1:
+            self.overflow_count += 1
+            return False
+
+        slot = self._frames[self._write_count % self._capacity]
+        samples = np.frombuffer(in_data, dtype=np.int16)
+
+        if len(samples) == self._frames_per_buffer:
+            slot[:] = samples
+        else:
+            # Short buffers are padded with silence, long buffers are cut.
+            count = min(len(samples), self._frames_per_buffer)
+            slot[:count] = samples[:count]
+            slot[count:] = 0
+
+        self._timestamps[self._write_count % self._capacity] = timestamp
+        self._write_count += 1
+        self._data_available.set()
+        return True
+
+    def read(self, timeout=None):
+        """
+        Return the oldest unread frame as a view into the ring buffer, without copying.
+        The view stays valid until the next call of read(). Its capture time is stored in read_timestamp.
+
+        Returns None if no frame arrived within the timeout.
+        """
+        if self._write_count == self._read_count:
+            self._data_available.clear()
+            # Check again, the producer could have written between the check and the clear.
+            if self._write_count == self._read_count:
+                if not self._data_available.wait(timeout):
+                    self.underrun_count += 1
+                    return None
+
+        frame = self._frames[self._read_count % self._capacity]
+        self._read_timestamp = self._timestamps[self._read_count % self._capacity]
+        self._read_count += 1
+        return frame
+
+    def clear(self):
+        """Drop all unread frames."""
+        self._read_count = self._write_count
+
+    def get_pending_count(self):
+        return self._write_count - self._read_count
+
+    def get_capacity(self):
+        return self._capacity
+
+    def get_read_timestamp(self):
+        return self._read_timestamp
+
+    pending_count = property(get_pending_count)
+    capacity = property(get_capacity)
+    read_timestamp = property(get_read_timestamp)
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class AudioSourcesEnum(Enum):
+    audio_source_pyaudio = 1
+    audio_source_file = 2
+    audio_source_synthetic = 3
+    audio_source_pipe = 4
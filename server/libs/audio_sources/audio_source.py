@@ -0,0 +1,98 @@
+from threading import Thread
+from time import time, sleep, monotonic
+import logging
+
+
+class AudioSource:
+    """
+    Base class of all audio sources.
+
+    An audio source delivers raw int16 mono frames with FRAMES_PER_BUFFER samples and their capture time to a callback.
+    The callback returns False if the frame could not be accepted, e.g. because the ring buffer is full.
+
+    Sources without their own audio thread only implement read_frame().
+    The base class runs them inside a thread, either paced in real time or as fast as the consumer accepts the frames.
+    """
+    def __init__(self, config, source_id, show_output=False):
+        self.logger = logging.getLogger(__name__)
+
+        self._config = config
+        self._source_config = config.get("audio_sources", {}).get(source_id, {})
+        self._show_output = show_output
+
+        self._sample_rate = int(config["general_settings"]["DEFAULT_SAMPLE_RATE"])
+        self._frames_per_buffer = int(config["general_settings"]["FRAMES_PER_BUFFER"])
+        self._frame_duration = self._frames_per_buffer / self._sample_rate
+
+        # Sources that read from a file or generate the signal can run faster than real time.
+        self._realtime = True
+
+        self._callback = None
+        self._thread = None
+        self._cancel_token = False
+
+    def start(self, callback):
+        self._callback = callback
+        self._cancel_token = False
+        self._thread = Thread(target=self._thread_routine, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._cancel_token = True
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def read_frame(self):
+        """
+        Return the next frame as int16 bytes.
+        Return None if the source is exhausted.
+        """
+        raise NotImplementedError("Please implement this method.")
+
+    def _thread_routine(self):
+        next_frame_time = time()
+
+        while not self._cancel_token:
+            in_data = self.read_frame()
+            if in_data is None:
+                self.log_output(logging.INFO, "Audio source finished.")
+                break
+
+            if self._realtime:
+                # Pace the frames like a sound card would do. A full buffer drops the frame.
+                next_frame_time += self._frame_duration
+                wait_time = next_frame_time - time()
+                if wait_time > 0:
+                    sleep(wait_time)
+                elif wait_time < -1:
+                    # We are too far behind, e.g. after a pause. Do not try to catch up.
+                    next_frame_time = time()
+                self._callback(in_data, self.get_capture_time())
+            else:
+                # Run as fast as possible, but never drop a frame.
+                capture_time = self.get_capture_time()
+                while not self._callback(in_data, capture_time) and not self._cancel_token:
+                    sleep(0.0005)
+
+    def get_capture_time(self):
+        """
+        Returns the time.monotonic() timestamp of the first sample of a frame that is delivered now.
+        A frame is complete when its last sample arrives, so the first sample is one frame duration old.
+        """
+        return monotonic() - self._frame_duration
+
+    def log_output(self, log_level, message):
+        if self._show_output:
+            self.logger.log(log_level, message)
+        else:
+            self.logger.debug(message)
+
+    def get_sample_rate(self):
+        return self._sample_rate
+
+    def get_frames_per_buffer(self):
+        return self._frames_per_buffer
+
+    sample_rate = property(get_sample_rate)
+    frames_per_buffer = property(get_frames_per_buffer)
@@ -0,0 +1,78 @@
+from libs.audio_sources.audio_source import AudioSource  # pylint: disable=E0611, E0401
+
+import numpy as np
+import logging
+import wave
+import os
+
+
+class AudioSourceFile(AudioSource):
+    """
+    Plays a WAV file or a raw PCM file (int16, mono, DEFAULT_SAMPLE_RATE).
+    The whole file is loaded and converted once, so reading a frame is only a slice.
+    """
+    def __init__(self, config, show_output=False):
+        # Call the constructor of the base class.
+        super(AudioSourceFile, self).__init__(config, "audio_source_file", show_output)
+
+        self._file_path = self._source_config["FILE_PATH"]
+        self._realtime = bool(self._source_config.get("REALTIME", True))
+        self._loop = bool(self._source_config.get("LOOP", True))
+
+        self._samples = self.load_samples(self._file_path, self._sample_rate)
+        self._position = 0
+
+        # Pad the end of the file with silence, so every frame has the full length.
+        missing_samples = -len(self._samples) % self._frames_per_buffer
+        if missing_samples:
+            self._samples = np.concatenate((self._samples, np.zeros(missing_samples, dtype=np.int16)))
+
+        self.log_output(logging.INFO, f"Using audio file: {self._file_path} | Real time: {self._realtime} | Loop: {self._loop}")
+
+    def read_frame(self):
+        if self._position >= len(self._samples):
+            if not self._loop:
+                return None
+            self._position = 0
+
+        start = self._position
+        self._position += self._frames_per_buffer
+        return self._samples[start:self._position].tobytes()
+
+    @staticmethod
+    def load_samples(file_path, sample_rate):
+        """
+        Load a WAV or raw PCM file as int16 mono samples with the given sample rate.
+        Multi channel files are mixed down, other sample rates are resampled linearly.
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f'Could not find the audio file: "{file_path}"')
+
+        if not file_path.lower().endswith(".wav"):
+            # Raw PCM is expected to be in the target format already.
+            return np.fromfile(file_path, dtype=np.int16)
+
+        with wave.open(file_path, "rb") as wave_file:
+            channels = wave_file.getnchannels()
+            sample_width = wave_file.getsampwidth()
+            file_rate = wave_file.getframerate()
+            raw_data = wave_file.readframes(wave_file.getnframes())
+
+        if sample_width != 2:
+            raise ValueError(f"Only 16 bit WAV files are supported. Sample width: {sample_width * 8} bit")
+
+        samples = np.frombuffer(raw_data, dtype=np.int16)
+
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1)
+
+        if file_rate != sample_rate:
+            duration = len(samples) / file_rate
+            new_length = int(duration * sample_rate)
+            samples = np.interp(
+                np.linspace(0, len(samples) - 1, new_length),
+                np.arange(len(samples)),
+                samples
+            )
+
+        return np.asarray(samples, dtype=np.int16)
@@ -0,0 +1,57 @@
+from libs.audio_sources.audio_source import AudioSource  # pylint: disable=E0611, E0401
+
+import logging
+import sys
+
+
+class AudioSourcePipe(AudioSource):
+    """
+    Reads raw PCM (int16, mono, DEFAULT_SAMPLE_RATE) from a FIFO or from stdin.
+
+    Example:
+    mkfifo /tmp/mlsc_audio
+    arecord -f S16_LE -c 1 -r 48000 -t raw > /tmp/mlsc_audio
+
+    Use "-" as PIPE_PATH to read from stdin. This only works if the source runs inside the main process,
+    because multiprocessing closes stdin of every child process.
+    """
+    def __init__(self, config, show_output=False):
+        # Call the constructor of the base class.
+        super(AudioSourcePipe, self).__init__(config, "audio_source_pipe", show_output)
+
+        self._pipe_path = self._source_config.get("PIPE_PATH", "-")
+        self._pipe = None
+        self._frame_bytes = self._frames_per_buffer * 2
+
+        # The writer of the pipe sets the pace. Frames are never dropped, a full buffer blocks the pipe.
+        self._realtime = False
+
+        self.log_output(logging.INFO, f"Using audio pipe: {self._pipe_path}")
+
+    def stop(self):
+        self._cancel_token = True
+        if self._pipe is not None and self._pipe is not sys.stdin.buffer:
+            self._pipe.close()
+        self._pipe = None
+
+    def read_frame(self):
+        try:
+            # Opening a FIFO blocks until the writer is connected, so it is done inside the thread.
+            if self._pipe is None:
+                if self._pipe_path == "-":
+                    self._pipe = sys.stdin.buffer
+                else:
+                    self._pipe = open(self._pipe_path, "rb")
+
+            in_data = self._pipe.read(self._frame_bytes)
+        except (OSError, ValueError) as e:
+            if not self._cancel_token:
+                self.logger.exception(f"Could not read from the audio pipe: {e}")
+            return None
+
+        # The writer closed the pipe.
+        if not in_data:
+            return None
+
+        # The ring buffer pads short frames with silence.
+        return in_data
@@ -0,0 +1,99 @@
+from libs.audio_sources.audio_source import AudioSource  # pylint: disable=E0611, E0401
+
+from time import monotonic
+import logging
+
+
+class AudioSourcePyAudio(AudioSource):
+    def __init__(self, config, show_output=False):
+        # Call the constructor of the base class.
+        super(AudioSourcePyAudio, self).__init__(config, "audio_source_pyaudio", show_output)
+
+        import pyaudio  # pylint: disable=import-error
+        self._pyaudio = pyaudio
+
+        # Init pyaudio.
+        self._py_audio = pyaudio.PyAudio()
+        self.stream = None
+
+        self._numdevices = self._py_audio.get_device_count()
+        self._default_device_id = self._py_audio.get_default_input_device_info()['index']
+        self._devices = []
+
+        self.log_output(logging.INFO, "Found the following audio sources:")
+
+        # Select the audio device you want to use.
+        selected_device_list_index = self._config["general_settings"]["DEVICE_ID"]
+
+        # Check if the index is inside the list.
+        foundMicIndex = False
+
+        # For each audio device, add to list of devices.
+        for i in range(0, self._numdevices):
+            try:
+                device_info = self._py_audio.get_device_info_by_host_api_device_index(0, i)
+
+                if device_info["maxInputChannels"] >= 1:
+                    self._devices.append(device_info)
+                    self.log_output(logging.INFO, f'{device_info["index"]} - {device_info["name"]} - {device_info["defaultSampleRate"]}')
+
+                    if device_info["index"] == selected_device_list_index:
+                        foundMicIndex = True
+            except Exception as e:
+                self.log_output(logging.ERROR, "Could not get device infos.")
+                self.logger.exception(f"Unexpected error in AudioSourcePyAudio: {e}")
+
+        # Could not find a mic with the selected mic id, so I will use the first device I found.
+        if not foundMicIndex:
+            self.log_output(logging.ERROR, "********************************************************")
+            self.log_output(logging.ERROR, "*                      Error                           *")
+            self.log_output(logging.ERROR, "********************************************************")
+            self.log_output(logging.ERROR, f"Could not find the mic with the id: {selected_device_list_index}")
+            self.log_output(logging.ERROR, "Using the first mic as fallback.")
+            self.log_output(logging.ERROR, "Please change the id of the mic inside the config.")
+            selected_device_list_index = self._devices[0]["index"]
+
+        for device in self._devices:
+            if device["index"] == selected_device_list_index:
+                self.log_output(logging.INFO, f"Selected ID: {selected_device_list_index}")
+                self.log_output(logging.INFO, f'Using {device["index"]} - {device["name"]} - {device["defaultSampleRate"]}')
+                self._device_id = device["index"]
+                self._device_name = device["name"]
+
+    def start(self, callback):
+        self._callback = callback
+
+        # callback function to stream audio, another thread.
+        def stream_callback(in_data, frame_count, time_info, status):
+            self._callback(in_data, self.get_stream_capture_time(time_info))
+            return (None, self._pyaudio.paContinue)
+
+        self.log_output(logging.DEBUG, "Starting Open Audio Stream...")
+        self.stream = self._py_audio.open(
+            format=self._pyaudio.paInt16,
+            channels=1,
+            rate=self._sample_rate,
+            input=True,
+            input_device_index=self._device_id,
+            frames_per_buffer=self._frames_per_buffer,
+            stream_callback=stream_callback
+        )
+
+    def get_stream_capture_time(self, time_info):
+        """
+        Convert the ADC time of PortAudio into a time.monotonic() timestamp.
+        The stream clock of PortAudio has its own origin, so only the age of the buffer is taken from it.
+        Some host APIs do not fill the time info, then the frame duration is used as age.
+        """
+        adc_time = time_info.get("input_buffer_adc_time", 0) if time_info else 0
+        current_time = time_info.get("current_time", 0) if time_info else 0
+        if adc_time <= 0 or current_time < adc_time:
+            return self.get_capture_time()
+        return monotonic() - (current_time - adc_time)
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+        self._py_audio.terminate()
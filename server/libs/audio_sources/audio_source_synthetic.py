@@ -0,0 +1,78 @@
+from libs.audio_sources.audio_source import AudioSource  # pylint: disable=E0611, E0401
+
+import numpy as np
+import logging
+
+
+class AudioSourceSynthetic(AudioSource):
+    """
+    Generates test signals, so the pipeline can run without any sound card or file.
+
+    Signals:
+    sine        - Constant tone with FREQUENCY_START.
+    sine_sweep  - Logarithmic sweep from FREQUENCY_START to FREQUENCY_END within SWEEP_DURATION seconds.
+    click_track - Short decaying clicks with BPM beats per minute.
+    white_noise - Uniform white noise.
+    """
+    def __init__(self, config, show_output=False):
+        # Call the constructor of the base class.
+        super(AudioSourceSynthetic, self).__init__(config, "audio_source_synthetic", show_output)
+
+        self._signal = self._source_config.get("SIGNAL", "sine_sweep")
+        self._frequency_start = float(self._source_config.get("FREQUENCY_START", 50))
+        self._frequency_end = float(self._source_config.get("FREQUENCY_END", 16000))
+        self._sweep_duration = float(self._source_config.get("SWEEP_DURATION", 10))
+        self._bpm = float(self._source_config.get("BPM", 120))
+        self._amplitude = float(self._source_config.get("AMPLITUDE", 0.5))
+        self._realtime = bool(self._source_config.get("REALTIME", True))
+
+        self._signal_generators = {
+            "sine": self.generate_sine,
+            "sine_sweep": self.generate_sine_sweep,
+            "click_track": self.generate_click_track,
+            "white_noise": self.generate_white_noise
+        }
+
+        if self._signal not in self._signal_generators:
+            self.logger.error(f"Unknown synthetic signal: {self._signal}. Using sine_sweep.")
+            self._signal = "sine_sweep"
+
+        self._generate = self._signal_generators[self._signal]
+
+        # Sample counter of the first sample in the next frame. It keeps the phase continuous between frames.
+        self._sample_index = 0
+        self._phase = 0.0
+        self._sample_offsets = np.arange(self._frames_per_buffer)
+        self._random = np.random.RandomState(0)
+
+        self.log_output(logging.INFO, f"Using synthetic audio signal: {self._signal}")
+
+    def read_frame(self):
+        signal = self._generate()
+        self._sample_index += self._frames_per_buffer
+        return np.asarray(signal * self._amplitude * 32767, dtype=np.int16).tobytes()
+
+    def generate_sine(self):
+        return self._oscillator(np.full(self._frames_per_buffer, self._frequency_start))
+
+    def generate_sine_sweep(self):
+        sweep_samples = max(int(self._sweep_duration * self._sample_rate), 1)
+        position = ((self._sample_index + self._sample_offsets) % sweep_samples) / sweep_samples
+        frequencies = self._frequency_start * (self._frequency_end / self._frequency_start) ** position
+        return self._oscillator(frequencies)
+
+    def generate_click_track(self):
+        beat_samples = max(int(60.0 / self._bpm * self._sample_rate), 1)
+        click_length = int(0.01 * self._sample_rate)
+        position = (self._sample_index + self._sample_offsets) % beat_samples
+        # Decaying 1 kHz burst at the start of every beat.
+        envelope = np.where(position < click_length, np.exp(-position / (click_length / 5.0)), 0.0)
+        return envelope * np.sin(2 * np.pi * 1000.0 * position / self._sample_rate)
+
+    def generate_white_noise(self):
+        return self._random.uniform(-1.0, 1.0, self._frames_per_buffer)
+
+    def _oscillator(self, frequencies):
+        phases = self._phase + np.cumsum(2 * np.pi * frequencies / self._sample_rate)
+        self._phase = phases[-1] % (2 * np.pi)
+        return np.sin(phases)
@@ -3,6 +3,44 @@ import numpy as np
 import logging
 
 
+class GradientLoop():
+    """
+    Periodic color array that moves with a phase offset, instead of rolling the whole array every frame.
+
+    Moving the phase by n shows the same colors as np.roll(colors, n, axis=1): The column i shows the color i - phase.
+    Only the requested columns are gathered, so the cost does not depend on the length of the gradient.
+    A fractional phase blends the two neighbouring colors, so slow speeds move smoothly instead of in whole pixels.
+    """
+    def __init__(self, colors):
+        self.colors = np.asarray(colors, dtype=float)
+        self.period = self.colors.shape[1]
+        self.phase = 0.0
+
+    def move(self, steps):
+        self.phase = (self.phase + steps) % self.period
+
+    def get_colors(self, column_indexes, interpolate=True):
+        """
+        Returns the colors of the columns with the shape (3, len(column_indexes)).
+        """
+        column_indexes = np.asarray(column_indexes)
+        whole_phase = int(self.phase)
+        fraction = self.phase - whole_phase
+
+        colors = self.colors[:, (column_indexes - whole_phase) % self.period]
+        if not interpolate or fraction == 0:
+            return colors
+
+        next_colors = self.colors[:, (column_indexes - whole_phase - 1) % self.period]
+        return colors * (1 - fraction) + next_colors * fraction
+
+    def get_window(self, start, length, interpolate=True):
+        """
+        Returns the colors of the columns start to start + length, like full_gradient[:, start:start + length].
+        """
+        return self.get_colors(np.arange(start, start + length), interpolate)
+
+
 class ColorService():
     def __init__(self, config, device_config):
         self.logger = logging.getLogger(__name__)
@@ -13,9 +51,11 @@ class ColorService():
         self.full_fadegradients = {}
         self.full_slide = {}
         self.full_bubble = {}
+        self.gradient_loops = {}
 
     def build_gradients(self):
         self.full_gradients = {}
+        self.gradient_loops = {}
 
         for key in self._config["gradients"].keys():
             not_mirrored_gradient = self._easing_gradient_generator(
@@ -31,6 +71,9 @@ class ColorService():
                 axis=1
             )
 
+            # The effects that move the gradient use the loop, so the full gradient is never rolled.
+            self.gradient_loops[key] = GradientLoop(self.full_gradients[key])
+
     def build_fadegradients(self):
         self.full_fadegradients = {}
 
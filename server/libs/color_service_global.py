@@ -1,13 +1,19 @@
+from libs.color_service import GradientLoop  # pylint: disable=E0611, E0401
+
 from time import time
 import numpy as np
 import logging
 
 
 class ColorServiceGlobal():
-    def __init__(self, config):
+    def __init__(self, config, clock=time):
+        """
+        clock: Function that returns the current time in seconds. The offline renderer passes its virtual clock.
+        """
         self.logger = logging.getLogger(__name__)
 
         self._config = config
+        self._clock = clock
         device_config = {}
         if len(self._config["device_configs"].keys()) > 0:
             device_key = list(self._config["device_configs"].keys())[0]
@@ -20,18 +26,20 @@ class ColorServiceGlobal():
         self.full_fadegradients = {}
         self.full_slide = {}
         self.full_bubble = {}
+        self.gradient_loops = {}
 
         self.build_gradients()
         self.current_fade_color = {}
         self.current_fade_color[0] = 0
         self.current_fade_color[1] = 0
         self.current_fade_color[2] = 0
-        self.last_fade_change_time = int(round(time() * 1000))
+        self.last_fade_change_time = int(round(self._clock() * 1000))
 
     def build_gradients(self):
         led_count = 1000
 
         self.full_gradients = {}
+        self.gradient_loops = {}
 
         for key in self._config["gradients"].keys():
             not_mirrored_gradient = self._easing_gradient_generator(
@@ -47,6 +55,8 @@ class ColorServiceGlobal():
                 axis=1
             )
 
+            self.gradient_loops[key] = GradientLoop(self.full_gradients[key])
+
     def _easing_gradient_generator(self, colors, length):
         """
         returns np.array of given length that eases between specified colors
@@ -109,27 +119,21 @@ class ColorServiceGlobal():
             return (0, 0, 0)
 
     def get_global_fade_color(self, fade_speed, fade_gradient, fade_reverse):
-        current_time = int(round(time() * 1000))
+        current_time = int(round(self._clock() * 1000))
         time_diff = current_time - self.last_fade_change_time
 
-        rolling_steps = int((fade_speed * time_diff) / 500)
-
-        if rolling_steps >= 1:
-            if fade_reverse:
-                current_reverse_translated = -1
-            else:
-                current_reverse_translated = 1
-
-            self.full_gradients[fade_gradient] = np.roll(
-                self.full_gradients[fade_gradient],
-                rolling_steps * current_reverse_translated,
-                axis=1
-            )
+        # Move the fade by a fractional step, so slow fades change the color smoothly.
+        rolling_steps = (fade_speed * time_diff) / 500
+        if fade_reverse:
+            rolling_steps = -rolling_steps
 
-            self.last_fade_change_time = int(round(time() * 1000))
+        gradient_loop = self.gradient_loops[fade_gradient]
+        gradient_loop.move(rolling_steps)
+        self.last_fade_change_time = current_time
 
-        self.current_fade_color[0] = self.full_gradients[fade_gradient][0][0]
-        self.current_fade_color[1] = self.full_gradients[fade_gradient][1][0]
-        self.current_fade_color[2] = self.full_gradients[fade_gradient][2][0]
+        current_color = gradient_loop.get_colors([0])[:, 0]
+        self.current_fade_color[0] = current_color[0]
+        self.current_fade_color[1] = current_color[1]
+        self.current_fade_color[2] = current_color[2]
 
         return self.current_fade_color
@@ -1,22 +1,40 @@
 #
 #   Contains all configuration for the server.
 #   Load and save the config after every change.
+#   Changes are collected for CONFIG_SAVE_DELAY seconds and written together (write-behind).
 #
 
 from logging.handlers import RotatingFileHandler
+from threading import Timer, Lock
 from shutil import copyfile, copy
 from pathlib import Path
+from time import time, monotonic
 import coloredlogs
 import logging
+import atexit
 import json
 import sys
 import os
 
 
 class ConfigService():
+    # Seconds until a failed write of the config is tried again, at least.
+    SAVE_RETRY_DELAY = 5
+
     def __init__(self, config_lock):
         self.config = None
 
+        # State of the write-behind. The timer thread and the webserver threads share it.
+        self._save_timer = None
+        self._save_timer_lock = Lock()
+        self._config_dirty = False
+        self._last_backup_time = 0
+        self._logging_settings = None
+
+        # Writes of the config file of this process, for the metrics.
+        self.save_count = 0
+        self.save_duration_total = 0.0
+
         # Start with the default logging settings, because the config was not loaded.
         self.setup_logging()
 
@@ -57,6 +75,9 @@ class ConfigService():
         # Now the config was loaded, so we can reinit the logging with the set logging levels.
         self.setup_logging()
 
+        # Write pending changes before the process exits.
+        atexit.register(self.flush)
+
     def load_config(self):
         """Load the configuration file inside the self.config variable."""
         self.config_lock.acquire()
@@ -68,26 +89,88 @@ class ConfigService():
 
         self.logger.debug("Settings loaded from config.")
 
-    def save_config(self, config=None):
-        """Save the config file. Use the current self.config"""
-        self.logger.debug("Saving settings...")
+    def save_config(self, config=None, immediately=False):
+        """
+        Save the config file. Use the current self.config
+        The new values are visible in self.config at once, but the file is written after CONFIG_SAVE_DELAY seconds.
+        All changes inside this window are written together. Use immediately=True or flush() to write it now.
+        """
+        if config is not None:
+            self.config = config
 
-        self.config_lock.acquire()
+        save_delay = self.config["general_settings"].get("CONFIG_SAVE_DELAY", 2)
 
-        self.save_backup()
+        with self._save_timer_lock:
+            self._config_dirty = True
 
-        if config is not None:
-            self.config = config
+            if immediately or save_delay <= 0:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+            elif self._save_timer is None:
+                self.logger.debug(f"Saving settings in {save_delay} seconds...")
+                self.start_save_timer(save_delay)
+                return
+            else:
+                # The pending write contains this change as well.
+                return
 
-        with open(self._config_path, "w") as write_file:
-            json.dump(self.config, write_file, indent=4, sort_keys=True)
+        self.flush()
+
+    def flush(self):
+        """Write pending changes of the config to the file."""
+        with self._save_timer_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+
+            if not self._config_dirty:
+                return
+            self._config_dirty = False
+
+        self.logger.debug("Saving settings...")
+
+        save_start_time = monotonic()
+        self.config_lock.acquire()
+        try:
+            backup_interval = self.config["general_settings"].get("CONFIG_BACKUP_INTERVAL", 600)
+            if time() - self._last_backup_time >= backup_interval:
+                self.save_backup()
+
+            # Write a temp file and replace the config with it, so a power loss never leaves a half written config.
+            temp_path = self._config_path + ".tmp"
+            with open(temp_path, "w") as write_file:
+                json.dump(self.config, write_file, indent=4, sort_keys=True)
+                write_file.flush()
+                os.fsync(write_file.fileno())
+            os.replace(temp_path, self._config_path)
+            self.save_count += 1
+        except Exception as e:
+            # Keep the changes and try again later, so they do not wait for the next change or the exit.
+            retry_delay = max(self.config["general_settings"].get("CONFIG_SAVE_DELAY", 2), self.SAVE_RETRY_DELAY)
+            self.logger.exception(f"Could not save the config. Retry in {retry_delay} seconds. Exception: {e}")
+            with self._save_timer_lock:
+                self._config_dirty = True
+                if self._save_timer is None:
+                    self.start_save_timer(retry_delay)
+        finally:
+            self.config_lock.release()
+            self.save_duration_total += monotonic() - save_start_time
 
         # Maybe the logging updated
-        self.setup_logging()
-        self.config_lock.release()
+        if self._logging_settings != self.get_logging_settings():
+            self.setup_logging()
+
+    def start_save_timer(self, delay):
+        """Call flush() after the delay. The caller holds the save timer lock."""
+        self._save_timer = Timer(delay, self.flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
 
     def save_backup(self):
-        copy(self._config_path, self._backup_path)
+        if os.path.exists(self._config_path):
+            copy(self._config_path, self._backup_path)
+        self._last_backup_time = time()
 
     def reset_config(self):
         """Reset the config."""
@@ -102,7 +185,7 @@ class ConfigService():
         self.config_lock.release()
 
         # Save the config again.
-        self.save_config()
+        self.save_config(immediately=True)
 
     def load_template(self):
         config_template = None
@@ -133,7 +216,8 @@ class ConfigService():
 
         self.check_devices(loaded_config["device_configs"], template_config["default_device"])
 
-        self.save_config()
+        # The other processes load the config from the file, so it has to be written now.
+        self.save_config(immediately=True)
 
     def check_leaf(self, loaded_config_leaf, template_config_leaf):
         if type(template_config_leaf) is dict:
@@ -151,6 +235,17 @@ class ConfigService():
     def get_config_path(self):
         return self._config_path
 
+    def get_logging_settings(self):
+        if self.config is None:
+            return None
+
+        general_settings = self.config.get("general_settings", {})
+        return (
+            general_settings.get("LOG_LEVEL_CONSOLE"),
+            general_settings.get("LOG_LEVEL_FILE"),
+            general_settings.get("LOG_FILE_ENABLED")
+        )
+
     def setup_logging(self):
         logging_path = "../../.mlsc/"
         logging_file = "mlsc.log"
@@ -181,6 +276,8 @@ class ConfigService():
                 print(f"Could not load logging settings. Exception {e}")
                 pass
 
+        self._logging_settings = self.get_logging_settings()
+
         if not os.path.exists(logging_path):
             Path(logging_path).mkdir(exist_ok=True)
 
@@ -2,16 +2,21 @@ from multiprocessing import Process, Queue
 import logging
 
 from libs.effect_service import EffectService
+from libs.frame_mailbox import FrameMailbox
+from libs.device_control import DeviceControl
 from libs.output_service import OutputService
 
 
 class Device:
-    def __init__(self, config, device_config, color_service_global):
+    def __init__(self, config, device_config, color_service_global, shared_audio_data, latency_stats, process_stats):
         self.logger = logging.getLogger(__name__)
 
         self.__config = config
         self.__device_config = device_config
         self.__color_service_global = color_service_global
+        self.__shared_audio_data = shared_audio_data
+        self.__latency_stats = latency_stats
+        self.__process_stats = process_stats
 
         self.create_queues()
         self.create_processes()
@@ -23,8 +28,11 @@ class Device:
 
     def stop_device(self):
         self.logger.info(f'Stopping device: {self.__device_config["DEVICE_NAME"]}')
-        self.__effect_process.terminate()
-        self.__output_process.terminate()
+        # The processes are not started if the RenderService runs this device.
+        if self.__effect_process.is_alive():
+            self.__effect_process.terminate()
+        if self.__output_process.is_alive():
+            self.__output_process.terminate()
 
     def create_processes(self):
         self.__output_service = OutputService()
@@ -43,10 +51,10 @@ class Device:
         self.__device_notification_queue_in = Queue(2)
         self.__device_notification_queue_out = Queue(2)
         self.__effect_queue = Queue(2)
-        self.__audio_queue = Queue(2)
-        self.__output_queue = Queue(2)
+        self.__frame_mailbox = FrameMailbox(self.__device_config["LED_Count"])
+        self.__device_control = DeviceControl(self.__device_config["FPS"])
 
-    def refresh_config(self, config, device_config):
+    def refresh_config(self, config, device_config, start_device=True):
         self.logger.info(f'Refreshing config of device: {self.__device_config["DEVICE_NAME"]}')
 
         self.stop_device()
@@ -69,7 +77,8 @@ class Device:
             args=(self,)
         )
 
-        self.start_device()
+        if start_device:
+            self.start_device()
 
     def get_config(self):
         return self.__config
@@ -86,11 +95,23 @@ class Device:
     def get_effect_queue(self):
         return self.__effect_queue
 
-    def get_audio_queue(self):
-        return self.__audio_queue
+    def get_shared_audio_data(self):
+        return self.__shared_audio_data
 
-    def get_output_queue(self):
-        return self.__output_queue
+    def set_shared_audio_data(self, shared_audio_data):
+        self.__shared_audio_data = shared_audio_data
+
+    def get_frame_mailbox(self):
+        return self.__frame_mailbox
+
+    def get_device_control(self):
+        return self.__device_control
+
+    def get_latency_stats(self):
+        return self.__latency_stats
+
+    def get_process_stats(self):
+        return self.__process_stats
 
     def get_color_service_global(self):
         return self.__color_service_global
@@ -104,8 +125,14 @@ class Device:
 
     effect_queue = property(get_effect_queue)
 
-    audio_queue = property(get_audio_queue)
+    shared_audio_data = property(get_shared_audio_data, set_shared_audio_data)
+
+    frame_mailbox = property(get_frame_mailbox)
+
+    device_control = property(get_device_control)
+
+    latency_stats = property(get_latency_stats)
 
-    output_queue = property(get_output_queue)
+    process_stats = property(get_process_stats)
 
     color_service_global = property(get_color_service_global)
@@ -0,0 +1,44 @@
+from multiprocessing import RawArray
+
+
+class DeviceControl():
+    """
+    Shared values the load governor uses to throttle a running device without restarting it.
+
+    The device manager writes them, the effect and output service of the device read them every frame.
+    Both values are single doubles, so a write is never torn and no lock is needed.
+    """
+
+    # Layout of the shared array.
+    FPS = 0
+    QUALITY = 1
+
+    # The effects use all options.
+    QUALITY_FULL = 0
+    # Expensive options use cheaper variants, e.g. a box blur instead of a gaussian blur.
+    QUALITY_REDUCED = 1
+    # Expensive options are skipped.
+    QUALITY_LOW = 2
+
+    def __init__(self, fps):
+        self._values = RawArray("d", 2)
+        self.reset(fps)
+
+    def reset(self, fps):
+        self._values[self.FPS] = fps
+        self._values[self.QUALITY] = self.QUALITY_FULL
+
+    def get_fps(self):
+        return self._values[self.FPS]
+
+    def set_fps(self, fps):
+        self._values[self.FPS] = fps
+
+    def get_quality(self):
+        return int(self._values[self.QUALITY])
+
+    def set_quality(self, quality):
+        self._values[self.QUALITY] = quality
+
+    fps = property(get_fps, set_fps)
+    quality = property(get_quality, set_quality)
@@ -1,17 +1,21 @@
-from time import time
-import copy
+from multiprocessing import Process
+from threading import Thread, Lock
+from time import sleep
 import logging
 
 from libs.color_service_global import ColorServiceGlobal  # pylint: disable=E0611, E0401
 from libs.notification_item import NotificationItem  # pylint: disable=E0611, E0401
+from libs.effect_setting_item import EffectSettingItem  # pylint: disable=E0611, E0401
 from libs.notification_enum import NotificationEnum  # pylint: disable=E0611, E0401
 from libs.config_service import ConfigService  # pylint: disable=E0611, E0401
-from libs.fps_limiter import FPSLimiter  # pylint: disable=E0611, E0401
+from libs.render_service import RenderService  # pylint: disable=E0611, E0401
+from libs.process_stats import ProcessStatsReporter, get_queue_size  # pylint: disable=E0611, E0401
+from libs.load_governor import LoadGovernor  # pylint: disable=E0611, E0401
 from libs.device import Device  # pylint: disable=E0611, E0401
 
 
 class DeviceManager():
-    def start(self, config_lock, notification_queue_in, notification_queue_out, effect_queue, audio_queue):
+    def start(self, config_lock, notification_queue_in, notification_queue_out, effect_queue, shared_audio_data, latency_stats, process_stats):
         self.logger = logging.getLogger(__name__)
 
         self._config_lock = config_lock
@@ -20,18 +24,30 @@ class DeviceManager():
         self._notification_queue_in = notification_queue_in
         self._notification_queue_out = notification_queue_out
         self._effect_queue = effect_queue
-        self._audio_queue = audio_queue
+        self._shared_audio_data = shared_audio_data
+        self._latency_stats = latency_stats
+        self._process_stats = process_stats
 
-        # Init FPS Limiter.
-        self._fps_limiter = FPSLimiter(120)
-
-        self._skip_routine = False
         self._devices = {}
+        # The notifications and the effects are handled in different threads, both change the devices.
+        self._devices_lock = Lock()
+        self._render_process = None
+        self._render_mode = self.get_render_mode()
         self.init_devices()
         self.start_devices()
 
-        self.start_time = time()
-        self.ten_seconds_counter = time()
+        # Both routines block on their queues, so the stats are published by an own thread.
+        self._stats_reporter = ProcessStatsReporter(self._process_stats, "device_manager", get_values=self.get_stats_values)
+        self._stats_reporter.start_thread()
+
+        # Throttle low priority devices if the system is overloaded.
+        self._load_governor = LoadGovernor(self._process_stats)
+        self._load_governor_thread = Thread(target=self.load_governor_routine, daemon=True)
+        self._load_governor_thread.start()
+
+        # Forward the effects inside an own thread, so both queues can block until something arrives.
+        self._effect_thread = Thread(target=self.effect_routine, daemon=True)
+        self._effect_thread.start()
 
         while True:
             try:
@@ -39,82 +55,84 @@ class DeviceManager():
             except KeyboardInterrupt:
                 break
 
-    def routine(self):
-        # Check the effect queue.
-        if not self._effect_queue.empty():
+    def effect_routine(self):
+        while True:
             current_effect_item = self._effect_queue.get()
-            self.logger.debug(f"Device Manager received new effect: {current_effect_item.effect_enum} {current_effect_item.device_id}")
-            current_device = self._devices[current_effect_item.device_id]
-            current_device.effect_queue.put(current_effect_item)
-
-        if not self._notification_queue_in.empty():
-            current_notification_item = self._notification_queue_in.get()
-            self.logger.debug(f"Device Manager received new notification: {current_notification_item.notification_enum} - {current_notification_item.device_id}")
-
-            if current_notification_item.notification_enum is NotificationEnum.config_refresh:
-
-                devices_count_before_reload = len(self._config["device_configs"].keys())
-                self.logger.debug(f"Device count before: {devices_count_before_reload}")
-                self.reload_config()
-                devices_count_after_reload = len(self._config["device_configs"].keys())
-                self.logger.debug(f"Device count after: {devices_count_after_reload}")
-
-                if(devices_count_before_reload != devices_count_after_reload):
-                    self.reinit_devices()
-
-                if(current_notification_item.device_id == "all_devices"):
-                    for key, value in self._devices.items():
-                        self.restart_device(key)
-                else:
-                    self.restart_device(current_notification_item.device_id)
-                self._notification_queue_out.put(NotificationItem(NotificationEnum.config_refresh_finished, current_notification_item.device_id))
-
-            elif current_notification_item.notification_enum is NotificationEnum.process_continue:
-                self._skip_routine = False
-            elif current_notification_item.notification_enum is NotificationEnum.process_pause:
-                self._skip_routine = True
-
-        # Limit the fps to decrease lags caused by 100 percent CPU.
-        self._fps_limiter.fps_limiter()
+            self._stats_reporter.add_frame()
 
-        if self._skip_routine:
-            return
-
-        audio_data = self.get_audio_data()
-        self.refresh_audio_queues(audio_data)
-
-        self.end_time = time()
+            try:
+                with self._devices_lock:
+                    if isinstance(current_effect_item, EffectSettingItem):
+                        self.update_effect_settings(current_effect_item)
+                    else:
+                        self.logger.debug(f"Device Manager received new effect: {current_effect_item.effect_enum} {current_effect_item.device_id}")
+                        current_device = self._devices[current_effect_item.device_id]
+                        current_device.effect_queue.put(current_effect_item)
+            except Exception as e:
+                self.logger.exception(f"Could not forward the effect: {e}")
 
-        if time() - self.ten_seconds_counter > 10:
-            self.ten_seconds_counter = time()
-            self.time_dif = self.end_time - self.start_time
-            self.fps = 1 / self.time_dif
-            self.logger.info(f"FPS: {self.fps:.2f}")
+    def load_governor_routine(self):
+        while True:
+            sleep(self._load_governor.interval)
 
-        self.start_time = time()
+            try:
+                with self._devices_lock:
+                    enabled = self._config["general_settings"].get("LOAD_GOVERNOR_ENABLED", True)
+                    self._load_governor.update(self._devices.values(), enabled)
+            except Exception as e:
+                self.logger.exception(f"Load governor failed: {e}")
 
-    def get_audio_data(self):
-        audio_data = None
-        if not self._audio_queue.empty():
-            audio_data = self._audio_queue.get()
-        return audio_data
+    def routine(self):
+        # Block until the next notification arrives.
+        current_notification_item = self._notification_queue_in.get()
+        self.logger.debug(f"Device Manager received new notification: {current_notification_item.notification_enum} - {current_notification_item.device_id}")
 
-    def refresh_audio_queues(self, audio_data):
-        if audio_data is None:
-            return
-        for key, value in self._devices.items():
-            if value.audio_queue.full():
-                try:
-                    pre_audio_data = value.audio_queue.get(False)
-                    del pre_audio_data
-                except Exception as e:
-                    pass
-
-            audio_copy = copy.deepcopy(audio_data)
+        if current_notification_item.notification_enum is NotificationEnum.config_refresh:
             try:
-                value.audio_queue.put(audio_copy, block=True, timeout=0.33)
+                with self._devices_lock:
+                    self.refresh_devices(current_notification_item.device_id)
+                self._notification_queue_out.put(NotificationItem(NotificationEnum.config_refresh_finished, current_notification_item.device_id))
             except Exception as e:
-                pass
+                self.logger.exception(f"Could not refresh the devices: {e}")
+                self._notification_queue_out.put(NotificationItem(NotificationEnum.config_refresh_failed, current_notification_item.device_id))
+
+        # process_pause and process_continue need nothing here. The devices read the audio from the shared memory,
+        # and the effects are only forwarded while the devices lock is free, so they never meet a refresh.
+
+    def refresh_devices(self, device_id):
+        devices_count_before_reload = len(self._config["device_configs"].keys())
+        self.logger.debug(f"Device count before: {devices_count_before_reload}")
+        self.reload_config()
+        devices_count_after_reload = len(self._config["device_configs"].keys())
+        self.logger.debug(f"Device count after: {devices_count_after_reload}")
+
+        if(devices_count_before_reload != devices_count_after_reload or self._render_mode != self.get_render_mode()):
+            self.reinit_devices()
+
+        if(device_id == "all_devices"):
+            self.restart_devices(list(self._devices.keys()))
+        else:
+            self.restart_devices([device_id])
+
+    def update_effect_settings(self, effect_setting_item):
+        """
+        Forward changed effect settings to the running devices, without restarting them.
+        """
+        self.logger.debug(f"Device Manager received new effect settings: {effect_setting_item.effect_id} {effect_setting_item.device_id}")
+
+        if effect_setting_item.device_id == "all_devices":
+            device_ids = list(self._devices.keys())
+        else:
+            device_ids = [effect_setting_item.device_id]
+
+        for device_id in device_ids:
+            if device_id not in self._devices:
+                self.logger.error(f"Could not find device: {device_id}")
+                continue
+
+            # Keep the own config up to date, so the next restart of the device uses the new settings as well.
+            self._config["device_configs"][device_id]["effects"][effect_setting_item.effect_id].update(effect_setting_item.settings)
+            self._devices[device_id].effect_queue.put(EffectSettingItem(effect_setting_item.effect_id, effect_setting_item.settings, device_id))
 
     def init_devices(self):
         self.logger.debug("Entering init_devices()")
@@ -123,23 +141,76 @@ class DeviceManager():
         for key in self._config["device_configs"].keys():
             device_id = key
             self.logger.debug(f"Init device with device id: {device_id}")
-            self._devices[device_id] = Device(self._config, self._config["device_configs"][device_id], self._color_service_global)
+            self._devices[device_id] = Device(self._config, self._config["device_configs"][device_id], self._color_service_global, self._shared_audio_data, self._latency_stats, self._process_stats)
         self.logger.debug("Leaving init_devices()")
 
     def reinit_devices(self):
         self.logger.debug("Entering reinit_devices()")
+        self.stop_render_process()
         for key, value in self._devices.items():
             self.stop_device(key)
         self._devices = {}
+        self._render_mode = self.get_render_mode()
         self.init_devices()
         self.start_devices()
         self.logger.debug("Leaving reinit_devices()")
 
     def start_devices(self):
+        if self._render_mode == "single_process":
+            self.start_render_process()
+            return
+
         for key, value in self._devices.items():
             self.logger.debug(f"Starting device: {key}")
             value.start_device()
 
+    def get_stats_values(self):
+        return {
+            "queue_depth": get_queue_size(self._effect_queue)
+        }
+
+    def get_render_mode(self):
+        return self._config["general_settings"].get("RENDER_MODE", "process_per_device")
+
+    def start_render_process(self):
+        """
+        Start one process that renders all devices, instead of two processes per device.
+        """
+        if not self._devices:
+            return
+
+        self.logger.debug("Starting render process.")
+        self._render_service = RenderService()
+        self._render_process = Process(
+            target=self._render_service.start,
+            args=(
+                list(self._devices.values()),
+                int(self._config["general_settings"].get("RENDER_THREADS", 0)),
+            ))
+        self._render_process.start()
+
+    def stop_render_process(self):
+        if self._render_process is None:
+            return
+
+        self.logger.debug("Stopping render process.")
+        self._render_process.terminate()
+        self._render_process.join()
+        self._render_process = None
+
+    def restart_devices(self, device_ids):
+        if self._render_mode != "single_process":
+            for device_id in device_ids:
+                self.restart_device(device_id)
+            return
+
+        # The render process contains all devices, so it is restarted only once.
+        self.stop_render_process()
+        for device_id in device_ids:
+            self.logger.debug(f"Restarting {device_id}")
+            self._devices[device_id].refresh_config(self._config, self._config["device_configs"][device_id], start_device=False)
+        self.start_render_process()
+
     def reload_config(self):
         self.logger.debug("Entering reload_config()")
         ConfigService.instance(self._config_lock).load_config()
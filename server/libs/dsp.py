@@ -3,10 +3,12 @@ from scipy.ndimage.filters import gaussian_filter1d
 from numpy import abs, arange, linspace, zeros
 from math import log
 import numpy as np
+import logging
 
 
 class DSP():
     def __init__(self, config, device_config=None):
+        self.logger = logging.getLogger(__name__)
         self._config = config
         self._device_config = device_config
 
@@ -35,14 +37,27 @@ class DSP():
         # Number of audio samples to read every time frame.
         # self.samples_per_frame = int(default_sample_rate / fps)
         self.samples_per_frame = int(frames_per_buffer)
-        # Array containing the rolling audio sample window.
-        self.y_roll = np.random.rand(n_rolling_history, self.samples_per_frame) / 1e16
-        # self.fft_window = np.hamming(int(default_sample_rate / fps) * n_rolling_history)
-        self.fft_window = np.hamming(int(frames_per_buffer) * n_rolling_history)
+        # The window and hop size of the fft. Zero keeps the old behaviour:
+        # The window contains the last N_ROLLING_HISTORY audio buffers and every audio buffer is one hop.
+        self.window_size = int(self._config["general_settings"].get("FFT_WINDOW_SIZE", 0) or self.samples_per_frame * n_rolling_history)
+        self.hop_size = int(self._config["general_settings"].get("FFT_HOP_SIZE", 0) or self.samples_per_frame)
+        if self.window_size < 1 or self.hop_size < 1:
+            raise ValueError(f"FFT_WINDOW_SIZE and FFT_HOP_SIZE must be positive. Window size: {self.window_size} | Hop size: {self.hop_size}")
+        if self.hop_size > self.window_size:
+            self.logger.warning(f"FFT_HOP_SIZE {self.hop_size} is larger than the fft window {self.window_size}. Using the window size as hop size, so no samples are skipped.")
+            self.hop_size = self.window_size
+        # Rolling audio sample window with preallocated fft buffers.
+        self.stft = RollingSTFT(self.window_size, self.hop_size)
+        # Number of spectrums per second. update() splits the audio buffers into hops, so every hop produces one spectrum.
+        self.sample_rate = self._config["general_settings"]["DEFAULT_SAMPLE_RATE"]
+        self.frame_rate = self.sample_rate / self.hop_size
 
         self.samples = None
         self.mel_y = None
         self.mel_x = None
+        self.mel_bin_indexes = None
+        self.mel_weights = None
+        self.mel_band_offsets = None
         self.melbank = Melbank()
         self.create_mel_bank()
 
@@ -51,44 +66,56 @@ class DSP():
         Return processed audio data.
         Returns mel curve, x/y data.
         This method is called every time there is a microphone update.
+        The samples are added to the rolling window in hops, so a hop smaller than the audio buffer
+        produces several spectrums per call.
         Returns:
         -------
-        audio_data: dict
-            Dict containing "mel", "vol", "x", and "y".
+        audio_datas: list
+            One dict per completed hop, oldest first, containing "mel", "vol", "x", "y" and "hop_delay".
+            hop_delay is the duration of the samples that arrived after the hop, in seconds.
+            Empty if less than hop_size new samples arrived since the last spectrum.
         """
-        min_frequency = self._config["general_settings"]["MIN_FREQUENCY"]
-        max_frequency = self._config["general_settings"]["MAX_FREQUENCY"]
+        audio_datas = []
+        sample_count = len(audio_samples)
+        start = 0
+
+        while start < sample_count:
+            end = min(start + self.stft.missing_samples, sample_count)
+            # Normalize samples between 0 and 1 and add them to the rolling window.
+            self.stft.push(audio_samples[start:end], 1.0 / 2.0**15)
+            start = end
 
+            if self.stft.ready:
+                audio_data = self.analyze()
+                audio_data["hop_delay"] = (sample_count - end) / self.sample_rate
+                audio_datas.append(audio_data)
+
+        return audio_datas
+
+    def analyze(self):
+        """
+        Returns the audio data of the current window and consumes its hop.
+        """
         audio_data = {}
-        # Normalize samples between 0 and 1.
-        y = audio_samples / 2.0**15
-        # Construct a rolling window of audio samples.
-        self.y_roll[:-1] = self.y_roll[1:]
-        self.y_roll[-1, :] = np.copy(y)
-        y_data = np.concatenate(self.y_roll, axis=0).astype(np.float32)
-        vol = np.max(np.abs(y_data))
+        vol = self.stft.get_volume()
         # Transform audio input into the frequency domain.
-        N = len(y_data)
-        N_zeros = 2**int(np.ceil(np.log2(N))) - N
-        # Pad with zeros until the next power of two.
-        y_data *= self.fft_window
-        y_padded = np.pad(y_data, (0, N_zeros), mode='constant')
-        YS = np.abs(np.fft.rfft(y_padded)[:N // 2])
+        YS = self.stft.compute()
         # Construct a Mel filterbank from the FFT data.
-        mel = np.atleast_2d(YS).T * self.mel_y.T
+        # Only the non-zero weights of the triangular filters are applied, see Melbank.compress_melmat().
+        mel = YS[self.mel_bin_indexes]
+        mel *= self.mel_weights
+        mel = np.add.reduceat(mel, self.mel_band_offsets)
         # Scale data to values more suitable for visualization.
-        mel = np.sum(mel, axis=0)
         mel = mel**2.0
         # Gain normalization.
         self.mel_gain.update(np.max(gaussian_filter1d(mel, sigma=1.0)))
         mel /= self.mel_gain.value
         mel = self.mel_smoothing.update(mel)
-        x = np.linspace(min_frequency, max_frequency, len(mel))
         y = self.fft_plot_filter.update(mel)
 
         audio_data["mel"] = mel
         audio_data["vol"] = vol
-        audio_data["x"] = x
+        audio_data["x"] = self.x_axis
         audio_data["y"] = y
         return audio_data
 
@@ -112,11 +139,10 @@ class DSP():
         default_sample_rate = self._config["general_settings"]["DEFAULT_SAMPLE_RATE"]
         min_frequency = self._config["general_settings"]["MIN_FREQUENCY"]
         max_frequency = self._config["general_settings"]["MAX_FREQUENCY"]
-        frames_per_buffer = self._config["general_settings"]["FRAMES_PER_BUFFER"]
-        n_rolling_history = self._config["general_settings"]["N_ROLLING_HISTORY"]
         n_fft_bins = self._config["general_settings"]["N_FFT_BINS"]
 
-        samples = int(frames_per_buffer * (n_rolling_history / 2))
+        # The window is zero padded to the fft size, so the bins are sample_rate / fft_size apart.
+        samples = self.stft.fft_size // 2
 
         self.mel_y, (_, self.mel_x) = self.melbank.compute_melmat(
             num_mel_bands=n_fft_bins,
@@ -126,6 +152,268 @@ class DSP():
             sample_rate=default_sample_rate
         )
 
+        self.mel_bin_indexes, self.mel_weights, self.mel_band_offsets = self.melbank.compress_melmat(self.mel_y)
+
+        # The x axis of the mel curve does not change between the frames.
+        self.x_axis = np.linspace(min_frequency, max_frequency, n_fft_bins)
+
+
+class RollingSTFT():
+    """
+    Short-time fourier transform over a rolling window of audio samples.
+    All buffers are allocated once. Only np.fft.rfft returns a new array, because numpy has no output parameter for it.
+    """
+    def __init__(self, window_size, hop_size):
+        self.window_size = int(window_size)
+        self.hop_size = int(hop_size)
+        # Pad with zeros until the next power of two.
+        self.fft_size = 2**int(np.ceil(np.log2(self.window_size)))
+
+        # Circular sample buffer. Every sample is written twice, window_size apart,
+        # so the current window is always one contiguous view: self._samples[position:position + window_size]
+        self._samples = (np.random.rand(2 * self.window_size) / 1e16).astype(np.float32)
+        self._position = 0
+        self._pending_samples = 0
+
+        self._fft_window = np.hamming(self.window_size).astype(np.float32)
+        # The padding at the end stays zero, only the first window_size samples are overwritten.
+        self._fft_input = np.zeros(self.fft_size, dtype=np.float32)
+        self._abs_samples = np.zeros(self.window_size, dtype=np.float32)
+        self._spectrum = np.zeros(self.fft_size // 2)
+
+    def push(self, samples, scale=1.0):
+        """Add new samples to the rolling window. The samples are multiplied with scale."""
+        count = len(samples)
+        self._pending_samples += count
+
+        if count >= self.window_size:
+            # Only the newest samples fit into the window.
+            samples = samples[-self.window_size:]
+            count = self.window_size
+
+        first_part = min(count, self.window_size - self._position)
+        self._write(self._position, samples[:first_part], scale)
+        if count > first_part:
+            self._write(0, samples[first_part:], scale)
+
+        self._position = (self._position + count) % self.window_size
+
+    def _write(self, start, samples, scale):
+        end = start + len(samples)
+        np.multiply(samples, scale, out=self._samples[start:end], casting="unsafe")
+        self._samples[start + self.window_size:end + self.window_size] = self._samples[start:end]
+
+    def get_ready(self):
+        return self._pending_samples >= self.hop_size
+
+    def get_missing_samples(self):
+        """Returns the number of samples until the next hop is complete."""
+        return max(self.hop_size - self._pending_samples, 1)
+
+    def get_window(self):
+        """Returns a view of the current window, oldest sample first."""
+        return self._samples[self._position:self._position + self.window_size]
+
+    def get_volume(self):
+        np.abs(self.get_window(), out=self._abs_samples)
+        return self._abs_samples.max()
+
+    def compute(self):
+        """
+        Returns the magnitude spectrum of the current window and consumes one hop.
+        The returned array is reused by the next call.
+        """
+        self._pending_samples = max(self._pending_samples - self.hop_size, 0)
+
+        np.multiply(self.get_window(), self._fft_window, out=self._fft_input[:self.window_size])
+        np.abs(np.fft.rfft(self._fft_input)[:self.fft_size // 2], out=self._spectrum)
+        return self._spectrum
+
+    ready = property(get_ready)
+    missing_samples = property(get_missing_samples)
+
+
+class OnsetDetector():
+    """
+    Detects beats and low, mid and high peaks inside the mel spectrum.
+    It also calculates the spectral flux as onset strength for the BeatTracker.
+
+    A range is detected if one bin is min_percent_diff percent above its average of the last history frames
+    and above min_detect_amplitude. The same range is detected at most once every min_detect_interval seconds.
+    """
+    def __init__(self, n_fft_bins, history=40, min_detect_interval=0.2):
+        self.n_fft_bins = n_fft_bins
+        self.history = history
+        self.min_detect_interval = min_detect_interval
+
+        self.detection_ranges = {
+            "beat": (0, int(n_fft_bins * 0.13)),
+            "low": (int(n_fft_bins * 0.13), int(n_fft_bins * 0.4)),
+            "mid": (int(n_fft_bins * 0.4), int(n_fft_bins * 0.7)),
+            "high": (int(n_fft_bins * 0.8), int(n_fft_bins))
+        }
+        self.min_detect_amplitude = {
+            "beat": 0.7,
+            "low": 0.5,
+            "mid": 0.3,
+            "high": 0.3
+        }
+        self.min_percent_diff = {
+            "beat": 70,
+            "low": 100,
+            "mid": 50,
+            "high": 30
+        }
+
+        # Circular history of the mel spectrum, one row per frame.
+        self._mel_history = np.zeros((history, n_fft_bins))
+        self._history_position = 0
+        self._history_count = 0
+        self._prev_mel = np.zeros(n_fft_bins)
+        self._flux = np.zeros(n_fft_bins)
+
+        # Per bin amplitude and percent difference thresholds, so all ranges are checked at once.
+        self._range_names = list(self.detection_ranges.keys())
+        self._amplitude_thresholds = np.full((len(self._range_names), n_fft_bins), np.inf)
+        self._percent_thresholds = np.zeros((len(self._range_names), n_fft_bins))
+        for index, name in enumerate(self._range_names):
+            start, end = self.detection_ranges[name]
+            self._amplitude_thresholds[index, start:end] = self.min_detect_amplitude[name]
+            self._percent_thresholds[index, start:end] = self.min_percent_diff[name]
+
+        self._last_detect_times = np.full(len(self._range_names), -np.inf)
+
+        self.freq_detects = {name: False for name in self._range_names}
+        # Increases with every detection. Consumers compare it, so a skipped frame does not hide a detection.
+        self.freq_detect_counts = {name: 0 for name in self._range_names}
+        self.onset_strength = 0.0
+
+    def update(self, mel, timestamp):
+        """
+        Process the next mel spectrum.
+
+        Parameters
+        ----------
+        mel : numpy.ndarray
+            Mel spectrum with n_fft_bins values.
+        timestamp : float
+            Time of the frame in seconds.
+        """
+        # Spectral flux: Sum of all rising bins compared to the previous frame.
+        np.subtract(mel, self._prev_mel, out=self._flux)
+        np.maximum(self._flux, 0, out=self._flux)
+        self.onset_strength = float(self._flux.sum()) / self.n_fft_bins
+        self._prev_mel[:] = mel
+
+        self._mel_history[self._history_position] = mel
+        self._history_position = (self._history_position + 1) % self.history
+        self._history_count = min(self._history_count + 1, self.history)
+
+        if self._history_count < self.history:
+            for name in self._range_names:
+                self.freq_detects[name] = False
+            return
+
+        average = self._mel_history.mean(axis=0)
+        # Percent difference of the newest value to the average. Bins with an average of zero have no difference.
+        above_average = ((mel - average) * 100 >= self._percent_thresholds * average) & (average > 0)
+        above_amplitude = mel >= self._amplitude_thresholds
+        detected = np.any(above_average & above_amplitude, axis=1)
+        detected &= (timestamp - self._last_detect_times) > self.min_detect_interval
+        self._last_detect_times[detected] = timestamp
+
+        for index, name in enumerate(self._range_names):
+            self.freq_detects[name] = bool(detected[index])
+            if detected[index]:
+                self.freq_detect_counts[name] += 1
+
+
+class BeatTracker():
+    """
+    Estimates the tempo and the beat phase from the onset strength.
+
+    The tempo is the strongest lag of the autocorrelation of the onset strength envelope, weighted around 120 bpm
+    to avoid octave errors. The beat phase runs freely with the tempo and is pulled towards zero by strong onsets.
+    beat_phase is 0.0 on the beat and rises to 1.0 until the next beat.
+    """
+    def __init__(self, frame_rate, history_seconds=6.0, min_bpm=60, max_bpm=200, min_confidence=0.3):
+        self.frame_rate = float(frame_rate)
+        self.min_confidence = min_confidence
+
+        self._envelope = np.zeros(max(int(self.frame_rate * history_seconds), 4))
+        self._envelope_position = 0
+        self._frame_count = 0
+        # Pad the autocorrelation to avoid the circular wrap around.
+        self._fft_size = 2**int(np.ceil(np.log2(2 * len(self._envelope))))
+
+        self._min_lag = max(int(60 * self.frame_rate / max_bpm), 1)
+        self._max_lag = max(min(int(np.ceil(60 * self.frame_rate / min_bpm)), len(self._envelope) - 2), self._min_lag)
+        lags = np.arange(self._min_lag, self._max_lag + 1)
+        # Log-gaussian tempo prior with one octave deviation.
+        self._lag_weights = np.exp(-0.5 * np.log2(lags / (60 * self.frame_rate / 120)) ** 2)
+        self._smoothing_kernel = np.hanning(5)[1:-1]
+        # Estimating the tempo twice per second is enough.
+        self._update_interval = max(int(self.frame_rate / 2), 1)
+
+        # Running mean and variance of the onset strength with a time constant of one second.
+        self._alpha = min(1.0 / self.frame_rate, 1.0)
+        self._onset_mean = 0.0
+        self._onset_variance = 0.0
+
+        self.bpm = 0.0
+        self.beat_phase = 0.0
+        self.onset = False
+
+    def update(self, onset_strength):
+        self._envelope[self._envelope_position] = onset_strength
+        self._envelope_position = (self._envelope_position + 1) % len(self._envelope)
+        self._frame_count += 1
+
+        # An onset is a strength clearly above the recent average.
+        deviation = onset_strength - self._onset_mean
+        self.onset = deviation > 2 * np.sqrt(self._onset_variance) and onset_strength > 1e-3
+        self._onset_mean += self._alpha * deviation
+        self._onset_variance = (1 - self._alpha) * (self._onset_variance + self._alpha * deviation**2)
+
+        if self._frame_count >= len(self._envelope) and self._frame_count % self._update_interval == 0:
+            self.estimate_tempo()
+
+        if self.bpm <= 0:
+            return
+
+        self.beat_phase = (self.beat_phase + self.bpm / (60 * self.frame_rate)) % 1.0
+        if self.onset:
+            # Pull the phase towards the onset. Onsets far away from the expected beat move it less.
+            phase_error = self.beat_phase if self.beat_phase < 0.5 else self.beat_phase - 1.0
+            self.beat_phase = (self.beat_phase - 0.3 * phase_error * (1 - 2 * abs(phase_error))) % 1.0
+
+    def estimate_tempo(self):
+        envelope = np.concatenate((self._envelope[self._envelope_position:], self._envelope[:self._envelope_position]))
+        envelope -= envelope.mean()
+        # Widen the peaks, so a tempo between two integer lags is not weaker than its half tempo.
+        envelope = np.convolve(envelope, self._smoothing_kernel, mode="same")
+        spectrum = np.fft.rfft(envelope, self._fft_size)
+        autocorrelation = np.fft.irfft(spectrum.real**2 + spectrum.imag**2, self._fft_size)
+
+        if autocorrelation[0] <= 0:
+            return
+
+        weighted = autocorrelation[self._min_lag:self._max_lag + 1] * self._lag_weights
+        best = int(np.argmax(weighted))
+        # Keep the last tempo if the envelope is not periodic enough, e.g. noise or a break without drums.
+        if autocorrelation[self._min_lag + best] < self.min_confidence * autocorrelation[0]:
+            return
+
+        lag = float(self._min_lag + best)
+        # Parabolic interpolation between the neighbour lags.
+        if 0 < best < len(weighted) - 1:
+            left, center, right = weighted[best - 1], weighted[best], weighted[best + 1]
+            divisor = left - 2 * center + right
+            if divisor != 0:
+                lag += 0.5 * (left - right) / divisor
+
+        self.bpm = 60 * self.frame_rate / lag
+
 
 class ExpFilter():
     """Simple exponential smoothing filter."""
@@ -297,3 +585,44 @@ class Melbank():
                 (upper - freqs[right_slope]) / (upper - center)
             )
         return melmat, (center_frequencies_mel, freqs)
+
+    def compress_melmat(self, melmat):
+        """
+        Returns a banded representation of the mel matrix.
+        Each triangular filter only covers a few fft bands, so almost all entries of melmat are zero.
+        Parameters
+        ----------
+        melmat : ndarray
+            Transformation matrix from compute_melmat().
+        Returns
+        -------
+        bin_indexes : ndarray
+            Concatenated fft band indexes of all mel bands.
+        weights : ndarray
+            Filter weight for every entry of bin_indexes.
+        band_offsets : ndarray <num_mel_bands>
+            Start of every mel band inside bin_indexes and weights.
+            Use it with np.add.reduceat(spectrum[bin_indexes] * weights, band_offsets).
+        """
+        bin_indexes = []
+        weights = []
+        band_offsets = zeros(len(melmat), dtype=np.intp)
+
+        offset = 0
+        for imelband, band in enumerate(melmat):
+            nonzero = np.flatnonzero(band)
+
+            if len(nonzero) > 0:
+                start = nonzero[0]
+                stop = nonzero[-1] + 1
+            else:
+                # reduceat needs at least one entry per band. An empty band gets one zero weight.
+                start = 0
+                stop = 1
+
+            bin_indexes.append(arange(start, stop))
+            weights.append(band[start:stop])
+            band_offsets[imelband] = offset
+            offset += stop - start
+
+        return np.concatenate(bin_indexes), np.concatenate(weights), band_offsets
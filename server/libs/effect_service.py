@@ -25,8 +25,12 @@ from libs.effects.effect_rods import EffectRods  # pylint: disable=E0611, E0401
 from libs.effects.effect_wave import EffectWave  # pylint: disable=E0611, E0401
 from libs.effects.effect_off import EffectOff  # pylint: disable=E0611, E0401
 from libs.effects_enum import EffectsEnum  # pylint: disable=E0611, E0401
-from libs.fps_limiter import FPSLimiter  # pylint: disable=E0611, E0401
+from libs.effect_setting_item import EffectSettingItem  # pylint: disable=E0611, E0401
+from libs.frame_scheduler import FrameScheduler  # pylint: disable=E0611, E0401
+from libs.latency_stats import LatencyTracker  # pylint: disable=E0611, E0401
+from libs.process_stats import ProcessStatsReporter, get_queue_size  # pylint: disable=E0611, E0401
 
+from queue import Empty
 from time import time
 import logging
 
@@ -35,11 +39,29 @@ import logging
 
 
 class EffectService():
+    # The effect renders at the start of every frame, the output shows the frame half a frame later.
+    FRAME_PHASE = 0.0
+
     def start(self, device):
         """
         Start the effect service process.
         You can change the effect by adding a new effect enum inside the enum_queue.
         """
+        self.setup(device)
+
+        while not self._cancel_token:
+            try:
+                self.effect_routine()
+            except KeyboardInterrupt:
+                break
+
+        self.logger.info(f'Effects component stopped. Device: {self._device.device_config["DEVICE_NAME"]}')
+
+    def setup(self, device):
+        """
+        Prepare the effect service without starting the loop.
+        The RenderService uses it to run the effects of all devices inside one process.
+        """
         self.logger = logging.getLogger(__name__)
 
         self._device = device
@@ -48,9 +70,37 @@ class EffectService():
         self.ten_seconds_counter = time()
         self.start_time = time()
 
-        self._fps_limiter = FPSLimiter(self._device.device_config["FPS"])
+        self._frame_scheduler = FrameScheduler(self._device.device_config["FPS"], phase=self.FRAME_PHASE)
+
+        # Latency from the audio capture until the effect rendered a frame from it.
+        self._latency_tracker = LatencyTracker(self._device.latency_stats, self._device.device_config["DEVICE_NAME"])
+        self._last_capture_time = 0.0
+
+        self._stats_reporter = ProcessStatsReporter(self._device.process_stats, "effect", self._device.device_config["DEVICE_NAME"], get_values=self.get_stats_values)
+
+        self._available_effects = self.get_available_effects()
+
+        self._initialized_effects = {}
+        self._current_effect = {}
 
-        self._available_effects = {
+        try:
+            # Get the last effect and set it.
+            last_effect_string = self._device.device_config["effects"]["last_effect"]
+            self._current_effect = EffectsEnum[last_effect_string]
+        except Exception:
+            self.logger.exception("Could not parse last effect. Set effect to off.")
+            self._current_effect = EffectsEnum.effect_off
+
+        # A token to cancel the while loop.
+        self._cancel_token = False
+        self._skip_effect = False
+        self.logger.info(f'Effects component started. Device: {self._device.device_config["DEVICE_NAME"]}')
+
+    def get_available_effects(self):
+        """
+        Returns the effect class of every effect enum. The offline renderer uses it as well.
+        """
+        return {
             EffectsEnum.effect_off: EffectOff,
             EffectsEnum.effect_single: EffectSingle,
             EffectsEnum.effect_gradient: EffectGradient,
@@ -78,38 +128,29 @@ class EffectService():
             EffectsEnum.effect_segment_color: EffectSegmentColor
         }
 
-        self._initialized_effects = {}
-        self._current_effect = {}
-
-        try:
-            # Get the last effect and set it.
-            last_effect_string = self._device.device_config["effects"]["last_effect"]
-            self._current_effect = EffectsEnum[last_effect_string]
-        except Exception:
-            self.logger.exception("Could not parse last effect. Set effect to off.")
-            self._current_effect = EffectsEnum.effect_off
+    def effect_routine(self):
+        # Follow the frame rate the load governor allows the device.
+        target_fps = self._device.device_control.fps
+        if target_fps != self._frame_scheduler.fps:
+            self._frame_scheduler.set_fps(target_fps)
 
-        # A token to cancel the while loop.
-        self._cancel_token = False
-        self._skip_effect = False
-        self.logger.info(f'Effects component started. Device: {self._device.device_config["DEVICE_NAME"]}')
+        # Wait for the next frame deadline.
+        self._frame_scheduler.wait()
 
-        while not self._cancel_token:
-            try:
-                self.effect_routine()
-            except KeyboardInterrupt:
-                break
+        self.step()
 
-        self.logger.info(f'Effects component stopped. Device: {self._device.device_config["DEVICE_NAME"]}')
-
-    def effect_routine(self):
-        # Limit the fps to decrease lags caused by 100 percent CPU.
-        self._fps_limiter.fps_limiter()
+    def step(self):
+        """
+        Run one frame of the current effect.
+        """
+        self._stats_reporter.tick()
 
         # Check the notification queue.
-        if not self._device.device_notification_queue_in.empty():
-            self._current_notification_in = self._device.device_notification_queue_in.get()
+        try:
+            self._current_notification_in = self._device.device_notification_queue_in.get_nowait()
             self.logger.debug(f'Effects Service has a new notification in. Notification: {self._current_notification_in} | Device: {self._device.device_config["DEVICE_NAME"]}')
+        except Empty:
+            pass
 
         if hasattr(self, "_current_notification_in"):
             if self._current_notification_in is NotificationEnum.config_refresh:
@@ -128,11 +169,21 @@ class EffectService():
         if self._skip_effect:
             return
 
-        # Check if the effect changed.
-        if not self._device.effect_queue.empty():
-            new_effect_item = self._device.effect_queue.get()
-            self._current_effect = new_effect_item.effect_enum
-            self.logger.debug(f"New effect found: {new_effect_item.effect_enum}")
+        # Check if the effect or its settings changed. Take all items, so slider moves do not pile up.
+        while True:
+            try:
+                new_effect_item = self._device.effect_queue.get_nowait()
+            except Empty:
+                break
+
+            if isinstance(new_effect_item, EffectSettingItem):
+                self.update_effect_settings(new_effect_item)
+            else:
+                # The effect keeps its state for the next time, but not its caches, so only the shown effect holds their memory.
+                if new_effect_item.effect_enum != self._current_effect and self._current_effect in self._initialized_effects:
+                    self._initialized_effects[self._current_effect].clear_caches()
+                self._current_effect = new_effect_item.effect_enum
+                self.logger.debug(f"New effect found: {new_effect_item.effect_enum}")
 
         # Something is wrong here, no effect set. So skip until we get new information.
         if self._current_effect is None:
@@ -150,11 +201,45 @@ class EffectService():
             self.ten_seconds_counter = time()
             self.time_dif = self.end_time - self.start_time
             self.fps = 1 / self.time_dif
-            self.logger.info(f'FPS: {self.fps:.2f} | Device: {self._device.device_config["DEVICE_NAME"]}')
+            self.logger.info(f'FPS: {self.fps:.2f} | Device: {self._device.device_config["DEVICE_NAME"]} | {self._latency_tracker.get_log_text()}')
 
         self.start_time = time()
 
-        self._initialized_effects[self._current_effect].run()
+        current_effect = self._initialized_effects[self._current_effect]
+        # The animations move with the time since the last frame, so a lower frame rate does not slow them down.
+        current_effect.animation_clock.tick()
+        current_effect.run()
+        self._stats_reporter.add_frame()
+
+        # Only the first frame from new audio data counts, repeated frames would add the frame time to the latency.
+        capture_time = self._device.frame_mailbox.write_capture_time
+        if capture_time != self._last_capture_time:
+            self._last_capture_time = capture_time
+            self._latency_tracker.add("render", capture_time)
+
+    def get_stats_values(self):
+        return {
+            "late_frames": self._frame_scheduler.late_frames,
+            "missed_deadlines": self._frame_scheduler.missed_deadlines,
+            "busy_seconds": self._frame_scheduler.busy_time,
+            "target_fps": self._device.device_control.fps,
+            "quality": self._device.device_control.quality,
+            "queue_depth": get_queue_size(self._device.effect_queue),
+            # Audio frames the effects did not read, because a newer one arrived before.
+            "dropped_frames": sum(effect._audio_reader.missed_frames for effect in self._initialized_effects.values())
+        }
+
+    def update_effect_settings(self, effect_setting_item):
+        """
+        Patch the settings of an effect in place. The effects read their settings every frame,
+        so the next run() uses the new values and the effect keeps its state.
+        """
+        self.logger.debug(f'New effect settings found: {effect_setting_item.effect_id} | Device: {self._device.device_config["DEVICE_NAME"]}')
+        self._device.device_config["effects"][effect_setting_item.effect_id].update(effect_setting_item.settings)
+
+        effect_enum = EffectsEnum[effect_setting_item.effect_id]
+        if effect_enum in self._initialized_effects:
+            self._initialized_effects[effect_enum].on_settings_changed(effect_setting_item.settings)
 
     def stop(self):
         self.logger.info("Stopping effect component...")
@@ -164,7 +249,7 @@ class EffectService():
         self.logger.debug("Refreshing effects...")
         self._initialized_effects = {}
 
-        self._fps_limiter = FPSLimiter(self._device.device_config["FPS"])
+        self._frame_scheduler = FrameScheduler(self._device.device_config["FPS"], phase=self.FRAME_PHASE)
 
         # Notify the master component, that I'm finished.
         self._device.device_notification_queue_out.put(NotificationEnum.config_refresh_finished)
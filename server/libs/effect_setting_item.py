@@ -0,0 +1,22 @@
+class EffectSettingItem():
+    """
+    Changed settings of one effect. The running effect uses them with the next frame, without a restart of the device.
+    Use "all_devices" as device_id to change the effect of all devices.
+    """
+    def __init__(self, effect_id, settings, device_id):
+        self.__effect_id = effect_id
+        self.__settings = settings
+        self.__device_id = device_id
+
+    def get_effect_id(self):
+        return self.__effect_id
+
+    def get_settings(self):
+        return self.__settings
+
+    def get_device_id(self):
+        return self.__device_id
+
+    effect_id = property(get_effect_id)
+    settings = property(get_settings)
+    device_id = property(get_device_id)
@@ -1,9 +1,12 @@
 from libs.color_service import ColorService  # pylint: disable=E0611, E0401
 from libs.math_service import MathService  # pylint: disable=E0611, E0401
+from libs.shared_audio_data import AudioDataReader  # pylint: disable=E0611, E0401
+from libs.loop_cache import LoopCache  # pylint: disable=E0611, E0401
+from libs.animation_clock import AnimationClock  # pylint: disable=E0611, E0401
+from libs.device_control import DeviceControl  # pylint: disable=E0611, E0401
 from libs.dsp import DSP  # pylint: disable=E0611, E0401
 
-from collections import deque
-from time import time
+from scipy.ndimage.filters import gaussian_filter1d, uniform_filter1d
 import numpy as np
 
 
@@ -18,8 +21,9 @@ class Effect:
         self._config_gradients = self._config["gradients"]
 
         self._device_config = self._device.device_config
-        self._output_queue = self._device.output_queue
-        self._audio_queue = self._device.audio_queue
+        self._frame_mailbox = self._device.frame_mailbox
+        # Every effect reads the shared audio data on its own, so it gets each audio frame once.
+        self._audio_reader = AudioDataReader(self._device.shared_audio_data)
 
         # Initialize color service and build gradients.
         self._color_service = ColorService(self._config, self._device_config)
@@ -40,48 +44,27 @@ class Effect:
         self.n_fft_bins = self._config["general_settings"]["N_FFT_BINS"]
 
         self.prev_spectrum = np.array([self.led_count // 2])
-        self.freq_channel_history = 40
-        self.beat_count = 0
-        self.freq_channels = [deque(maxlen=self.freq_channel_history) for i in range(self.n_fft_bins)]
 
         self.output = np.array([[0 for i in range(self.led_count)] for i in range(3)])
         self.prev_output = np.array([[0 for i in range(self.led_count)] for i in range(3)])
 
         self.speed_counter = 0
 
+        # Time base of the animations. The effect service ticks it before every run().
+        # The speeds of the effects were tuned per frame, so they refer to the configured FPS of the device.
+        self.animation_clock = AnimationClock(self._device_config["FPS"])
+
+        # The detection runs once inside the audio process, see OnsetDetector.
         self.current_freq_detects = {
             "beat": False,
             "low": False,
             "mid": False,
             "high": False
         }
-        self.prev_freq_detects = {
-            "beat": 0,
-            "low": 0,
-            "mid": 0,
-            "high": 0
-        }
-        self.detection_ranges = {
-            "beat": (0, int(self._config["general_settings"]["N_FFT_BINS"] * 0.13)),
-            "low": (int(self._config["general_settings"]["N_FFT_BINS"] * 0.13),
-                    int(self._config["general_settings"]["N_FFT_BINS"] * 0.4)),
-            "mid": (int(self._config["general_settings"]["N_FFT_BINS"] * 0.4),
-                    int(self._config["general_settings"]["N_FFT_BINS"] * 0.7)),
-            "high": (int(self._config["general_settings"]["N_FFT_BINS"] * 0.8),
-                     int(self._config["general_settings"]["N_FFT_BINS"]))
-        }
-        self.min_detect_amplitude = {
-            "beat": 0.7,
-            "low": 0.5,
-            "mid": 0.3,
-            "high": 0.3
-        }
-        self.min_percent_diff = {
-            "beat": 70,
-            "low": 100,
-            "mid": 50,
-            "high": 30
-        }
+        self.freq_detect_counts = None
+
+        # Capture time of the last audio data. It travels with the output frame to measure the latency.
+        self._capture_time = 0.0
 
         # Setup for "Power" (don't change these).
         self.power_indexes = []
@@ -90,68 +73,186 @@ class Effect:
         # Setup for "Wave" (don't change this).
         self.wave_wipe_count = 0
 
+        # Setup for the periodic effects, that roll a prepared array over the strip.
+        self._loop_cache = LoopCache()
+        self._loop_offset = 0
+        self._blend_buffers = None
+
     def run(self):
         raise NotImplementedError
 
-    def update_freq_channels(self, y):
-        for i in range(len(y)):
-            self.freq_channels[i].appendleft(y[i])
+    def on_settings_changed(self, settings):
+        """
+        Called after the settings of this effect changed while it is running.
+        Effects that prepare arrays from their settings rebuild them here.
+        """
+        pass
 
-    def detect_freqs(self):
+    def update_freq_detects(self, audio_data):
         """
         Function that updates current_freq_detects. Any visualisation algorithm can check if
         there is currently a beat, low, mid, or high by querying the self.current_freq_detects dict.
+        A range is detected if its counter changed since the last audio data, so dropped audio frames do not hide a detection.
         """
-        n_fft_bins = self._config["general_settings"]["N_FFT_BINS"]
-        channel_avgs = []
-        differences = []
+        freq_detect_counts = audio_data.get("freq_detect_counts")
+        if freq_detect_counts is None:
+            return
 
-        for i in range(n_fft_bins):
-            channel_avgs.append(sum(self.freq_channels[i]) / len(self.freq_channels[i]))
-            if channel_avgs[i] != 0:
-                differences.append(((self.freq_channels[i][0] - channel_avgs[i]) * 100) // channel_avgs[i])
-            else:
-                differences.append(0)
-        for i in ["beat", "low", "mid", "high"]:
-            if (any(differences[j] >= self.min_percent_diff[i]
-                    and self.freq_channels[j][0] >= self.min_detect_amplitude[i]
-                    for j in range(*self.detection_ranges[i]))
-                and (time() - self.prev_freq_detects[i] > 0.2)
-                    and len(self.freq_channels[0]) == self.freq_channel_history):
-                self.prev_freq_detects[i] = time()
-                self.current_freq_detects[i] = True
-            else:
-                self.current_freq_detects[i] = False
+        for i in self.current_freq_detects:
+            self.current_freq_detects[i] = self.freq_detect_counts is not None and freq_detect_counts[i] != self.freq_detect_counts[i]
+
+        self.freq_detect_counts = freq_detect_counts
 
     def get_roll_steps(self, current_speed):
         """
-        Calculate the steps for the rollspeed.
+        Calculate the whole steps for the rollspeed since the last call.
         Up to 1 you can adjust the speed very fine. After this, you need to add decades to increase the speed.
+        The steps depend on the time of the animation clock, the part of a step that is left is kept for the next frame.
         """
-        max_counter = 1
-        steps = 0
+        self.speed_counter = self.speed_counter + self.get_roll_distance(current_speed)
 
-        self.speed_counter = self.speed_counter + current_speed
+        # Add a small tolerance, so the float sum of e.g. ten 0.1 steps counts as one step.
+        steps = int(self.speed_counter + 1e-9)
+        self.speed_counter = max(self.speed_counter - steps, 0)
 
-        if self.speed_counter > max_counter:
-            self.speed_counter = 0
+        return steps
 
-            if (max_counter / current_speed) < 1:
+    def get_roll_rate(self, current_speed):
+        """
+        Returns the steps per frame at the configured FPS for a speed of the effect settings.
+        The frame counted speed rolled with this average rate, so the time based speed keeps it.
+        """
+        if current_speed <= 0:
+            return 0
+        if current_speed > 1:
+            return int(current_speed)
+        # The old frame counter needed one frame more than 1 / speed to exceed 1.
+        return 1 / (int(1 / current_speed) + 1)
+
+    def get_velocity(self, current_speed):
+        """
+        Returns the speed in pixels per second. At the configured FPS it is as fast as the frame based speed was.
+        """
+        return self.get_roll_rate(current_speed) * self.animation_clock.reference_fps
 
-                steps = int(1 / (max_counter / current_speed))
+    def get_roll_distance(self, current_speed):
+        """
+        Returns the pixels to move since the last movement of the effect. It can be a fraction of a pixel.
+        """
+        return self.get_velocity(current_speed) * self.animation_clock.lap()
+
+    def get_mirror_indexes(self, led_count, led_mid):
+        """
+        Returns the column of the not mirrored output for every LED, like the mirror option of the effects does it.
+        """
+        indexes = np.arange(led_count)
+
+        # Calculate the real mid.
+        real_mid = led_count / 2
+        # Add some tolerance for the real mid.
+        if (real_mid >= led_mid - 2) and (real_mid <= led_mid + 2):
+            # Use the option with shrinking the array.
+            return np.concatenate((indexes[::-2], indexes[::2]))[:led_count]
+
+        # Mirror the whole array. After this the array has a two times bigger size than led_count.
+        big_mirrored_indexes = np.concatenate((indexes[::-1], indexes[::1]))
+        start_of_array = led_count - led_mid
+        end_of_array = start_of_array + led_count
+        return big_mirrored_indexes[start_of_array:end_of_array]
+
+    def clear_caches(self):
+        """
+        Free the pre-rendered frames, when the effect is not shown anymore. They are rendered again on the next frame.
+        """
+        self._loop_cache.clear()
+
+    def get_loop_frame(self, source_name, source_array, current_speed, current_reverse, mirror=False, one_color=False):
+        """
+        Returns the current frame of an effect that rolls the source array over the strip.
+        The strip shows the first LED_Count columns of the source array, their mirrored version or only the first column.
+        The frames of one period are rendered once by the LoopCache, so a frame costs no calculation.
+        Between two whole steps the neighbouring frames are blended, so slow speeds move smoothly.
+        """
+        led_count = self._device_config["LED_Count"]
+        led_mid = self._device_config["LED_Mid"]
+
+        key = (source_name, mirror, one_color, led_count, led_mid)
+        if self._loop_cache.needs_update(key, source_array):
+            if one_color:
+                column_indexes = [0]
+            elif mirror:
+                column_indexes = self.get_mirror_indexes(led_count, led_mid)
             else:
-                steps = 1
+                column_indexes = np.arange(led_count)
+            self._loop_cache.update(key, source_array, column_indexes, led_count)
+
+        # Roll the array by the time since the last frame, so the frame shows the position of the current time.
+        steps = self.get_roll_distance(current_speed)
+        if current_reverse:
+            steps = -steps
+        self._loop_offset = (self._loop_offset + steps) % self._loop_cache.period
+
+        whole_offset = int(self._loop_offset)
+        fraction = self._loop_offset - whole_offset
+        return self.blend_frames(
+            self._loop_cache.get_frame(whole_offset),
+            self._loop_cache.get_frame(whole_offset + 1),
+            fraction
+        )
+
+    def blend_frames(self, frame, next_frame, fraction):
+        """
+        Returns the uint8 frames blended by the fraction, with a fixed point weight of 1/256.
+        The result is written into buffers of the effect, so it stays uint8 and no array is allocated per frame.
+        It is only valid until the next call.
+        """
+        weight = int(fraction * 256 + 0.5)
+        if weight == 0:
+            return frame
+        if weight == 256:
+            return next_frame
+
+        if self._blend_buffers is None or self._blend_buffers[0].shape != frame.shape:
+            self._blend_buffers = (
+                np.empty(frame.shape, dtype=np.uint16),
+                np.empty(frame.shape, dtype=np.uint16),
+                np.empty(frame.shape, dtype=np.uint8)
+            )
+        blend_buffer, next_buffer, output_array = self._blend_buffers
+
+        # (frame * (256 - weight) + next_frame * weight + 128) >> 8 is at most 65408, so it fits into uint16.
+        np.multiply(frame, 256 - weight, out=blend_buffer, dtype=np.uint16)
+        np.multiply(next_frame, weight, out=next_buffer, dtype=np.uint16)
+        np.add(blend_buffer, next_buffer, out=blend_buffer)
+        np.add(blend_buffer, 128, out=blend_buffer)
+        np.right_shift(blend_buffer, 8, out=output_array, casting="unsafe")
+        return output_array
+
+    def blur(self, output_array, blur_amount):
+        """
+        Returns the output array blurred along the LEDs, with the blur amount as sigma of a gaussian blur.
+        If the load governor reduced the quality of the device, a box blur with the same width is used.
+        At low quality the blur is skipped.
+        """
+        if blur_amount <= 0:
+            return output_array
 
-        else:
-            steps = 0
+        quality = self._device.device_control.quality
+        if quality == DeviceControl.QUALITY_FULL:
+            return gaussian_filter1d(output_array, sigma=blur_amount, axis=-1)
 
-        return steps
+        if quality == DeviceControl.QUALITY_REDUCED:
+            # A box with the variance of the gaussian. Its cost does not depend on the width.
+            box_size = int(round(np.sqrt(12 * blur_amount ** 2 + 1)))
+            if box_size > 1:
+                return uniform_filter1d(output_array, size=box_size, axis=-1)
 
-    def get_audio_data(self):
-        audio_data = None
-        if not self._audio_queue.empty():
-            audio_data = self._audio_queue.get()
+        return output_array
 
+    def get_audio_data(self):
+        audio_data = self._audio_reader.read()
+        if audio_data is not None:
+            self._capture_time = audio_data.get("capture_time", 0.0)
         return audio_data
 
     def get_mel(self, audio_data):
@@ -182,11 +283,8 @@ class Effect:
 
         return audio_vol
 
-    def queue_output_array_blocking(self, output_array):
-        self._output_queue.put(output_array)
-
-    def queue_output_array_noneblocking(self, output_array):
-        if self._output_queue.full():
-            prev_output_array = self._output_queue.get()
-            del prev_output_array
-        self._output_queue.put(output_array)
+    def write_output_array(self, output_array):
+        """
+        Hand the frame over to the output. It replaces the previous frame, if the output did not take it yet.
+        """
+        self._frame_mailbox.write(output_array, self._capture_time)
@@ -1,6 +1,5 @@
 from libs.effects.effect import Effect  # pylint: disable=E0611, E0401
 
-from scipy.ndimage.filters import gaussian_filter1d
 import numpy as np
 
 
@@ -135,9 +134,7 @@ class EffectAdvancedScroll(Effect):
         self.output[2] = self.output_scroll_subbass[2] + self.output_scroll_bass[2] + self.output_scroll_lowmid[2] + self.output_scroll_mid[2] + self.output_scroll_uppermid[2] + self.output_scroll_presence[2] + self.output_scroll_brilliance[2]
 
         self.output = (self.output * effect_config["decay"]).astype(int)
-        blur_amount = effect_config["blur"]
-        if blur_amount > 0:
-            self.output = gaussian_filter1d(self.output, sigma=blur_amount)
+        self.output = self.blur(self.output, effect_config["blur"])
 
         if effect_config["mirror"]:
             # Calculate the real mid.
@@ -155,4 +152,4 @@ class EffectAdvancedScroll(Effect):
         else:
             output_array = self.output
 
-        self.queue_output_array_noneblocking(output_array)
+        self.write_output_array(output_array)
@@ -25,11 +25,11 @@ class EffectBars(Effect):
         # Split y into [resolution] chunks and calculate the average of each.
         max_values = np.array([max(i) for i in np.array_split(r, effect_config["resolution"])])
         max_values = np.clip(max_values, 0, 1)
-        color_sets = []
-        for i in range(effect_config["resolution"]):
-            # [r,g,b] values from a multicolor gradient array at [resolution] equally spaced intervals.
-            color_sets.append([self._color_service.full_gradients[effect_config["color_mode"]]
-                              [j][i * (led_count // effect_config["resolution"])] for j in range(3)])
+        # [r,g,b] values from a multicolor gradient array at [resolution] equally spaced intervals.
+        gradient_loop = self._color_service.gradient_loops[effect_config["color_mode"]]
+        # Move the gradient by the time since the last frame. Only the phase changes, the gradient is not rolled.
+        gradient_loop.move(self.get_roll_distance(effect_config["roll_speed"]) * (-1 if effect_config["reverse_roll"] else 1))
+        color_sets = gradient_loop.get_colors(np.arange(effect_config["resolution"]) * (led_count // effect_config["resolution"])).T
         output = np.zeros((3, led_count))
         chunks = np.array_split(output[0], effect_config["resolution"])
         n = 0
@@ -40,14 +40,6 @@ class EffectBars(Effect):
                 output[j][n:n + m] = color_sets[i][j] * max_values[i]
             n += m
 
-        # Calculate how many steps the array will roll.
-        steps = self.get_roll_steps(effect_config["roll_speed"])
-
-        self._color_service.full_gradients[effect_config["color_mode"]] = np.roll(
-            self._color_service.full_gradients[effect_config["color_mode"]],
-            steps * (-1 if effect_config["reverse_roll"] else 1),
-            axis=1
-        )
         if effect_config["flip_lr"]:
             output = np.fliplr(output)
 
@@ -65,4 +57,4 @@ class EffectBars(Effect):
                 end_of_array = start_of_array + led_count
                 output = big_mirrored_array[:, start_of_array:end_of_array]
 
-        self.queue_output_array_noneblocking(output)
+        self.write_output_array(output)
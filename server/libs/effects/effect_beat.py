@@ -25,8 +25,7 @@ class EffectBeat(Effect):
         if y is None:
             return
 
-        self.update_freq_channels(y)
-        self.detect_freqs()
+        self.update_freq_detects(audio_data)
 
         output = np.zeros((3, led_count))
 
@@ -55,6 +54,6 @@ class EffectBeat(Effect):
             output = np.copy(self.prev_output)
             output = np.multiply(self.prev_output, effect_config["decay"])
 
-        self.queue_output_array_noneblocking(output)
+        self.write_output_array(output)
 
         self.prev_output = output
@@ -19,8 +19,7 @@ class EffectBeatSlide(Effect):
         if y is None:
             return
 
-        self.update_freq_channels(y)
-        self.detect_freqs()
+        self.update_freq_detects(audio_data)
 
         self.current_color = self._color_service.colour(effect_config["color"])
 
@@ -68,6 +67,6 @@ class EffectBeatSlide(Effect):
             output[1, end_position:start_position] = self.current_color[1]
             output[2, end_position:start_position] = self.current_color[2]
 
-        self.queue_output_array_noneblocking(output)
+        self.write_output_array(output)
 
         self.prev_output = output
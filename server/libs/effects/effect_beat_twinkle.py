@@ -27,8 +27,7 @@ class EffectBeatTwinkle(Effect):
         if y is None:
             return
 
-        self.update_freq_channels(y)
-        self.detect_freqs()
+        self.update_freq_detects(audio_data)
 
         output = np.zeros((3, led_count))
 
@@ -69,5 +68,5 @@ class EffectBeatTwinkle(Effect):
             output[1][star_start_index:star_start_index + star_length] = color[1]
             output[2][star_start_index:star_start_index + star_length] = color[2]
 
-        self.queue_output_array_noneblocking(output)
+        self.write_output_array(output)
         self.prev_output = output
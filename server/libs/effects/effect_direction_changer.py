@@ -97,8 +97,7 @@ class EffectDirectionChanger(Effect):
         if y is None:
             return
 
-        self.update_freq_channels(y)
-        self.detect_freqs()
+        self.update_freq_detects(audio_data)
 
         output = np.zeros((3, led_count))
 
@@ -264,7 +263,7 @@ class EffectDirectionChanger(Effect):
         output[1][self.output_right_min_index:] = current_output_right[1]
         output[2][self.output_right_min_index:] = current_output_right[2]
 
-        self.queue_output_array_noneblocking(output)
+        self.write_output_array(output)
 
         self.output_left = current_output_left
         self.output_right = current_output_right
@@ -1,6 +1,5 @@
 from libs.effects.effect import Effect  # pylint: disable=E0611, E0401
 
-from scipy.ndimage.filters import gaussian_filter1d
 import numpy as np
 
 
@@ -39,11 +38,7 @@ class EffectEnergy(Effect):
         self.output[2, :b] = 255
         self.output[2, b:] = 0
         # Apply blur to smooth the edges.
-        blur_amount = effect_config["blur"]
-        if blur_amount > 0:
-            self.output[0, :] = gaussian_filter1d(self.output[0, :], sigma=blur_amount)
-            self.output[1, :] = gaussian_filter1d(self.output[1, :], sigma=blur_amount)
-            self.output[2, :] = gaussian_filter1d(self.output[2, :], sigma=blur_amount)
+        self.output = self.blur(self.output, effect_config["blur"])
 
         if effect_config["mirror"]:
             # Calculate the real mid.
@@ -61,4 +56,4 @@ class EffectEnergy(Effect):
         else:
             output_array = self.output
 
-        self.queue_output_array_noneblocking(output_array)
+        self.write_output_array(output_array)
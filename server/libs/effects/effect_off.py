@@ -8,4 +8,4 @@ class EffectOff(Effect):
         # Build an empty array.
         output_array = np.zeros((3, self._device.device_config["LED_Count"]))
 
-        self._output_queue.put(output_array)
+        self.write_output_array(output_array)
@@ -90,4 +90,4 @@ class EffectPendulum(Effect):
             output_array[2, start_position:end_position] = self.current_color[2]
 
         # Add the output array to the queue.
-        self.queue_output_array_blocking(output_array)
+        self.write_output_array(output_array)
@@ -18,8 +18,7 @@ class EffectPower(Effect):
         if y is None:
             return
 
-        self.update_freq_channels(y)
-        self.detect_freqs()
+        self.update_freq_detects(audio_data)
 
         # Bit of fiddling with the y values.
         y = np.copy(self._math_service.interpolate(y, led_count // 2))
@@ -76,4 +75,4 @@ class EffectPower(Effect):
                 end_of_array = start_of_array + led_count
                 output = big_mirrored_array[:, start_of_array:end_of_array]
 
-        self.queue_output_array_noneblocking(output)
+        self.write_output_array(output)
@@ -21,7 +21,8 @@ class EffectRods(Effect):
         led_count = self._device.device_config["LED_Count"]
         led_mid = self._device.device_config["LED_Mid"]
 
-        self.count_since_last_rod = self.count_since_last_rod + 1
+        # Count the rod length and distance in frames of the configured FPS.
+        self.count_since_last_rod = self.count_since_last_rod + self.animation_clock.frames
 
         # Calculate how many steps the array will roll.
         steps = self.get_roll_steps(effect_config["speed"])
@@ -83,4 +84,4 @@ class EffectRods(Effect):
             local_output_array = big_mirrored_array[:, start_of_array:end_of_array]
 
         # Add the output array to the queue.
-        self.queue_output_array_blocking(local_output_array)
+        self.write_output_array(local_output_array)
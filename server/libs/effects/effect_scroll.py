@@ -1,6 +1,5 @@
 from libs.effects.effect import Effect  # pylint: disable=E0611, E0401
 
-from scipy.ndimage.filters import gaussian_filter1d
 import numpy as np
 
 
@@ -81,9 +80,7 @@ class EffectScroll(Effect):
         self.output[2] = self.output_scroll_high[2] + self.output_scroll_mid[2] + self.output_scroll_low[2]
 
         self.output = (self.output * effect_config["decay"]).astype(int)
-        blur_amount = effect_config["blur"]
-        if blur_amount > 0:
-            self.output = gaussian_filter1d(self.output, sigma=blur_amount)
+        self.output = self.blur(self.output, effect_config["blur"])
 
         if effect_config["mirror"]:
             # Calculate the real mid.
@@ -101,4 +98,4 @@ class EffectScroll(Effect):
         else:
             output_array = self.output
 
-        self.queue_output_array_noneblocking(output_array)
+        self.write_output_array(output_array)
@@ -56,4 +56,4 @@ class EffectSegmentColor(Effect):
             output_array[2][start_translated:end_translated] = color[2]
 
         # Add the output array to the queue.
-        self.queue_output_array_blocking(output_array)
+        self.write_output_array(output_array)
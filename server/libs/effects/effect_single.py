@@ -24,4 +24,4 @@ class EffectSingle(Effect):
             output_array[2][:] = self._config_colours[effect_config["color"]][2]
 
         # Add the output array to the queue.
-        self.queue_output_array_blocking(output_array)
+        self.write_output_array(output_array)
@@ -14,9 +14,6 @@ class EffectSpectrumAnalyzer(Effect):
         if y is None:
             return
 
-        self.update_freq_channels(y)
-        # self.detect_freqs()
-
         # self.current_color = self._color_service.colour(effect_config["color"])
 
         # Build an empty array.
@@ -32,6 +29,6 @@ class EffectSpectrumAnalyzer(Effect):
             output[1][i * (led_count // effect_config["spectrum_count"]): i * (led_count // effect_config["spectrum_count"]) + int(pegel_max * (led_count / effect_config["spectrum_count"]))] = self._color_service.colour(effect_config["color"])[1]
             output[2][i * (led_count // effect_config["spectrum_count"]): i * (led_count // effect_config["spectrum_count"]) + int(pegel_max * (led_count / effect_config["spectrum_count"]))] = self._color_service.colour(effect_config["color"])[2]
 
-        self.queue_output_array_noneblocking(output)
+        self.write_output_array(output)
 
         self.prev_output = output
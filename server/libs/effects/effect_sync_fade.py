@@ -32,4 +32,4 @@ class EffectSyncFade(Effect):
         )
 
         # Add the output array to the queue.
-        self.queue_output_array_blocking(output_array)
+        self.write_output_array(output_array)
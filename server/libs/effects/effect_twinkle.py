@@ -1,6 +1,5 @@
 from libs.effects.effect import Effect  # pylint: disable=E0611, E0401
 
-from scipy.ndimage.filters import gaussian_filter1d
 import numpy as np
 import random
 
@@ -86,9 +85,7 @@ class EffectTwinkle(Effect):
         for current_star_to_remove in remove_stars_descending:
             self.descending_stars.remove(current_star_to_remove)
 
-        blur_amount = effect_config["blur"]
-        if blur_amount > 0:
-            self.output = gaussian_filter1d(self.output, sigma=blur_amount)
+        self.output = self.blur(self.output, effect_config["blur"])
 
         # Add the output array to the queue.
-        self.queue_output_array_blocking(self.output)
+        self.write_output_array(self.output)
@@ -58,7 +58,7 @@ class EffectVuMeter(Effect):
 
         self.max_vol -= effect_config["speed"] / 10000
 
-        self.queue_output_array_noneblocking(output)
+        self.write_output_array(output)
 
         self.prev_output = output
 
@@ -14,8 +14,10 @@ class EffectWave(Effect):
         if y is None:
             return
 
-        self.update_freq_channels(y)
-        self.detect_freqs()
+        self.update_freq_detects(audio_data)
+
+        # The effect only renders new audio data, so use the time since its last frame and not since the last tick.
+        frames_since_last_output = self.animation_clock.lap("output") * self.animation_clock.reference_fps
 
         """Effect that flashes to the beat with scrolling coloured bits"""
         if self.current_freq_detects["beat"]:
@@ -28,7 +30,8 @@ class EffectWave(Effect):
             output = np.copy(self.prev_output)
             # for i in range(len(self.prev_output)):
             #     output[i] = np.hsplit(self.prev_output[i],2)[0]
-            output = np.multiply(self.prev_output, effect_config["decay"])
+            # The decay was tuned per frame of the configured FPS. Apply it for the time since the last frame.
+            output = np.multiply(self.prev_output, effect_config["decay"] ** frames_since_last_output)
             for i in range(self.wave_wipe_count):
                 output[0][i] = self._color_service.colour(effect_config["color_wave"])[0]
                 output[0][-i] = self._color_service.colour(effect_config["color_wave"])[0]
@@ -45,6 +48,6 @@ class EffectWave(Effect):
 
             self.wave_wipe_count += steps
 
-        self.queue_output_array_noneblocking(output)
+        self.write_output_array(output)
 
         self.prev_output = output
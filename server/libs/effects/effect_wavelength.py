@@ -1,6 +1,5 @@
 from libs.effects.effect import Effect  # pylint: disable=E0611, E0401
 
-from scipy.ndimage.filters import gaussian_filter1d
 import numpy as np
 
 
@@ -33,30 +32,15 @@ class EffectWavelength(Effect):
         missing_values = led_count - r_len_before_resize
         r = np.pad(r, (0, missing_values), 'edge')
 
+        # The reversed gradient is the second half of the full gradient.
         start_gradient_index = (led_count if effect_config["reverse_grad"] else 0)
-        end_gradient_index = (None if effect_config["reverse_grad"] else led_count)
 
-        self.output = np.array(
-            [
-                self._color_service.full_gradients[effect_config["color_mode"]][0][start_gradient_index:end_gradient_index:] * r,
-                self._color_service.full_gradients[effect_config["color_mode"]][1][start_gradient_index:end_gradient_index:] * r,
-                self._color_service.full_gradients[effect_config["color_mode"]][2][start_gradient_index:end_gradient_index:] * r
-            ]
-        )
+        gradient_loop = self._color_service.gradient_loops[effect_config["color_mode"]]
+        # Move the gradient by the time since the last frame. Only the phase changes, the gradient is not rolled.
+        gradient_loop.move(self.get_roll_distance(effect_config["roll_speed"]) * (-1 if effect_config["reverse_roll"] else 1))
+        self.output = gradient_loop.get_window(start_gradient_index, led_count) * r
 
-        # Calculate how many steps the array will roll.
-        steps = self.get_roll_steps(effect_config["roll_speed"])
-
-        self._color_service.full_gradients[effect_config["color_mode"]] = np.roll(
-            self._color_service.full_gradients[effect_config["color_mode"]],
-            steps * (-1 if effect_config["reverse_roll"] else 1),
-            axis=1
-        )
-        blur_amount = effect_config["blur"]
-        if blur_amount > 0:
-            self.output[0] = gaussian_filter1d(self.output[0], sigma=blur_amount)
-            self.output[1] = gaussian_filter1d(self.output[1], sigma=blur_amount)
-            self.output[2] = gaussian_filter1d(self.output[2], sigma=blur_amount)
+        self.output = self.blur(self.output, effect_config["blur"])
 
         if effect_config["flip_lr"]:
             self.output = np.fliplr(self.output)
@@ -75,4 +59,4 @@ class EffectWavelength(Effect):
                 end_of_array = start_of_array + led_count
                 self.output = big_mirrored_array[:, start_of_array:end_of_array]
 
-        self.queue_output_array_noneblocking(self.output)
+        self.write_output_array(self.output)
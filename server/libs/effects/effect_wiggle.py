@@ -22,8 +22,7 @@ class EffectWiggle(Effect):
         if y is None:
             return
 
-        self.update_freq_channels(y)
-        self.detect_freqs()
+        self.update_freq_detects(audio_data)
 
         self.current_color = self._color_service.colour(effect_config["color"])
 
@@ -59,6 +58,6 @@ class EffectWiggle(Effect):
             output = np.copy(self.prev_output)
             output = np.multiply(self.prev_output, effect_config["decay"])
 
-        self.queue_output_array_noneblocking(output)
+        self.write_output_array(output)
 
         self.prev_output = output
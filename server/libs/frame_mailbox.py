@@ -0,0 +1,108 @@
+from multiprocessing import RawArray, Lock
+import numpy as np
+
+
+class FrameMailbox():
+    """
+    Shared memory hand-off of the newest LED frame from the effect to the output.
+
+    Three uint8 slots with the shape (3, led_count) are used (triple buffering):
+    The writer always owns one slot, the reader owns one slot and the third slot holds the newest finished frame.
+    Publishing and taking a frame only swaps slot indexes under a lock, the frame data is never pickled or queued.
+    The reader always gets the newest frame, older frames are overwritten instead of piling up.
+    """
+
+    # Layout of the shared state.
+    READY_INDEX = 0
+    FRAME_COUNTER = 1
+    HAS_NEW_FRAME = 2
+
+    def __init__(self, led_count):
+        self.led_count = led_count
+
+        self._slots_array = RawArray("B", 3 * 3 * led_count)
+        self._state_array = RawArray("q", 3)
+        # Capture time of the audio data every slot was rendered from.
+        self._capture_times_array = RawArray("d", 3)
+        self._lock = Lock()
+
+        # The slot indexes of the writer and reader are private to their process.
+        # Together with the shared ready index they are always a permutation of 0, 1 and 2.
+        self._write_index = 0
+        self._read_index = 1
+        self._last_read_counter = 0
+        # Frames that were overwritten before the reader took them.
+        self.skipped_frames = 0
+        # Capture time of the last written and the last read frame, see LatencyTracker.
+        self.write_capture_time = 0.0
+        self.read_capture_time = 0.0
+
+        self._create_views()
+        self._state[self.READY_INDEX] = 2
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Rebuild the numpy views inside the child process, so they point to the shared memory.
+        del state["_slots"]
+        del state["_state"]
+        del state["_capture_times"]
+        del state["_clip_buffer"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._create_views()
+
+    def _create_views(self):
+        self._slots = np.frombuffer(self._slots_array, dtype=np.uint8).reshape(3, 3, self.led_count)
+        self._state = np.frombuffer(self._state_array, dtype=np.int64)
+        self._capture_times = np.frombuffer(self._capture_times_array, dtype=np.float64)
+        # Float buffer for the clipping of the effect output, before it is stored as uint8.
+        self._clip_buffer = np.zeros((3, self.led_count))
+
+    def write(self, output_array, capture_time=0.0):
+        """
+        Publish a new frame. The values are clipped to 0..255 and stored as uint8.
+        The capture time of the audio data the frame was rendered from travels with the frame.
+        """
+        if output_array.dtype == np.uint8:
+            # Pre-rendered frames, e.g. of the LoopCache, are already in range.
+            np.copyto(self._slots[self._write_index], output_array)
+        else:
+            np.clip(output_array, 0, 255, out=self._clip_buffer)
+            np.copyto(self._slots[self._write_index], self._clip_buffer, casting="unsafe")
+        self._capture_times[self._write_index] = capture_time
+        self.write_capture_time = capture_time
+
+        with self._lock:
+            ready_index = int(self._state[self.READY_INDEX])
+            self._state[self.READY_INDEX] = self._write_index
+            self._state[self.FRAME_COUNTER] += 1
+            self._state[self.HAS_NEW_FRAME] = 1
+        self._write_index = ready_index
+
+    def read(self):
+        """
+        Returns the newest frame or None if there is no new frame since the last call.
+        The returned array belongs to the reader until the next call of read().
+        """
+        if not self._state[self.HAS_NEW_FRAME]:
+            return None
+
+        with self._lock:
+            ready_index = int(self._state[self.READY_INDEX])
+            self._state[self.READY_INDEX] = self._read_index
+            self._state[self.HAS_NEW_FRAME] = 0
+            frame_counter = int(self._state[self.FRAME_COUNTER])
+        self._read_index = ready_index
+        self.read_capture_time = float(self._capture_times[self._read_index])
+
+        self.skipped_frames += max(frame_counter - self._last_read_counter - 1, 0)
+        self._last_read_counter = frame_counter
+
+        return self._slots[self._read_index]
+
+    def get_frame_counter(self):
+        return int(self._state[self.FRAME_COUNTER])
+
+    frame_counter = property(get_frame_counter)
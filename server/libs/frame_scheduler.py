@@ -0,0 +1,76 @@
+from time import monotonic, sleep
+from math import floor
+
+
+class FrameScheduler:
+    """
+    Waits for the next frame deadline.
+
+    The deadlines lie on a fixed grid of the monotonic clock: n * frame_duration + phase * frame_duration.
+    The frame rate does not drift with the duration of the work between two calls, and every process that uses
+    the same fps and phase wakes up at the same time. A phase of 0.5 wakes up half a frame after phase 0,
+    e.g. the output of a device half a frame after its effect.
+
+    Most of the waiting time is slept. The last spin_time seconds are spun, because sleep() often wakes up too late.
+    If a frame is so late that whole deadlines passed, these deadlines are counted as missed and skipped.
+    """
+    def __init__(self, fps, phase=0.0, spin_time=0.0005, clock=monotonic, sleep_function=sleep):
+        self.fps = fps
+        self.frame_duration = 1.0 / fps
+        self.phase = phase % 1.0
+        self.spin_time = spin_time
+
+        self._clock = clock
+        self._sleep = sleep_function
+
+        # Number of frames that started after their deadline.
+        self.late_frames = 0
+        # Number of deadlines that were skipped, because a frame took longer than a whole frame duration.
+        self.missed_deadlines = 0
+        self.frame_count = 0
+        # Seconds spent between the end of one wait() and the start of the next, i.e. working on the frames.
+        self.busy_time = 0.0
+        self._wake_time = None
+
+        self._next_deadline = self.get_next_grid_time(self._clock())
+
+    def get_next_grid_time(self, current_time):
+        """Returns the first deadline of the grid after current_time."""
+        offset = self.phase * self.frame_duration
+        return (floor((current_time - offset) / self.frame_duration) + 1) * self.frame_duration + offset
+
+    def wait(self):
+        """
+        Wait until the next deadline.
+        Returns the deadline of the frame that starts now.
+        """
+        deadline = self._next_deadline
+        current_time = self._clock()
+
+        if self._wake_time is not None:
+            self.busy_time += current_time - self._wake_time
+
+        if current_time >= deadline:
+            self.late_frames += 1
+            if current_time - deadline >= self.frame_duration:
+                # Do not try to catch up with a burst of frames. Continue on the grid after now.
+                next_deadline = self.get_next_grid_time(current_time)
+                self.missed_deadlines += int(round((next_deadline - deadline) / self.frame_duration)) - 1
+                deadline = next_deadline - self.frame_duration
+        else:
+            remaining_time = deadline - current_time
+            if remaining_time > self.spin_time:
+                self._sleep(remaining_time - self.spin_time)
+            while self._clock() < deadline:
+                pass
+
+        self._next_deadline = deadline + self.frame_duration
+        self.frame_count += 1
+        self._wake_time = self._clock()
+        return deadline
+
+    def set_fps(self, fps):
+        """Change the frame rate. The next deadline moves to the new grid."""
+        self.fps = fps
+        self.frame_duration = 1.0 / fps
+        self._next_deadline = self.get_next_grid_time(self._clock())
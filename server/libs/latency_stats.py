@@ -0,0 +1,155 @@
+from libs.stats_block import StatsBlock  # pylint: disable=E0611, E0401
+
+from time import monotonic
+import numpy as np
+
+
+class LatencyWindow():
+    """
+    Rolling window with the last latencies of one stage.
+    Adding a latency is O(1), the percentiles are only calculated when they are requested.
+    """
+    def __init__(self, size=1000):
+        self._samples = np.zeros(size)
+        self._size = size
+        self._count = 0
+        self._total = 0.0
+
+    def add(self, latency):
+        self._samples[self._count % self._size] = latency
+        self._count += 1
+        self._total += latency
+
+    def get_samples(self):
+        return self._samples[:min(self._count, self._size)]
+
+    def get_percentiles(self, percentiles=(50, 95, 99)):
+        """
+        Returns the percentiles of the window in seconds or None if the window is empty.
+        """
+        samples = self.get_samples()
+        if len(samples) == 0:
+            return None
+        return np.percentile(samples, percentiles)
+
+    def get_count(self):
+        return self._count
+
+    def get_total(self):
+        """Returns the sum of all latencies since the start in seconds, not only of the window."""
+        return self._total
+
+    count = property(get_count)
+    total = property(get_total)
+
+
+class LatencyStats(StatsBlock):
+    """
+    Shared memory block with the latency percentiles of all components, e.g. the audio process and every device.
+    Every row holds the stats of one stage of one component: [count, p50, p95, p99, max, sum].
+    count and sum cover all latencies since the start, so rate(sum) / rate(count) is the average latency.
+    """
+
+    # Layout of one row.
+    COUNT = 0
+    P50 = 1
+    P95 = 2
+    P99 = 3
+    MAX = 4
+    SUM = 5
+    ROW_SIZE = 6
+
+    def __init__(self, max_rows=64):
+        super(LatencyStats, self).__init__(self.ROW_SIZE, max_rows)
+
+    def write(self, component, stage, window):
+        """
+        Publish the percentiles of a LatencyWindow.
+        """
+        percentiles = window.get_percentiles()
+        if percentiles is None:
+            return
+
+        row = np.empty(self.ROW_SIZE)
+        row[self.P50:self.P99 + 1] = percentiles
+        row[self.MAX] = window.get_samples().max()
+        row[self.COUNT] = window.count
+        row[self.SUM] = window.total
+        self.write_row(f"{component}/{stage}", row)
+
+    def read(self):
+        """
+        Returns the stats of all components in milliseconds:
+        {component: {stage: {"count", "p50", "p95", "p99", "max", "sum"}}}
+        """
+        stats = {}
+
+        for name, row in self.read_rows():
+            component, stage = name.rsplit("/", 1)
+            stats.setdefault(component, {})[stage] = {
+                "count": int(row[self.COUNT]),
+                "p50": float(row[self.P50] * 1000),
+                "p95": float(row[self.P95] * 1000),
+                "p99": float(row[self.P99] * 1000),
+                "max": float(row[self.MAX] * 1000),
+                "sum": float(row[self.SUM] * 1000)
+            }
+
+        return stats
+
+
+class LatencyTracker():
+    """
+    Measures the latency from the audio capture to the stages of one component.
+
+    The capture time is a time.monotonic() timestamp that travels with the audio data.
+    The monotonic clock is shared by all processes, so the latency is the time since the capture.
+    The percentiles are published to the LatencyStats block once per publish interval.
+    """
+    def __init__(self, latency_stats, component, window_size=1000, publish_interval=1.0):
+        self._latency_stats = latency_stats
+        self._component = component
+        self._window_size = window_size
+        self._publish_interval = publish_interval
+
+        self._windows = {}
+        self._last_publish_time = monotonic()
+
+    def add(self, stage, capture_time):
+        """
+        Add the latency of a stage. A capture time of 0 means that the data did not come from the audio.
+        """
+        if capture_time <= 0:
+            return
+
+        current_time = monotonic()
+
+        if stage not in self._windows:
+            self._windows[stage] = LatencyWindow(self._window_size)
+        self._windows[stage].add(current_time - capture_time)
+
+        if current_time - self._last_publish_time > self._publish_interval:
+            self._last_publish_time = current_time
+            self.publish()
+
+    def publish(self):
+        if self._latency_stats is None:
+            return
+
+        for stage, window in self._windows.items():
+            self._latency_stats.write(self._component, stage, window)
+
+    def get_log_text(self):
+        """
+        Returns the percentiles of all stages for the log, e.g. "Latency (p50/p95/p99) dsp: 24.1/25.3/27.0 ms".
+        """
+        texts = []
+        for stage, window in self._windows.items():
+            percentiles = window.get_percentiles()
+            if percentiles is not None:
+                p50, p95, p99 = percentiles * 1000
+                texts.append(f"{stage}: {p50:.1f}/{p95:.1f}/{p99:.1f} ms")
+
+        if not texts:
+            return "Latency: -"
+        return "Latency (p50/p95/p99) " + ", ".join(texts)
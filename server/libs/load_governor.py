@@ -0,0 +1,150 @@
+from libs.device_control import DeviceControl  # pylint: disable=E0611, E0401
+
+from math import ceil, log
+from time import monotonic
+import logging
+
+
+class LoadGovernor():
+    """
+    Throttles low priority devices if the system is overloaded and restores them when the load drops.
+
+    The governor reads the ProcessStats block. A loop is overloaded if it skipped frame deadlines or worked more
+    than BUSY_LIMIT of the time. The audio process is overloaded if its ring buffer overflowed.
+    On overload one device is shed by one level: the device with the lowest priority that is not above the
+    overloaded device. Audio outranks every device. If no loop used more than HEADROOM_BUSY_LIMIT for
+    RESTORE_INTERVALS updates, the shed device with the highest priority is restored by one level.
+
+    Shedding levels of a device, cheapest first:
+    1. Reduced effect quality, e.g. a box blur instead of a gaussian blur.
+    2. The FPS is lowered by FPS_STEP per level, down to MIN_FPS.
+    3. Low effect quality, expensive options are skipped.
+    """
+
+    FPS_STEP = 0.75
+    BUSY_LIMIT = 0.9
+    HEADROOM_BUSY_LIMIT = 0.6
+    RESTORE_INTERVALS = 5
+
+    def __init__(self, process_stats, interval=2.0):
+        self.logger = logging.getLogger(__name__)
+
+        self._process_stats = process_stats
+        self.interval = interval
+
+        # Shedding level of every device. The key is the device control, so a restarted device starts at level 0.
+        self._levels = {}
+        self._last_values = {}
+        self._last_update_time = monotonic()
+        self._calm_intervals = 0
+
+    def update(self, devices, enabled=True):
+        """
+        Check the load and throttle or restore one device. devices are the Device objects of the device manager.
+        """
+        current_time = monotonic()
+        time_dif = current_time - self._last_update_time
+        self._last_update_time = current_time
+
+        devices = list(devices)
+        self._levels = {device.device_control: self._levels.get(device.device_control, 0) for device in devices}
+
+        if not enabled:
+            for device in devices:
+                self.set_level(device, 0)
+            return
+
+        audio_overloaded, overloaded_names, max_busy = self.get_load(time_dif, devices)
+
+        if audio_overloaded or overloaded_names:
+            self._calm_intervals = 0
+
+            if audio_overloaded:
+                max_priority = float("inf")
+            else:
+                max_priority = max(self.get_priority(device) for device in devices if device.device_config["DEVICE_NAME"] in overloaded_names)
+
+            candidates = [device for device in devices if self.get_priority(device) <= max_priority and self._levels[device.device_control] < self.get_max_level(device)]
+            if candidates:
+                # The lowest priority first. Between equal priorities, the device with the highest FPS.
+                device = min(candidates, key=lambda device: (self.get_priority(device), -device.device_control.fps))
+                self.set_level(device, self._levels[device.device_control] + 1)
+
+        elif max_busy < self.HEADROOM_BUSY_LIMIT:
+            self._calm_intervals += 1
+
+            shed_devices = [device for device in devices if self._levels[device.device_control] > 0]
+            if shed_devices and self._calm_intervals >= self.RESTORE_INTERVALS:
+                self._calm_intervals = 0
+                device = max(shed_devices, key=lambda device: self.get_priority(device))
+                self.set_level(device, self._levels[device.device_control] - 1)
+
+        else:
+            self._calm_intervals = 0
+
+    def get_load(self, time_dif, devices):
+        """
+        Returns (audio_overloaded, names of the overloaded devices, highest busy fraction of all loops).
+        """
+        audio_overloaded = False
+        overloaded_names = set()
+        max_busy = 0.0
+
+        for process, device_name, values in self._process_stats.read():
+            key = (process, device_name)
+            last_values = self._last_values.get(key, values)
+            self._last_values[key] = values
+
+            busy = 0.0
+            if time_dif > 0:
+                busy = (values.get("busy_seconds", 0) - last_values.get("busy_seconds", 0)) / time_dif
+            max_busy = max(max_busy, busy)
+            overloaded = values.get("missed_deadlines", 0) > last_values.get("missed_deadlines", 0) or busy > self.BUSY_LIMIT
+
+            if process == "audio":
+                audio_overloaded = overloaded or values.get("overflows", 0) > last_values.get("overflows", 0)
+            elif process == "render":
+                # All devices share the render process.
+                if overloaded:
+                    overloaded_names.update(device.device_config["DEVICE_NAME"] for device in devices)
+            elif process in ("effect", "output") and overloaded:
+                overloaded_names.add(device_name)
+
+        return audio_overloaded, overloaded_names, max_busy
+
+    def get_priority(self, device):
+        return device.device_config.get("PRIORITY", 1)
+
+    def get_min_fps(self, device):
+        return min(device.device_config.get("MIN_FPS", device.device_config["FPS"]), device.device_config["FPS"])
+
+    def get_fps_steps(self, device):
+        """
+        Returns the number of FPS_STEP steps from the FPS down to the MIN_FPS of the device.
+        """
+        fps = device.device_config["FPS"]
+        min_fps = self.get_min_fps(device)
+        if min_fps >= fps:
+            return 0
+        return int(ceil(log(min_fps / fps) / log(self.FPS_STEP)))
+
+    def get_max_level(self, device):
+        return self.get_fps_steps(device) + 2
+
+    def set_level(self, device, level):
+        device_control = device.device_control
+        fps_steps = self.get_fps_steps(device)
+
+        if level <= 0:
+            fps = device.device_config["FPS"]
+            quality = DeviceControl.QUALITY_FULL
+        else:
+            fps = max(device.device_config["FPS"] * self.FPS_STEP ** min(level - 1, fps_steps), self.get_min_fps(device))
+            quality = DeviceControl.QUALITY_LOW if level > fps_steps + 1 else DeviceControl.QUALITY_REDUCED
+
+        if fps != device_control.fps or quality != device_control.quality:
+            self.logger.info(f'Load governor: Level {level} | FPS: {fps:.1f} | Quality: {quality} | Device: {device.device_config["DEVICE_NAME"]}')
+            device_control.fps = fps
+            device_control.quality = quality
+
+        self._levels[device_control] = level
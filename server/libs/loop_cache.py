@@ -0,0 +1,90 @@
+import numpy as np
+
+
+class LoopCache():
+    """
+    Pre-rendered period of a periodic effect, e.g. a gradient that rolls over the strip.
+
+    The effects roll a source array with the shape (3, period) and show some of its columns.
+    The offset of the roll repeats after one period, so every frame of the effect is known in advance.
+    The cache renders all frames once as uint8 array with the shape (period, 3, column count), when the
+    source or the parameters change. Playing the effect then only indexes the frame of the current offset.
+
+    The build works on a uint8 copy of the source and fills the frames in chunks of BUILD_CHUNK_BYTES,
+    so it needs little more memory than the cache itself. Periods whose cache and build together would
+    need more than MAX_CACHE_BYTES are not stored, their frames are rendered on request.
+    """
+
+    MAX_CACHE_BYTES = 64 * 1024 * 1024
+    BUILD_CHUNK_BYTES = 1024 * 1024
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """
+        Free the frames, e.g. when the effect is not shown anymore. The next update() renders them again.
+        """
+        self._key = None
+        self._source_array = None
+        self._source_uint8 = None
+        self._column_indexes = None
+        self._frames = None
+        self._led_count = 0
+        self.period = 1
+
+    def needs_update(self, key, source_array):
+        """
+        key: Hashable value with all parameters that change the frames, e.g. the gradient name and the mirror flag.
+        source_array: Array with the shape (3, period) that is rolled by the effect.
+        """
+        return key != self._key or source_array is not self._source_array
+
+    def update(self, key, source_array, column_indexes, led_count):
+        """
+        Render the frames of one period.
+
+        column_indexes: Column of the not rolled source array for every column of the frame.
+        led_count: Number of LEDs. If there is only one column, it is shown on every LED.
+        """
+        self._key = key
+        self._source_array = source_array
+        self._column_indexes = np.asarray(column_indexes)
+        self._led_count = led_count
+        self.period = source_array.shape[1]
+
+        # Clip and cast the source once. It only has one column per offset, so the copy is small.
+        self._source_uint8 = np.clip(source_array, 0, 255).astype(np.uint8)
+        self._frames = None
+
+        column_count = len(self._column_indexes)
+        # Every offset of a chunk needs its int64 column indexes and the gathered uint8 colors.
+        chunk_size = max(1, min(self.period, self.BUILD_CHUNK_BYTES // (column_count * (8 + 3))))
+        build_bytes = self._source_uint8.nbytes + chunk_size * column_count * (8 + 3)
+        if self.period * 3 * column_count + build_bytes > self.MAX_CACHE_BYTES:
+            return
+
+        frames = np.empty((self.period, 3, column_count), dtype=np.uint8)
+        for start in range(0, self.period, chunk_size):
+            end = min(start + chunk_size, self.period)
+            # Rolling the source by the offset moves the column i - offset to the column i.
+            offsets = np.arange(start, end)[:, np.newaxis]
+            indexes = (self._column_indexes[np.newaxis, :] - offsets) % self.period
+            # (3, chunk, columns) -> (chunk, 3, columns), so every frame is one contiguous block.
+            frames[start:end] = self._source_uint8[:, indexes].transpose(1, 0, 2)
+        self._frames = frames
+
+    def get_frame(self, offset):
+        """
+        Returns the frame of the roll offset with the shape (3, led_count). The frame must not be changed.
+        """
+        index = offset % self.period
+        if self._frames is not None:
+            frame = self._frames[index]
+        else:
+            frame = self._source_uint8[:, (self._column_indexes - index) % self.period]
+
+        if frame.shape[1] != self._led_count:
+            # One color for the whole strip.
+            frame = np.broadcast_to(frame, (3, self._led_count))
+        return frame
@@ -0,0 +1,84 @@
+from libs.notification_enum import NotificationEnum  # pylint: disable=E0611, E0401
+
+from queue import Empty
+from time import time
+import logging
+
+
+class NotificationBus():
+    """
+    Publishes notifications to subscribers and waits for their acknowledgements.
+
+    Every subscriber has an in queue for the notifications and an out queue for the acknowledgements.
+    Waiting blocks on the out queues until the acknowledgement arrives or the timeout is reached, so it needs no CPU.
+    """
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._subscribers = {}
+
+    def subscribe(self, name, queue_in, queue_out):
+        self._subscribers[name] = (queue_in, queue_out)
+
+    def publish(self, notification_item, subscriber_names=None):
+        """
+        Send the notification to the subscribers. Use None to send it to all subscribers.
+        """
+        for name in self.get_subscriber_names(subscriber_names):
+            queue_in, _ = self._subscribers[name]
+            queue_in.put(notification_item)
+
+    def wait_for_acks(self, subscriber_names=None, timeout=10.0):
+        """
+        Wait until every subscriber acknowledged the last request.
+
+        Returns a dict: subscriber name -> NotificationEnum of the acknowledgement.
+        Subscribers that did not answer within the timeout are missing in the dict.
+        """
+        deadline = time() + timeout
+        acks = {}
+
+        for name in self.get_subscriber_names(subscriber_names):
+            _, queue_out = self._subscribers[name]
+
+            while name not in acks:
+                remaining = deadline - time()
+                if remaining <= 0:
+                    self.logger.error(f"Subscriber {name} did not acknowledge within {timeout} seconds.")
+                    break
+
+                try:
+                    ack_item = queue_out.get(timeout=remaining)
+                except Empty:
+                    continue
+
+                if ack_item.notification_enum in (NotificationEnum.config_refresh_finished, NotificationEnum.config_refresh_failed):
+                    acks[name] = ack_item.notification_enum
+                    self.logger.debug(f"Subscriber {name} acknowledged with {ack_item.notification_enum}.")
+
+        return acks
+
+    def request(self, notification_item, subscriber_names=None, timeout=10.0):
+        """
+        Send the notification and wait for the acknowledgements of the subscribers.
+        """
+        subscriber_names = self.get_subscriber_names(subscriber_names)
+        self.discard_acks(subscriber_names)
+        self.publish(notification_item, subscriber_names)
+        return self.wait_for_acks(subscriber_names, timeout)
+
+    def discard_acks(self, subscriber_names=None):
+        """
+        Remove late acknowledgements of an older request, so they are not taken for the next one.
+        """
+        for name in self.get_subscriber_names(subscriber_names):
+            _, queue_out = self._subscribers[name]
+            try:
+                while True:
+                    queue_out.get_nowait()
+            except Empty:
+                pass
+
+    def get_subscriber_names(self, subscriber_names=None):
+        if subscriber_names is None:
+            return list(self._subscribers.keys())
+        return list(subscriber_names)
@@ -1,11 +1,14 @@
-from time import sleep
 import logging
 
 from libs.notification_enum import NotificationEnum  # pylint: disable=E0611, E0401
 from libs.notification_item import NotificationItem  # pylint: disable=E0611, E0401
+from libs.notification_bus import NotificationBus  # pylint: disable=E0611, E0401
 
 
 class NotificationService():
+    # Seconds to wait for the processes to refresh their config.
+    REFRESH_TIMEOUT = 30.0
+
     def start(self, config_lock, notification_queue_device_manager_in,
               notification_queue_device_manager_out, notification_queue_audio_in,
               notification_queue_audio_out, notification_queue_webserver_in,
@@ -13,34 +16,28 @@ class NotificationService():
         self.logger = logging.getLogger(__name__)
 
         self._config_lock = config_lock
-        self._notification_queue_device_manager_in = notification_queue_device_manager_in
-        self._notification_queue_device_manager_out = notification_queue_device_manager_out
-        self._notification_queue_audio_in = notification_queue_audio_in
-        self._notification_queue_audio_out = notification_queue_audio_out
         self._notification_queue_webserver_in = notification_queue_webserver_in
         self._notification_queue_webserver_out = notification_queue_webserver_out
 
+        self._notification_bus = NotificationBus()
+        self._notification_bus.subscribe("device_manager", notification_queue_device_manager_in, notification_queue_device_manager_out)
+        self._notification_bus.subscribe("audio", notification_queue_audio_in, notification_queue_audio_out)
+
         self._current_notification_item = NotificationItem(NotificationEnum.config_refresh, "all_devices")
 
         self._cancel_token = False
         self.logger.debug("NotificationService component started.")
         while not self._cancel_token:
-            # 1. Check Webserver
-            # 2. Check Output
-            # 3. Check Effects
             try:
-                sleep(0.5)
-
-                if not self._notification_queue_webserver_out.empty():
-                    self.logger.debug("NotificationService: New Notification detected.")
-                    self._current_notification_item = self._notification_queue_webserver_out.get()
+                # Block until the webserver sends a notification.
+                self._current_notification_item = self._notification_queue_webserver_out.get()
+                self.logger.debug("NotificationService: New Notification detected.")
 
-                    self.logger.debug("Item get")
-                    if self._current_notification_item.notification_enum is NotificationEnum.config_refresh:
+                if self._current_notification_item.notification_enum is NotificationEnum.config_refresh:
 
-                        self.logger.debug("Reloading config...")
-                        self.config_refresh(self._current_notification_item)
-                        self.logger.debug("Config reloaded.")
+                    self.logger.debug("Reloading config...")
+                    self.config_refresh(self._current_notification_item)
+                    self.logger.debug("Config reloaded.")
             except KeyboardInterrupt:
                 break
 
@@ -52,45 +49,23 @@ class NotificationService():
 
         # Summary
         # 1. Pause every process that has to refresh the config.
-        # 2. Send the refresh command.
-        # 3. Wait for all to finish the process.
-        # 4. Continue the processes.
+        # 2. Send the refresh command and wait for all to finish the process.
+        # 3. Continue the processes.
 
         self.logger.debug("1. Pause")
         # 1. Pause every process that has to refresh the config.
-        self._notification_queue_device_manager_in.put(NotificationItem(NotificationEnum.process_pause, device_id))
-        self._notification_queue_audio_in.put(NotificationItem(NotificationEnum.process_pause, device_id))
-
-        self.logger.debug("2. Refresh")
-        # 2. Send the refresh command.
-        self._notification_queue_device_manager_in.put(NotificationItem(NotificationEnum.config_refresh, device_id))
-        self._notification_queue_audio_in.put(NotificationItem(NotificationEnum.config_refresh, device_id))
-
-        # 3. Wait for all to finish the process.
-        processes_not_ready = True
-
-        self.logger.debug("3. Wait")
-        device_ready = False
-        effect_ready = False
-        while processes_not_ready:
-
-            # Check the notification queue of device_manager, if it is ready to continue.
-            if(not self._notification_queue_device_manager_out.empty()):
-                current_output_out = self._notification_queue_device_manager_out.get()
-                if current_output_out.notification_enum is NotificationEnum.config_refresh_finished:
-                    device_ready = True
-                    self.logger.debug("Device refreshed the config.")
-
-            # Check the notification queue of audio, if it is ready to continue.
-            if(not self._notification_queue_audio_out.empty()):
-                current_effects_out = self._notification_queue_audio_out.get()
-                if current_effects_out.notification_enum is NotificationEnum.config_refresh_finished:
-                    effect_ready = True
-                    self.logger.debug("Audio refreshed the config.")
-
-            if device_ready and effect_ready:
-                processes_not_ready = False
-
-        # 4. Continue the processes.
-        self._notification_queue_device_manager_in.put(NotificationItem(NotificationEnum.process_continue, device_id))
-        self._notification_queue_audio_in.put(NotificationItem(NotificationEnum.process_continue, device_id))
+        self._notification_bus.publish(NotificationItem(NotificationEnum.process_pause, device_id))
+
+        self.logger.debug("2. Refresh and wait")
+        # 2. Send the refresh command and wait for all to finish the process.
+        acks = self._notification_bus.request(NotificationItem(NotificationEnum.config_refresh, device_id), timeout=self.REFRESH_TIMEOUT)
+
+        for name in self._notification_bus.get_subscriber_names():
+            if acks.get(name) is NotificationEnum.config_refresh_finished:
+                self.logger.debug(f"{name} refreshed the config.")
+            elif acks.get(name) is NotificationEnum.config_refresh_failed:
+                self.logger.error(f"{name} could not refresh the config.")
+
+        self.logger.debug("3. Continue")
+        # 3. Continue the processes.
+        self._notification_bus.publish(NotificationItem(NotificationEnum.process_continue, device_id))
@@ -0,0 +1,185 @@
+from libs.audio_sources.audio_source_file import AudioSourceFile  # pylint: disable=E0611, E0401
+from libs.color_service_global import ColorServiceGlobal  # pylint: disable=E0611, E0401
+from libs.shared_audio_data import SharedAudioData  # pylint: disable=E0611, E0401
+from libs.animation_clock import AnimationClock  # pylint: disable=E0611, E0401
+from libs.device_control import DeviceControl  # pylint: disable=E0611, E0401
+from libs.frame_mailbox import FrameMailbox  # pylint: disable=E0611, E0401
+from libs.effect_service import EffectService  # pylint: disable=E0611, E0401
+from libs.effects_enum import EffectsEnum  # pylint: disable=E0611, E0401
+from libs.dsp import DSP, OnsetDetector, BeatTracker  # pylint: disable=E0611, E0401
+
+from time import perf_counter, time
+import numpy as np
+import random
+
+
+class OfflineDevice():
+    """
+    Device that runs inside the current process, without queues and processes.
+    It provides the same properties as Device, as far as the effects use them.
+    """
+    def __init__(self, config, device_config, clock=time):
+        self.config = config
+        self.device_config = device_config
+
+        self.shared_audio_data = SharedAudioData()
+        self.frame_mailbox = FrameMailbox(device_config["LED_Count"])
+        self.device_control = DeviceControl(device_config["FPS"])
+        self.color_service_global = ColorServiceGlobal(config, clock)
+
+        self.latency_stats = None
+        self.process_stats = None
+
+
+class OfflineAudioAnalyzer():
+    """
+    The audio path of the audio process without the audio source: DSP, volume threshold, onset and beat detection.
+    """
+    def __init__(self, config):
+        self._config = config
+
+        self.sample_rate = int(self._config["general_settings"]["DEFAULT_SAMPLE_RATE"])
+        self.frames_per_buffer = int(self._config["general_settings"]["FRAMES_PER_BUFFER"])
+        self.buffer_duration = self.frames_per_buffer / self.sample_rate
+        self.n_fft_bins = self._config["general_settings"]["N_FFT_BINS"]
+
+        self._dsp = DSP(self._config)
+        self._onset_detector = OnsetDetector(self.n_fft_bins)
+        self._beat_tracker = BeatTracker(self._dsp.frame_rate)
+
+        # Seconds the analysis needed for every audio buffer.
+        self.dsp_times = []
+
+    def process(self, audio_samples, capture_time):
+        """
+        Analyze one audio buffer. Returns the list of the audio data of every completed fft hop,
+        like the audio process publishes them. It is empty if the DSP needs more samples for the next spectrum.
+        """
+        start_time = perf_counter()
+
+        audio_datas_list = self._dsp.update(audio_samples)
+
+        for audio_datas in audio_datas_list:
+            audio_datas["capture_time"] = capture_time - audio_datas["hop_delay"]
+
+            if audio_datas["vol"] < self._config["general_settings"]["MIN_VOLUME_THRESHOLD"]:
+                audio_datas["mel"] = np.zeros(self.n_fft_bins)
+
+            self._onset_detector.update(audio_datas["mel"], audio_datas["capture_time"] + self.buffer_duration)
+            self._beat_tracker.update(self._onset_detector.onset_strength)
+            audio_datas["freq_detects"] = dict(self._onset_detector.freq_detects)
+            audio_datas["freq_detect_counts"] = dict(self._onset_detector.freq_detect_counts)
+            audio_datas["onset_strength"] = self._onset_detector.onset_strength
+            audio_datas["bpm"] = self._beat_tracker.bpm
+            audio_datas["beat_phase"] = self._beat_tracker.beat_phase
+
+        if audio_datas_list:
+            self.dsp_times.append(perf_counter() - start_time)
+        return audio_datas_list
+
+    def get_bpm(self):
+        return self._beat_tracker.bpm
+
+    bpm = property(get_bpm)
+
+    def process_samples(self, samples):
+        """
+        Analyze all buffers of int16 mono samples. Returns the list of the audio data.
+        """
+        audio_datas_list = []
+        for buffer_index in range(len(samples) // self.frames_per_buffer):
+            start = buffer_index * self.frames_per_buffer
+            audio_datas_list.extend(self.process(samples[start:start + self.frames_per_buffer], buffer_index * self.buffer_duration))
+        return audio_datas_list
+
+
+class OfflineRenderer():
+    """
+    Renders an effect from audio samples as fast as possible, e.g. for regression tests, previews and benchmarks.
+
+    A virtual clock replaces the real time: Every frame of the device FPS, the DSP first processes all audio buffers
+    that were complete at the time of the frame, like the audio process would do. Then the effect runs once.
+    The result does not depend on the speed of the machine. Effects that use random numbers need a seed.
+    """
+    def __init__(self, config, device_config, effect_name, fps=None, seed=None):
+        self._config = config
+        self._device_config = device_config
+
+        if fps is not None:
+            self._device_config["FPS"] = fps
+        self.fps = self._device_config["FPS"]
+        self.led_count = self._device_config["LED_Count"]
+
+        if seed is not None:
+            random.seed(seed)
+            np.random.seed(seed)
+
+        self.effect_enum = EffectsEnum[effect_name if effect_name.startswith("effect_") else "effect_" + effect_name]
+
+        self._audio_analyzer = OfflineAudioAnalyzer(self._config)
+        self._frames_per_buffer = self._audio_analyzer.frames_per_buffer
+        self._buffer_duration = self._audio_analyzer.buffer_duration
+
+        # The global fade follows the virtual clock as well.
+        self._current_time = 0.0
+        self._device = OfflineDevice(self._config, self._device_config, self.get_time)
+
+        effect_class = EffectService().get_available_effects()[self.effect_enum]
+        self._effect = effect_class(self._device)
+        # The animations follow the virtual clock instead of the real time.
+        self._effect.animation_clock = AnimationClock(self._effect.animation_clock.reference_fps, clock=self.get_time)
+
+        # Seconds the effect needed for every frame.
+        self.effect_times = []
+
+    def get_time(self):
+        return self._current_time
+
+    def get_dsp_times(self):
+        return self._audio_analyzer.dsp_times
+
+    dsp_times = property(get_dsp_times)
+
+    @staticmethod
+    def load_samples(file_path, sample_rate):
+        return AudioSourceFile.load_samples(file_path, sample_rate)
+
+    def render(self, samples, duration=None):
+        """
+        Render the effect for int16 mono samples with the DEFAULT_SAMPLE_RATE of the config.
+        Returns the frames as uint8 array with the shape (frame count, 3, LED_Count) and the time of every frame.
+        A frame without a new output of the effect repeats the last frame, like the LEDs would show it.
+        """
+        samples = np.asarray(samples, dtype=np.int16)
+        buffer_count = len(samples) // self._frames_per_buffer
+
+        if duration is None:
+            duration = buffer_count * self._buffer_duration
+        frame_count = int(duration * self.fps)
+
+        frames = np.zeros((frame_count, 3, self.led_count), dtype=np.uint8)
+        frame_times = np.arange(frame_count) / self.fps
+        frame = np.zeros((3, self.led_count), dtype=np.uint8)
+        buffer_index = 0
+
+        for frame_index in range(frame_count):
+            self._current_time = frame_times[frame_index]
+
+            # Process every audio buffer that was complete at the time of this frame.
+            while buffer_index < buffer_count and (buffer_index + 1) * self._buffer_duration <= self._current_time:
+                start = buffer_index * self._frames_per_buffer
+                for audio_datas in self._audio_analyzer.process(samples[start:start + self._frames_per_buffer], buffer_index * self._buffer_duration):
+                    self._device.shared_audio_data.write(audio_datas)
+                buffer_index += 1
+
+            start_time = perf_counter()
+            self._effect.animation_clock.tick()
+            self._effect.run()
+            self.effect_times.append(perf_counter() - start_time)
+
+            new_frame = self._device.frame_mailbox.read()
+            if new_frame is not None:
+                frame = new_frame.copy()
+            frames[frame_index] = frame
+
+        return frames, frame_times
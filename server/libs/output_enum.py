@@ -6,3 +6,5 @@ class OutputsEnum(Enum):
     output_raspi = 2
     output_mqtt = 3
     output_udp = 4
+    output_e131 = 5
+    output_artnet = 6
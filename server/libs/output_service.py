@@ -1,16 +1,38 @@
 import logging
+from queue import Empty
 from time import time
 
 from libs.notification_enum import NotificationEnum  # pylint: disable=E0611, E0401
 from libs.outputs.output_raspi import OutputRaspi  # pylint: disable=E0611, E0401
 from libs.outputs.output_dummy import OutputDummy  # pylint: disable=E0611, E0401
 from libs.outputs.output_udp import OutputUDP  # pylint: disable=E0611, E0401
+from libs.outputs.output_e131 import OutputE131  # pylint: disable=E0611, E0401
+from libs.outputs.output_artnet import OutputArtNet  # pylint: disable=E0611, E0401
+from libs.outputs.output_mqtt import OutputMQTT  # pylint: disable=E0611, E0401
 from libs.output_enum import OutputsEnum  # pylint: disable=E0611, E0401
-from libs.fps_limiter import FPSLimiter  # pylint: disable=E0611, E0401
+from libs.frame_scheduler import FrameScheduler  # pylint: disable=E0611, E0401
+from libs.latency_stats import LatencyTracker  # pylint: disable=E0611, E0401
+from libs.process_stats import ProcessStatsReporter  # pylint: disable=E0611, E0401
 
 
 class OutputService():
+    # Show the frame half a frame after the effect started to render it.
+    FRAME_PHASE = 0.5
+
     def start(self, device):
+        self.setup(device)
+
+        while not self._cancel_token:
+            try:
+                self.output_routine()
+            except KeyboardInterrupt:
+                break
+
+    def setup(self, device):
+        """
+        Prepare the output service without starting the loop.
+        The RenderService uses it to run the outputs of all devices inside one process.
+        """
         self.logger = logging.getLogger(__name__)
 
         self._device = device
@@ -20,7 +42,7 @@ class OutputService():
         # Initial config load.
         self._config = self._device.config
 
-        self._output_queue = self._device.output_queue
+        self._frame_mailbox = self._device.frame_mailbox
         self._device_notification_queue_in = self._device.device_notification_queue_in
         self._device_notification_queue_out = self._device.device_notification_queue_out
 
@@ -28,8 +50,14 @@ class OutputService():
         self.sec_ten_seconds_counter = time()
         self.start_time = time()
 
-        # Init FPS Limiter.
-        self._fps_limiter = FPSLimiter(self._device.device_config["FPS"])
+        # Init the frame scheduler. Its deadlines lie between the deadlines of the effect, so a new frame is ready.
+        self._frame_scheduler = FrameScheduler(self._device.device_config["FPS"], phase=self.FRAME_PHASE)
+
+        # Latency from the audio capture until the frame was sent to the LEDs.
+        self._latency_tracker = LatencyTracker(self._device.latency_stats, self._device.device_config["DEVICE_NAME"])
+        self._last_capture_time = 0.0
+
+        self._stats_reporter = ProcessStatsReporter(self._device.process_stats, "output", self._device.device_config["DEVICE_NAME"], get_values=self.get_stats_values)
 
         self._skip_output = False
         self._cancel_token = False
@@ -37,7 +65,10 @@ class OutputService():
         self._available_outputs = {
             OutputsEnum.output_dummy: OutputDummy,
             OutputsEnum.output_raspi: OutputRaspi,
-            OutputsEnum.output_udp: OutputUDP
+            OutputsEnum.output_mqtt: OutputMQTT,
+            OutputsEnum.output_udp: OutputUDP,
+            OutputsEnum.output_e131: OutputE131,
+            OutputsEnum.output_artnet: OutputArtNet
         }
 
         current_output_enum = OutputsEnum[self._device.device_config["OUTPUT_TYPE"]]
@@ -46,19 +77,28 @@ class OutputService():
 
         self.logger.debug(f'Output component started. Device: {self._device.device_config["DEVICE_NAME"]}')
 
-        while not self._cancel_token:
-            try:
-                self.output_routine()
-            except KeyboardInterrupt:
-                break
-
     def output_routine(self):
-        # Limit the fps to decrease lags caused by 100 percent CPU.
-        self._fps_limiter.fps_limiter()
+        # Follow the frame rate the load governor allows the device.
+        target_fps = self._device.device_control.fps
+        if target_fps != self._frame_scheduler.fps:
+            self._frame_scheduler.set_fps(target_fps)
+
+        # Wait for the next frame deadline.
+        self._frame_scheduler.wait()
+
+        self.step()
+
+    def step(self):
+        """
+        Show the newest frame of the effect.
+        """
+        self._stats_reporter.tick()
 
         # Check the notification queue.
-        if not self._device_notification_queue_in.empty():
-            self._current_notification_in = self._device_notification_queue_in.get()
+        try:
+            self._current_notification_in = self._device_notification_queue_in.get_nowait()
+        except Empty:
+            pass
 
         if hasattr(self, "_current_notification_in"):
             if self._current_notification_in is NotificationEnum.config_refresh:
@@ -75,15 +115,24 @@ class OutputService():
 
         # Skip the output sequence, for example to "pause" the process.
         if self._skip_output:
-            if not self._output_queue.empty():
-                skip_output_queue = self._output_queue.get()
-                del skip_output_queue
+            # Take the frame, so it is not shown after the pause.
+            self._frame_mailbox.read()
             return
 
-        # Check if the queue is empty and stop if its empty.
-        if not self._output_queue.empty():
-            current_output_array = self._output_queue.get()
-            self._current_output.show(current_output_array)
+        # Only show a frame if the effect finished a new one.
+        current_output_array = self._frame_mailbox.read()
+        if current_output_array is not None:
+            try:
+                self._current_output.show(current_output_array)
+            except Exception as e:
+                self._current_output.send_errors += 1
+                self.logger.exception(f'Could not send the frame. Device: {self._device.device_config["DEVICE_NAME"]} | Error: {e}')
+            self._stats_reporter.add_frame()
+
+            capture_time = self._frame_mailbox.read_capture_time
+            if capture_time != self._last_capture_time:
+                self._last_capture_time = capture_time
+                self._latency_tracker.add("output", capture_time)
 
         self.end_time = time()
 
@@ -91,10 +140,21 @@ class OutputService():
             self.ten_seconds_counter = time()
             self.time_dif = self.end_time - self.start_time
             self.fps = 1 / self.time_dif
-            self.logger.info(f'FPS: {self.fps:.2f} | Device: {self._device.device_config["DEVICE_NAME"]}')
+            self.logger.info(f'FPS: {self.fps:.2f} | Device: {self._device.device_config["DEVICE_NAME"]} | {self._latency_tracker.get_log_text()}')
 
         self.start_time = time()
 
+    def get_stats_values(self):
+        return {
+            "late_frames": self._frame_scheduler.late_frames,
+            "missed_deadlines": self._frame_scheduler.missed_deadlines,
+            "busy_seconds": self._frame_scheduler.busy_time,
+            "target_fps": self._device.device_control.fps,
+            # Frames of the effect that were replaced by a newer one before the output showed them.
+            "dropped_frames": self._frame_mailbox.skipped_frames,
+            "send_errors": self._current_output.send_errors
+        }
+
     def stop(self):
         self._cancel_token = True
         self._current_output.clear()
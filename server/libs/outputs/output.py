@@ -2,6 +2,14 @@ class Output:
     def __init__(self, device):
         self._device = device
         self._device_config = device.device_config
+        # Frames that could not be sent to the LEDs.
+        self.send_errors = 0
 
     def show(self, output_array):
         raise NotImplementedError("Please implement this method.")
+
+    def clear(self):
+        """
+        Release the connections of the output. Called when the output stops.
+        """
+        pass
@@ -0,0 +1,59 @@
+from libs.outputs.output_dmx import OutputDMX  # pylint: disable=E0611, E0401
+import logging
+import socket
+
+
+class OutputArtNet(OutputDMX):
+    """
+    Sends the LEDs as Art-Net ArtDmx packets, unicast to one controller or broadcast.
+    """
+
+    PORT = 6454
+    SEQUENCE_INDEX = 12
+    HEADER_SIZE = 18
+    OP_DMX = 0x5000
+    PROTOCOL_VERSION = 14
+
+    def __init__(self, device):
+        device_config = device.device_config
+        output_id = "output_artnet"
+
+        self._artnet_ip = device_config["output"][output_id]["Artnet_IP"]
+
+        # Call the constructor of the base class.
+        super(OutputArtNet, self).__init__(
+            device,
+            device_config["output"][output_id]["Artnet_Start_Universe"],
+            device_config["output"][output_id]["Artnet_Channel_Offset"]
+        )
+        self.logger = logging.getLogger(__name__)
+
+        if self._start_universe < 0 or self._start_universe + len(self._packets) - 1 > 0x7FFF:
+            self.logger.error(f"Art-Net universes have to be between 0 and 32767. Start universe: {self._start_universe}")
+
+    def create_socket(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # Allow a broadcast address like 2.255.255.255 as target.
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        return sock
+
+    def create_header(self, universe, data_length):
+        header = bytearray(self.HEADER_SIZE)
+        header[0:8] = b"Art-Net\x00"
+        header[8:10] = self.OP_DMX.to_bytes(2, "little")
+        header[10:12] = self.PROTOCOL_VERSION.to_bytes(2, "big")
+        header[14:16] = (universe & 0x7FFF).to_bytes(2, "little")
+        header[16:18] = data_length.to_bytes(2, "big")
+        return header
+
+    def get_address(self, universe):
+        return (self._artnet_ip, self.PORT)
+
+    def get_data_length(self, channel_count):
+        # The length of the DMX data has to be even.
+        return channel_count + channel_count % 2
+
+    def get_next_sequence(self):
+        # The sequence number runs from 1 to 255, 0 would disable it.
+        self._sequence = self._sequence % 255 + 1
+        return self._sequence
@@ -0,0 +1,92 @@
+from libs.outputs.output import Output  # pylint: disable=E0611, E0401
+import numpy as np
+import socket
+import logging
+
+
+class OutputDMX(Output):
+    """
+    Base class of the DMX over UDP outputs.
+
+    The LEDs are mapped across consecutive universes, starting with start_universe. Every universe carries
+    170 RGB pixels. The first universe starts at channel_offset, so the LEDs can follow other fixtures.
+    The packets are allocated once with their headers. Every frame only the pixels and the sequence number are patched.
+    """
+
+    UNIVERSE_SIZE = 512
+    # Position of the sequence number inside the packet.
+    SEQUENCE_INDEX = 0
+
+    def __init__(self, device, start_universe, channel_offset):
+        # Call the constructor of the base class.
+        super(OutputDMX, self).__init__(device)
+        self.logger = logging.getLogger(__name__)
+
+        self._led_count = int(self._device_config["LED_Count"])
+        self._start_universe = int(start_universe)
+        self._channel_offset = min(max(int(channel_offset), 0), self.UNIVERSE_SIZE - 3)
+        self._sequence = 0
+        self._sock = self.create_socket()
+
+        # Every packet is (bytearray, numpy view of its pixels, first LED, last LED + 1, target address).
+        self._packets = []
+        self.create_packets()
+
+        self.logger.debug(f"Universes: {self._start_universe} - {self._start_universe + len(self._packets) - 1} | Channel offset: {self._channel_offset}")
+
+    def create_socket(self):
+        return socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def create_header(self, universe, data_length):
+        """
+        Returns the header of a packet with data_length DMX channels as bytearray.
+        """
+        raise NotImplementedError("Please implement this method.")
+
+    def get_address(self, universe):
+        """
+        Returns the (ip, port) the packet of the universe is sent to.
+        """
+        raise NotImplementedError("Please implement this method.")
+
+    def get_data_length(self, channel_count):
+        return channel_count
+
+    def get_next_sequence(self):
+        self._sequence = (self._sequence + 1) % 256
+        return self._sequence
+
+    def create_packets(self):
+        universe = self._start_universe
+        channel_offset = self._channel_offset
+        start = 0
+
+        while start < self._led_count:
+            end = min(start + (self.UNIVERSE_SIZE - channel_offset) // 3, self._led_count)
+            data_length = self.get_data_length(channel_offset + 3 * (end - start))
+
+            header = self.create_header(universe, data_length)
+            packet = header + bytearray(data_length)
+            pixels = np.frombuffer(packet, dtype=np.uint8, offset=len(header) + channel_offset, count=3 * (end - start)).reshape(end - start, 3)
+            self._packets.append((packet, pixels, start, end, self.get_address(universe)))
+
+            universe += 1
+            channel_offset = 0
+            start = end
+
+    def show(self, output_array):
+        if output_array.dtype != np.uint8:
+            output_array = output_array.clip(0, 255)
+
+        sequence = self.get_next_sequence()
+        for packet, pixels, start, end, address in self._packets:
+            np.copyto(pixels, output_array[:, start:end].T, casting="unsafe")
+            packet[self.SEQUENCE_INDEX] = sequence
+
+        try:
+            for packet, pixels, start, end, address in self._packets:
+                self._sock.sendto(packet, address)
+        except Exception as ex:
+            self.send_errors += 1
+            self.logger.exception(f"Could not send the universes: {ex}")
+            self._sock = self.create_socket()
@@ -0,0 +1,72 @@
+from libs.outputs.output_dmx import OutputDMX  # pylint: disable=E0611, E0401
+import logging
+import uuid
+
+
+class OutputE131(OutputDMX):
+    """
+    Sends the LEDs as E1.31 (sACN) data packets, multicast to the universe address or unicast to one controller.
+    """
+
+    PORT = 5568
+    SEQUENCE_INDEX = 111
+
+    # Offsets of the flags and length fields of the root, framing and DMP layer.
+    ROOT_LAYER = 16
+    FRAMING_LAYER = 38
+    DMP_LAYER = 115
+    HEADER_SIZE = 126
+
+    def __init__(self, device):
+        device_config = device.device_config
+        output_id = "output_e131"
+
+        self._e131_ip = device_config["output"][output_id]["E131_IP"]
+        self._e131_multicast = bool(device_config["output"][output_id]["E131_Multicast"])
+        self._e131_priority = min(max(int(device_config["output"][output_id]["E131_Priority"]), 0), 200)
+        self._source_name = f'MLSC {device_config["DEVICE_NAME"]}'.encode("utf-8")[:63]
+        # The receivers identify the source by its CID, so it stays the same for the device.
+        self._cid = uuid.uuid5(uuid.NAMESPACE_DNS, "mlsc." + device_config["DEVICE_NAME"]).bytes
+
+        # Call the constructor of the base class.
+        super(OutputE131, self).__init__(
+            device,
+            device_config["output"][output_id]["E131_Start_Universe"],
+            device_config["output"][output_id]["E131_Channel_Offset"]
+        )
+        self.logger = logging.getLogger(__name__)
+
+        if self._start_universe < 1 or self._start_universe + len(self._packets) - 1 > 63999:
+            self.logger.error(f"E1.31 universes have to be between 1 and 63999. Start universe: {self._start_universe}")
+
+    def create_header(self, universe, data_length):
+        packet_length = self.HEADER_SIZE + data_length
+        header = bytearray(self.HEADER_SIZE)
+
+        # Root layer.
+        header[0:2] = (0x0010).to_bytes(2, "big")
+        header[4:16] = b"ASC-E1.17\x00\x00\x00"
+        header[16:18] = (0x7000 | (packet_length - self.ROOT_LAYER)).to_bytes(2, "big")
+        header[18:22] = (0x00000004).to_bytes(4, "big")
+        header[22:38] = self._cid
+
+        # Framing layer.
+        header[38:40] = (0x7000 | (packet_length - self.FRAMING_LAYER)).to_bytes(2, "big")
+        header[40:44] = (0x00000002).to_bytes(4, "big")
+        header[44:44 + len(self._source_name)] = self._source_name
+        header[108] = self._e131_priority
+        header[113:115] = (universe & 0xFFFF).to_bytes(2, "big")
+
+        # DMP layer.
+        header[115:117] = (0x7000 | (packet_length - self.DMP_LAYER)).to_bytes(2, "big")
+        header[117] = 0x02
+        header[118] = 0xA1
+        header[121:123] = (0x0001).to_bytes(2, "big")
+        header[123:125] = (data_length + 1).to_bytes(2, "big")
+        # Byte 125 is the DMX start code 0.
+        return header
+
+    def get_address(self, universe):
+        if self._e131_multicast:
+            return (f"239.255.{(universe >> 8) & 0xFF}.{universe & 0xFF}", self.PORT)
+        return (self._e131_ip, self.PORT)
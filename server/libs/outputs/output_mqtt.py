@@ -0,0 +1,220 @@
+from libs.outputs.output import Output  # pylint: disable=E0611, E0401
+from threading import Thread, Condition
+from time import monotonic
+import numpy as np
+import hashlib
+import logging
+import select
+import socket
+
+
+class OutputMQTT(Output):
+    """
+    Publishes the LEDs as RGB bytes to MQTT_Path with QoS 0, like the ESP8266 client under client/mqtt expects them.
+
+    Only the part of MQTT 3.1.1 that a QoS 0 publisher needs is implemented, so no extra package is required.
+    The connection is kept open by an own thread that also sends the frames and reconnects with a backoff.
+    show() only copies the frame into a pending buffer. If the broker is slower than the FPS,
+    the pending frame is replaced by the newer one and counted as send error.
+    """
+
+    CONNECT = 0x10
+    CONNACK = 0x20
+    PUBLISH = 0x30
+    PINGREQ = 0xC0
+    DISCONNECT = 0xE0
+
+    KEEPALIVE = 60
+    SOCKET_TIMEOUT = 5.0
+    SEND_BUFFER_FRAMES = 4
+    MIN_BACKOFF = 1.0
+    MAX_BACKOFF = 30.0
+
+    def __init__(self, device):
+        # Call the constructor of the base class.
+        super(OutputMQTT, self).__init__(device)
+        self.logger = logging.getLogger(__name__)
+
+        output_id = "output_mqtt"
+
+        self._led_count = int(self._device_config["LED_Count"])
+        self._mqtt_broker = self._device_config["output"][output_id]["MQTT_Broker"]
+        self._mqtt_port = int(self._device_config["output"][output_id].get("MQTT_Port", 1883))
+        self._mqtt_path = self._device_config["output"][output_id]["MQTT_Path"]
+        self._mqtt_user = self._device_config["output"][output_id].get("MQTT_User", "")
+        self._mqtt_password = self._device_config["output"][output_id].get("MQTT_Password", "")
+
+        # "host:port" inside MQTT_Broker overrides MQTT_Port.
+        if ":" in self._mqtt_broker:
+            self._mqtt_broker, port = self._mqtt_broker.rsplit(":", 1)
+            self._mqtt_port = int(port)
+
+        # Client ids of up to 23 characters are accepted by every broker.
+        self._client_id = "mlsc-" + hashlib.md5(self._device_config["DEVICE_NAME"].encode("utf-8")).hexdigest()[:16]
+
+        # The publish packet is allocated once. Only its payload changes.
+        self._publish_packet = self.create_publish_packet(self._mqtt_path, 3 * self._led_count)
+        self._payload = np.frombuffer(self._publish_packet, dtype=np.uint8, offset=len(self._publish_packet) - 3 * self._led_count)
+        self._pending_payload = np.zeros(3 * self._led_count, dtype=np.uint8)
+        self._has_pending_frame = False
+
+        self._sock = None
+        self._last_send_time = 0.0
+        self._connected = False
+        self._stopped = False
+        self._condition = Condition()
+
+        self._connection_thread = Thread(target=self.connection_routine, daemon=True)
+        self._connection_thread.start()
+
+    @staticmethod
+    def encode_length(length):
+        """
+        Returns the variable length encoding of the remaining length of a packet.
+        """
+        encoded = bytearray()
+        while True:
+            digit = length % 128
+            length //= 128
+            encoded.append(digit | 0x80 if length > 0 else digit)
+            if length == 0:
+                return encoded
+
+    @staticmethod
+    def encode_string(text):
+        data = text.encode("utf-8")
+        return len(data).to_bytes(2, "big") + data
+
+    def create_publish_packet(self, topic, payload_size):
+        variable_header = self.encode_string(topic)
+        return bytearray([self.PUBLISH]) + self.encode_length(len(variable_header) + payload_size) + variable_header + bytearray(payload_size)
+
+    def create_connect_packet(self):
+        flags = 0x02  # Clean session.
+        payload = self.encode_string(self._client_id)
+
+        if self._mqtt_user:
+            flags |= 0x80
+            payload += self.encode_string(self._mqtt_user)
+            if self._mqtt_password:
+                flags |= 0x40
+                payload += self.encode_string(self._mqtt_password)
+
+        variable_header = self.encode_string("MQTT") + bytes([0x04, flags]) + self.KEEPALIVE.to_bytes(2, "big")
+        return bytearray([self.CONNECT]) + self.encode_length(len(variable_header) + len(payload)) + variable_header + payload
+
+    def get_connected(self):
+        return self._connected
+
+    connected = property(get_connected)
+
+    def connect(self):
+        sock = socket.create_connection((self._mqtt_broker, self._mqtt_port), timeout=self.SOCKET_TIMEOUT)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # Keep only a few frames inside the send buffer. If the broker is slow, sendall() blocks
+            # and the newer frames replace the pending one, instead of queueing up as latency.
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, max(self.SEND_BUFFER_FRAMES * len(self._publish_packet), 4096))
+            sock.sendall(self.create_connect_packet())
+
+            connack = b""
+            while len(connack) < 4:
+                data = sock.recv(4 - len(connack))
+                if not data:
+                    raise ConnectionError("The broker closed the connection.")
+                connack += data
+
+            if connack[0] != self.CONNACK or connack[3] != 0:
+                raise ConnectionError(f"The broker refused the connection with code {connack[3]}.")
+        except Exception:
+            sock.close()
+            raise
+
+        self._sock = sock
+        self._last_send_time = monotonic()
+        self._connected = True
+        self.logger.info(f"Connected to the MQTT broker {self._mqtt_broker}:{self._mqtt_port}")
+
+    def disconnect(self):
+        self._connected = False
+        if self._sock is None:
+            return
+
+        try:
+            self._sock.sendall(bytes([self.DISCONNECT, 0]))
+        except OSError:
+            pass
+        self._sock.close()
+        self._sock = None
+
+    def connection_routine(self):
+        backoff = self.MIN_BACKOFF
+
+        while not self._stopped:
+            if self._sock is None:
+                try:
+                    self.connect()
+                    backoff = self.MIN_BACKOFF
+                except Exception as e:
+                    self.logger.warning(f"Could not connect to the MQTT broker {self._mqtt_broker}:{self._mqtt_port}. Retry in {backoff:.0f} s. Exception: {str(e)}")
+                    with self._condition:
+                        self._condition.wait_for(lambda: self._stopped, timeout=backoff)
+                    backoff = min(backoff * 2, self.MAX_BACKOFF)
+                continue
+
+            # Wait for the next frame. Without frames, a ping keeps the connection open.
+            with self._condition:
+                self._condition.wait_for(lambda: self._has_pending_frame or self._stopped, timeout=self.KEEPALIVE / 2)
+                has_frame = self._has_pending_frame
+                if has_frame:
+                    self._payload[:] = self._pending_payload
+                    self._has_pending_frame = False
+
+            if self._stopped:
+                break
+
+            try:
+                if has_frame:
+                    self._sock.sendall(self._publish_packet)
+                    self._last_send_time = monotonic()
+                elif monotonic() - self._last_send_time >= self.KEEPALIVE / 2:
+                    self._sock.sendall(bytes([self.PINGREQ, 0]))
+                    self._last_send_time = monotonic()
+
+                self.read_incoming()
+            except Exception as e:
+                self.send_errors += int(has_frame)
+                self.logger.warning(f"Lost the connection to the MQTT broker. Exception: {str(e)}")
+                self.disconnect()
+
+        self.disconnect()
+
+    def read_incoming(self):
+        """
+        Discard the packets of the broker, e.g. the ping responses, and detect a closed connection.
+        """
+        while select.select([self._sock], [], [], 0)[0]:
+            if not self._sock.recv(4096):
+                raise ConnectionError("The broker closed the connection.")
+
+    def show(self, output_array):
+        if not self._connected:
+            self.send_errors += 1
+            return
+
+        if output_array.dtype != np.uint8:
+            output_array = output_array.clip(0, 255)
+
+        with self._condition:
+            if self._has_pending_frame:
+                # The last frame was not sent yet, the broker is too slow.
+                self.send_errors += 1
+            np.copyto(self._pending_payload.reshape(self._led_count, 3), output_array.T, casting="unsafe")
+            self._has_pending_frame = True
+            self._condition.notify()
+
+    def clear(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._connection_thread.join(timeout=self.SOCKET_TIMEOUT)
@@ -1,4 +1,5 @@
 import logging
+import ctypes
 import numpy as np
 
 from libs.outputs.output import Output  # pylint: disable=E0611, E0401
@@ -78,22 +79,55 @@ class OutputRaspi(Output):
             message = ws.ws2811_get_return_t_str(resp)
             raise RuntimeError(f'ws2811_init failed with code {resp} ({message})')
 
+        # The packed 0xRRGGBB colors, allocated once.
+        self._rgb = np.zeros(self._led_count, dtype=np.uint32)
+        self._color = np.zeros(self._led_count, dtype=np.uint32)
+
+        # Address of the LED array of the channel. ws2811_init allocates it, so it is read afterwards.
+        self._leds_address = self.get_leds_address(ws)
+        self.bulk_write = self._leds_address is not None
+        self.logger.debug(f"Bulk write: {self.bulk_write}")
+
+    def get_leds_address(self, ws):
+        """
+        Returns the address of the LED array of the channel, or None if the bindings do not expose it.
+        SWIG pointers convert to their address with int().
+        """
+        try:
+            address = int(ws.ws2811_channel_t_leds_get(self.channel))
+        except Exception as e:
+            self.logger.warning(f"Could not get the LED array, falling back to one call per LED. Exception: {str(e)}")
+            return None
+
+        return address if address else None
+
+    def pack_colors(self, output_array):
+        """
+        Pack the (3, LED_Count) output array into the preallocated self._rgb as 0xRRGGBB.
+        """
+        # The frames of the frame mailbox are uint8 already, only other arrays are clipped.
+        if output_array.dtype != np.uint8:
+            output_array = output_array.clip(0, 255)
+
+        np.copyto(self._rgb, output_array[0], casting="unsafe")
+        for row in (1, 2):
+            np.left_shift(self._rgb, 8, out=self._rgb)
+            np.copyto(self._color, output_array[row], casting="unsafe")
+            np.bitwise_or(self._rgb, self._color, out=self._rgb)
+
+        return self._rgb
+
     def show(self, output_array):
         import _rpi_ws281x as ws  # pylint: disable=import-error
 
-        # Typecast the array to int.
-        output_array = output_array.clip(0, 255).astype(int)
-
-        # Sort the colors as RGB type.
-        r = np.left_shift(output_array[0][:].astype(int), 16)  # pylint: disable=assignment-from-no-return
-        g = np.left_shift(output_array[1][:].astype(int), 8)  # pylint: disable=assignment-from-no-return
-        b = output_array[2][:].astype(int)
-        rgb = np.bitwise_or(np.bitwise_or(r, g), b).astype(int)
+        rgb = self.pack_colors(output_array)
 
-        # You can only use ws2811_leds_set with the custom version.
-        # ws.ws2811_leds_set(self.channel, rgb)
-        for i in range(self._led_count):
-            ws.ws2811_led_set(self.channel, i, rgb[i].item())
+        if self.bulk_write:
+            # Copy all LEDs into the LED array of the channel with one call.
+            ctypes.memmove(self._leds_address, rgb.ctypes.data, rgb.nbytes)
+        else:
+            for i in range(self._led_count):
+                ws.ws2811_led_set(self.channel, i, int(rgb[i]))
 
         resp = ws.ws2811_render(self._leds)
 
@@ -5,6 +5,30 @@ import logging
 
 
 class OutputUDP(Output):
+    """
+    Sends the LEDs over UDP with one of these protocols:
+    - raw: The whole strip as RGB bytes inside one datagram, without a header.
+    - ddp: Distributed Display Protocol. The strip is split into packets with their byte offset, the last one has the push flag.
+    - wled: WLED UDP realtime. DRGB if the strip fits into one packet, else DNRGB packets with their start index.
+
+    The packets are allocated once. Every frame only the pixels are copied into them.
+    """
+
+    # Header of a DDP packet: flags, sequence number, data type, destination id, data offset (4 bytes), data length (2 bytes).
+    DDP_HEADER_SIZE = 10
+    DDP_VERSION = 0x40
+    DDP_PUSH = 0x01
+    DDP_TYPE_RGB = 0x0B
+    DDP_DESTINATION_DISPLAY = 0x01
+    DDP_MAX_LEDS = 480
+
+    # Header of a WLED packet: protocol, timeout in seconds and for DNRGB the start index (2 bytes).
+    WLED_DRGB = 2
+    WLED_DNRGB = 4
+    WLED_TIMEOUT = 2
+    WLED_DRGB_MAX_LEDS = 490
+    WLED_DNRGB_MAX_LEDS = 489
+
     def __init__(self, device):
         # Call the constructor of the base class.
         super(OutputUDP, self).__init__(device)
@@ -12,18 +36,96 @@ class OutputUDP(Output):
 
         output_id = "output_udp"
 
+        self._led_count = int(self._device_config["LED_Count"])
         self._udp_client_ip = self._device_config["output"][output_id]["UDP_Client_IP"]
         self._udp_client_port = int(self._device_config["output"][output_id]["UDP_Client_Port"])
+        self._udp_protocol = self._device_config["output"][output_id].get("UDP_Protocol", "raw")
+        # Largest UDP payload that is sent without IP fragmentation. 1472 bytes fit into an ethernet MTU of 1500 bytes.
+        self._udp_packet_size = int(self._device_config["output"][output_id].get("UDP_Packet_Size", 1472))
         self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 
+        self._protocol_mapper = {
+            "raw": self.create_raw_packets,
+            "ddp": self.create_ddp_packets,
+            "wled": self.create_wled_packets
+        }
+
+        if self._udp_protocol not in self._protocol_mapper:
+            self.logger.error(f"Unknown UDP protocol: {self._udp_protocol}. Using raw instead.")
+            self._udp_protocol = "raw"
+
+        # Every packet is a bytearray with the header, and a numpy view of its pixels with the LED range it contains.
+        self._packets = []
+        self._pixel_views = []
+        self._protocol_mapper[self._udp_protocol]()
+        self._ddp_sequence = 0
+
+        self.logger.debug(f"UDP protocol: {self._udp_protocol} | Packets per frame: {len(self._packets)}")
+
+    def get_leds_per_packet(self, header_size, max_leds):
+        return max(min((self._udp_packet_size - header_size) // 3, max_leds), 1)
+
+    def add_packet(self, header, start, end):
+        packet = bytearray(header) + bytearray(3 * (end - start))
+        pixels = np.frombuffer(packet, dtype=np.uint8, offset=len(header)).reshape(end - start, 3)
+        self._packets.append(packet)
+        self._pixel_views.append((pixels, start, end))
+
+    def create_raw_packets(self):
+        # The receivers expect the whole strip inside one datagram, so it is not split.
+        self.add_packet(b"", 0, self._led_count)
+
+    def create_ddp_packets(self):
+        leds_per_packet = self.get_leds_per_packet(self.DDP_HEADER_SIZE, self.DDP_MAX_LEDS)
+
+        for start in range(0, self._led_count, leds_per_packet):
+            end = min(start + leds_per_packet, self._led_count)
+            flags = self.DDP_VERSION | (self.DDP_PUSH if end == self._led_count else 0)
+
+            header = bytearray(self.DDP_HEADER_SIZE)
+            header[0] = flags
+            header[2] = self.DDP_TYPE_RGB
+            header[3] = self.DDP_DESTINATION_DISPLAY
+            header[4:8] = (3 * start).to_bytes(4, "big")
+            header[8:10] = (3 * (end - start)).to_bytes(2, "big")
+            self.add_packet(header, start, end)
+
+    def create_wled_packets(self):
+        if self._led_count <= self.get_leds_per_packet(2, self.WLED_DRGB_MAX_LEDS):
+            self.add_packet(bytes([self.WLED_DRGB, self.WLED_TIMEOUT]), 0, self._led_count)
+            return
+
+        leds_per_packet = self.get_leds_per_packet(4, self.WLED_DNRGB_MAX_LEDS)
+        for start in range(0, self._led_count, leds_per_packet):
+            end = min(start + leds_per_packet, self._led_count)
+            header = bytes([self.WLED_DNRGB, self.WLED_TIMEOUT]) + start.to_bytes(2, "big")
+            self.add_packet(header, start, end)
+
+    def get_packets(self, output_array):
+        """
+        Copy the (3, LED_Count) output array into the packets and return them.
+        """
+        if output_array.dtype != np.uint8:
+            output_array = output_array.clip(0, 255)
+
+        for pixels, start, end in self._pixel_views:
+            np.copyto(pixels, output_array[:, start:end].T, casting="unsafe")
+
+        if self._udp_protocol == "ddp":
+            # The sequence number runs from 1 to 15, 0 would disable it.
+            self._ddp_sequence = self._ddp_sequence % 15 + 1
+            for packet in self._packets:
+                packet[1] = self._ddp_sequence
+
+        return self._packets
+
     def show(self, output_array):
-        # Typecast the array to int.
-        output_array = output_array.clip(0, 255).astype(np.uint8)
-        byte_array = output_array.tobytes('F')
+        packets = self.get_packets(output_array)
         try:
-            self._sock.sendto(byte_array, (self._udp_client_ip, self._udp_client_port))
+            for packet in packets:
+                self._sock.sendto(packet, (self._udp_client_ip, self._udp_client_port))
         except Exception as ex:
-            self.logger.exception(f"Could not send to client", ex)
+            self.send_errors += 1
+            self.logger.exception(f"Could not send to client: {ex}")
             self.logger.debug(f"Reinit output of {self._udp_client_ip}")
             self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-
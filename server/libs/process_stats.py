@@ -0,0 +1,134 @@
+from libs.stats_block import StatsBlock  # pylint: disable=E0611, E0401
+
+from threading import Thread
+from time import monotonic, sleep
+import numpy as np
+import os
+
+
+def get_rss_bytes():
+    """
+    Returns the resident memory of this process in bytes, or NaN if the platform does not provide it.
+    """
+    try:
+        with open("/proc/self/statm", "r") as statm_file:
+            return int(statm_file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return np.nan
+
+
+def get_queue_size(queue):
+    """
+    Returns the approximate size of a multiprocessing queue, or NaN on platforms without qsize(), e.g. macOS.
+    """
+    try:
+        return queue.qsize()
+    except NotImplementedError:
+        return np.nan
+
+
+class ProcessStats(StatsBlock):
+    """
+    Shared memory block with the counters and gauges of all processes.
+    Every row belongs to one process role and device, e.g. "output/Living Room" or "audio/".
+    Values a process does not know stay NaN and are not exported.
+    """
+
+    # Name, Prometheus type and help text of every column.
+    METRICS = (
+        ("fps", "gauge", "Frames per second of the loop."),
+        ("frames", "counter", "Frames processed by the loop."),
+        ("late_frames", "counter", "Frames that started after their deadline."),
+        ("missed_deadlines", "counter", "Frame deadlines that were skipped, because the loop was too slow."),
+        ("busy_seconds", "counter", "Time the loop spent working on frames instead of waiting for the next deadline."),
+        ("target_fps", "gauge", "Frame rate the load governor allows the device."),
+        ("quality", "gauge", "Quality level the load governor allows the effects, 0 is full quality."),
+        ("queue_depth", "gauge", "Items waiting in the input queue or ring buffer."),
+        ("dropped_frames", "counter", "Frames that were overwritten or dropped before they were used."),
+        ("overflows", "counter", "Audio buffers dropped by the audio callback, because the ring buffer was full."),
+        ("underruns", "counter", "Times the audio routine waited for audio without getting any."),
+        ("send_errors", "counter", "Frames the output could not send to the LEDs."),
+        ("config_saves", "counter", "Writes of the config file."),
+        ("config_save_seconds", "counter", "Time spent writing the config file."),
+        ("rss_bytes", "gauge", "Resident memory of the process."),
+    )
+    METRIC_NAMES = tuple(metric[0] for metric in METRICS)
+
+    def __init__(self, max_rows=64):
+        super(ProcessStats, self).__init__(len(self.METRICS), max_rows)
+
+    def write(self, process, device, values):
+        """
+        Write the values of a process. values is a dict: metric name -> value.
+        """
+        row = np.full(self.row_size, np.nan)
+        for index, metric_name in enumerate(self.METRIC_NAMES):
+            if metric_name in values:
+                row[index] = values[metric_name]
+        self.write_row(f"{process}/{device}", row)
+
+    def read(self):
+        """
+        Returns a list of (process, device, values). values is a dict: metric name -> value, without the NaN values.
+        """
+        stats = []
+        for name, row in self.read_rows():
+            process, device = name.split("/", 1)
+            values = {metric_name: row[index] for index, metric_name in enumerate(self.METRIC_NAMES) if not np.isnan(row[index])}
+            stats.append((process, device, values))
+        return stats
+
+
+class ProcessStatsReporter():
+    """
+    Counts the frames of a loop and publishes its stats to the ProcessStats block once per publish interval.
+
+    The loop calls add_frame() for every frame and tick() for every iteration. Both only count or compare a time,
+    the values of get_values() are only collected when they are published.
+    Loops that block for a long time use start_thread() instead of tick().
+    """
+    def __init__(self, process_stats, process, device="", get_values=None, publish_interval=1.0):
+        self._process_stats = process_stats
+        self._process = process
+        self._device = device
+        self._get_values = get_values
+        self._publish_interval = publish_interval
+
+        self.frames = 0
+        self._last_frames = 0
+        self._last_publish_time = monotonic()
+
+    def add_frame(self):
+        self.frames += 1
+
+    def tick(self):
+        if monotonic() - self._last_publish_time >= self._publish_interval:
+            self.publish()
+
+    def publish(self):
+        current_time = monotonic()
+        time_dif = current_time - self._last_publish_time
+
+        values = {
+            "frames": self.frames,
+            "rss_bytes": get_rss_bytes()
+        }
+        if time_dif > 0:
+            values["fps"] = (self.frames - self._last_frames) / time_dif
+        if self._get_values is not None:
+            values.update(self._get_values())
+
+        self._last_frames = self.frames
+        self._last_publish_time = current_time
+
+        if self._process_stats is not None:
+            self._process_stats.write(self._process, self._device, values)
+
+    def start_thread(self):
+        thread = Thread(target=self._thread_routine, daemon=True)
+        thread.start()
+
+    def _thread_routine(self):
+        while True:
+            sleep(self._publish_interval)
+            self.publish()
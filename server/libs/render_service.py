@@ -0,0 +1,123 @@
+from libs.shared_audio_data import AudioDataSnapshot  # pylint: disable=E0611, E0401
+from libs.effect_service import EffectService  # pylint: disable=E0611, E0401
+from libs.output_service import OutputService  # pylint: disable=E0611, E0401
+from libs.frame_scheduler import FrameScheduler  # pylint: disable=E0611, E0401
+from libs.process_stats import ProcessStatsReporter  # pylint: disable=E0611, E0401
+
+from concurrent.futures import ThreadPoolExecutor
+from time import time, monotonic
+import logging
+
+
+class DeviceRenderer():
+    """
+    Effect and output service of one device inside the RenderService.
+    """
+    def __init__(self, device):
+        self.device = device
+
+        self.effect_service = EffectService()
+        self.effect_service.setup(device)
+
+        self.output_service = OutputService()
+        self.output_service.setup(device)
+
+        self.frame_duration = 1 / device.device_control.fps
+        self.next_frame_time = monotonic()
+
+
+class RenderService():
+    """
+    Runs the effects and outputs of all devices inside one process (RENDER_MODE "single_process").
+
+    All devices share one tick with the highest FPS of the devices. Every tick the shared audio data is read once,
+    then every device whose next frame is due runs its effect and its output, one after another or on a thread pool.
+    """
+    def start(self, devices, render_threads=0):
+        self.logger = logging.getLogger(__name__)
+        self.logger.info(f"Starting Render Service with {len(devices)} devices...")
+
+        # Read the shared audio data once per tick for all devices.
+        self._audio_snapshot = AudioDataSnapshot(devices[0].shared_audio_data)
+
+        self._device_renderers = []
+        for device in devices:
+            device.shared_audio_data = self._audio_snapshot
+            self._device_renderers.append(DeviceRenderer(device))
+
+        self._thread_pool = None
+        if render_threads > 1:
+            self._thread_pool = ThreadPoolExecutor(max_workers=render_threads)
+
+        max_fps = max(device.device_config["FPS"] for device in devices)
+        self._frame_scheduler = FrameScheduler(max_fps)
+
+        self._stats_reporter = ProcessStatsReporter(devices[0].process_stats, "render", get_values=self.get_stats_values)
+
+        self.ten_seconds_counter = time()
+        self.start_time = time()
+
+        self._cancel_token = False
+
+        while not self._cancel_token:
+            try:
+                self.render_routine()
+            except KeyboardInterrupt:
+                break
+
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown()
+
+        self.logger.info("Render Service stopped.")
+
+    def render_routine(self):
+        # Wait for the next tick.
+        current_time = self._frame_scheduler.wait()
+
+        self._audio_snapshot.update()
+
+        due_renderers = []
+        for renderer in self._device_renderers:
+            # Follow the frame rate the load governor allows the device.
+            renderer.frame_duration = 1 / renderer.device.device_control.fps
+            if current_time < renderer.next_frame_time:
+                continue
+            renderer.next_frame_time += renderer.frame_duration
+            if renderer.next_frame_time < current_time:
+                # The device is more than one frame behind. Do not try to catch up.
+                renderer.next_frame_time = current_time + renderer.frame_duration
+            due_renderers.append(renderer)
+
+        if self._thread_pool is not None and len(due_renderers) > 1:
+            list(self._thread_pool.map(self.render_device, due_renderers))
+        else:
+            for renderer in due_renderers:
+                self.render_device(renderer)
+
+        self._stats_reporter.add_frame()
+        self._stats_reporter.tick()
+
+        self.end_time = time()
+
+        if time() - self.ten_seconds_counter > 10:
+            self.ten_seconds_counter = time()
+            self.time_dif = self.end_time - self.start_time
+            self.fps = 1 / self.time_dif
+            self.logger.info(f"Tick FPS: {self.fps:.2f} | Devices: {len(self._device_renderers)}")
+
+        self.start_time = time()
+
+    def get_stats_values(self):
+        return {
+            "late_frames": self._frame_scheduler.late_frames,
+            "missed_deadlines": self._frame_scheduler.missed_deadlines,
+            "busy_seconds": self._frame_scheduler.busy_time
+        }
+
+    def render_device(self, renderer):
+        # One broken device must not stop the other devices.
+        try:
+            renderer.effect_service.step()
+            renderer.output_service.step()
+        except Exception as e:
+            self.logger.exception(f'Could not render device: {renderer.device.device_config["DEVICE_NAME"]} | Error: {e}')
@@ -0,0 +1,206 @@
+from multiprocessing import RawArray
+from time import sleep
+import numpy as np
+
+
+class SharedAudioData():
+    """
+    Shared memory block with the latest audio data.
+
+    The audio process is the only writer, every effect reads it directly with an AudioDataReader.
+    The block is guarded by a sequence counter (seqlock): The writer makes the counter odd before it changes
+    the data and even again afterwards. A reader copies the data and retries if the counter was odd or changed meanwhile.
+    So the writer never waits for a reader and no data is pickled or queued per device.
+    """
+
+    # Layout of the integer header.
+    SEQUENCE = 0
+    N_BINS = 1
+    DETECT_COUNTS = 2
+
+    # Layout of the float block before the mel, x and y arrays.
+    VOL = 0
+    BPM = 1
+    BEAT_PHASE = 2
+    ONSET_STRENGTH = 3
+    CAPTURE_TIME = 4
+    FREQ_DETECTS = 5
+
+    FREQ_RANGES = ("beat", "low", "mid", "high")
+
+    def __init__(self, max_fft_bins=1000):
+        self.max_fft_bins = max_fft_bins
+
+        self._header_size = self.DETECT_COUNTS + len(self.FREQ_RANGES)
+        self._scalar_size = self.FREQ_DETECTS + len(self.FREQ_RANGES)
+
+        self._header_array = RawArray("q", self._header_size)
+        self._data_array = RawArray("d", self._scalar_size + 3 * max_fft_bins)
+
+        self._create_views()
+
+    def __getstate__(self):
+        # Only the raw shared arrays are transferred to the child process. The numpy views are rebuilt there.
+        return {
+            "max_fft_bins": self.max_fft_bins,
+            "_header_size": self._header_size,
+            "_scalar_size": self._scalar_size,
+            "_header_array": self._header_array,
+            "_data_array": self._data_array
+        }
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._create_views()
+
+    def _create_views(self):
+        self._header = np.frombuffer(self._header_array, dtype=np.int64)
+        self._data = np.frombuffer(self._data_array, dtype=np.float64)
+        self._scalars = self._data[:self._scalar_size]
+        arrays = self._data[self._scalar_size:].reshape(3, self.max_fft_bins)
+        self._mel = arrays[0]
+        self._x = arrays[1]
+        self._y = arrays[2]
+
+    def write(self, audio_data):
+        """
+        Publish new audio data. Only one process is allowed to write.
+        """
+        n_bins = min(len(audio_data["mel"]), self.max_fft_bins)
+
+        # Odd sequence: The data is changing.
+        self._header[self.SEQUENCE] += 1
+
+        self._header[self.N_BINS] = n_bins
+        self._mel[:n_bins] = audio_data["mel"][:n_bins]
+        self._x[:n_bins] = audio_data["x"][:n_bins]
+        self._y[:n_bins] = audio_data["y"][:n_bins]
+
+        self._scalars[self.VOL] = audio_data["vol"]
+        self._scalars[self.BPM] = audio_data.get("bpm", 0.0)
+        self._scalars[self.BEAT_PHASE] = audio_data.get("beat_phase", 0.0)
+        self._scalars[self.ONSET_STRENGTH] = audio_data.get("onset_strength", 0.0)
+        self._scalars[self.CAPTURE_TIME] = audio_data.get("capture_time", 0.0)
+
+        freq_detects = audio_data.get("freq_detects", {})
+        freq_detect_counts = audio_data.get("freq_detect_counts", {})
+        for index, name in enumerate(self.FREQ_RANGES):
+            self._scalars[self.FREQ_DETECTS + index] = freq_detects.get(name, False)
+            self._header[self.DETECT_COUNTS + index] = freq_detect_counts.get(name, 0)
+
+        # Even sequence: The data is consistent again.
+        self._header[self.SEQUENCE] += 1
+
+    def get_sequence(self):
+        return int(self._header[self.SEQUENCE])
+
+    def read(self, max_retries=100):
+        """
+        Return a consistent copy of the audio data and its sequence number.
+        Returns (None, sequence) if nothing was written yet or no consistent copy was possible.
+        """
+        for retry in range(max_retries):
+            sequence = int(self._header[self.SEQUENCE])
+            if sequence == 0:
+                return None, 0
+            if sequence & 1:
+                # The writer is inside the block. It only needs a few microseconds.
+                if retry > 10:
+                    sleep(0)
+                continue
+
+            header = self._header.copy()
+            n_bins = int(header[self.N_BINS])
+            scalars = self._scalars.copy()
+            mel = self._mel[:n_bins].copy()
+            x = self._x[:n_bins].copy()
+            y = self._y[:n_bins].copy()
+
+            if int(self._header[self.SEQUENCE]) != sequence:
+                continue
+
+            audio_data = {
+                "mel": mel,
+                "vol": scalars[self.VOL],
+                "x": x,
+                "y": y,
+                "bpm": scalars[self.BPM],
+                "beat_phase": scalars[self.BEAT_PHASE],
+                "onset_strength": scalars[self.ONSET_STRENGTH],
+                "capture_time": scalars[self.CAPTURE_TIME],
+                "freq_detects": {name: bool(scalars[self.FREQ_DETECTS + index]) for index, name in enumerate(self.FREQ_RANGES)},
+                "freq_detect_counts": {name: int(header[self.DETECT_COUNTS + index]) for index, name in enumerate(self.FREQ_RANGES)}
+            }
+            return audio_data, sequence
+
+        return None, self.get_sequence()
+
+    sequence = property(get_sequence)
+
+
+class AudioDataReader():
+    """
+    Reads the shared audio data like a queue: Every new audio frame is returned only once.
+    Each effect has its own reader, so the readers do not steal frames from each other.
+    """
+    def __init__(self, shared_audio_data):
+        self._shared_audio_data = shared_audio_data
+        self._last_sequence = shared_audio_data.sequence
+        self.missed_frames = 0
+
+    def has_new_data(self):
+        return self._shared_audio_data.sequence != self._last_sequence
+
+    def read(self):
+        """
+        Returns the newest audio data or None if there is no new audio frame since the last call.
+        """
+        if not self.has_new_data():
+            return None
+
+        audio_data, sequence = self._shared_audio_data.read()
+        if audio_data is None:
+            return None
+
+        # Every frame increases the sequence by two.
+        self.missed_frames += max((sequence - self._last_sequence) // 2 - 1, 0)
+        self._last_sequence = sequence
+        return audio_data
+
+
+class AudioDataSnapshot():
+    """
+    Copy of the shared audio data that is refreshed once per render tick.
+
+    It has the same read interface as SharedAudioData, so the AudioDataReader of every effect works unchanged.
+    The RenderService uses it to read the shared memory only once per tick for all devices.
+    """
+    def __init__(self, shared_audio_data):
+        self._shared_audio_data = shared_audio_data
+        self._audio_data = None
+        self._sequence = 0
+
+    def update(self):
+        """
+        Take the newest audio data from the shared memory, if there is a new audio frame.
+        """
+        if self._shared_audio_data.sequence == self._sequence:
+            return
+
+        audio_data, sequence = self._shared_audio_data.read()
+        if audio_data is not None:
+            self._audio_data = audio_data
+            self._sequence = sequence
+
+    def get_sequence(self):
+        return self._sequence
+
+    def read(self, max_retries=None):
+        if self._audio_data is None:
+            return None, self._sequence
+
+        # Every effect gets its own arrays, so an effect can not change the audio data of another device.
+        audio_data = {key: value.copy() if hasattr(value, "copy") else value for key, value in self._audio_data.items()}
+        return audio_data, self._sequence
+
+    sequence = property(get_sequence)
@@ -7,6 +7,7 @@ var gradients = {};
 
 var devicesLoading = true;
 var loggingLevelsLoading = true;
+var audioSourcesLoading = true;
 
 // Init and load all settings
 $( document ).ready(function() {
@@ -14,11 +15,12 @@ $( document ).ready(function() {
   settingsIdentifier = $("#settingsIdentifier").val();
 
   GetLoggingLevels();
+  GetAudioSources();
 });
 
 //Check if all initial ajax requests are finished.
 function CheckIfFinishedInitialLoading (){
-  if(!loggingLevelsLoading){
+  if(!loggingLevelsLoading && !audioSourcesLoading){
     GetLocalSettings();
   }
 }
@@ -56,6 +58,39 @@ function ParseGetLoggingLevels(response){
   CheckIfFinishedInitialLoading();
 }
 
+// Get Audio Sources   -----------------------------------------------------------
+
+function GetAudioSources(){
+  $.ajax({
+    url: "/GetAudioSources",
+    type: "GET", //send it through get method
+    data: {     },
+    success: function(response) {
+        ParseGetAudioSources(response);
+    },
+    error: function(xhr) {
+      //Do Something to handle error
+    }
+  });
+}
+
+function ParseGetAudioSources(response){
+  var context = this;
+  this.audio_sources = response;
+
+  $('.audio_sources').each(function(){
+    var audio_sources = context.audio_sources;
+    for(var currentKey in audio_sources){
+      var newOption = new Option(audio_sources[currentKey], currentKey);
+      $(newOption).html(audio_sources[currentKey]);
+      $(this).append(newOption);
+    }
+  });
+
+  audioSourcesLoading = false;
+  CheckIfFinishedInitialLoading();
+}
+
 
 function GetGeneralSetting(setting_key){
   $.ajax({
@@ -0,0 +1,59 @@
+var stageOrder = ["dsp", "publish", "render", "output"];
+
+// Init and refresh the latency stats every two seconds.
+$( document ).ready(function() {
+  $("#device_dropdown").hide();
+
+  GetLatencyStats();
+  setInterval(GetLatencyStats, 2000);
+});
+
+function GetLatencyStats(){
+  $.ajax({
+    url: "/GetLatencyStats",
+    type: "GET", //send it through get method
+    data: {     },
+    success: function(response) {
+        ParseGetLatencyStats(response);
+    },
+    error: function(xhr) {
+      //Do Something to handle error
+    }
+  });
+}
+
+function ParseGetLatencyStats(response){
+  var table = $("#latencyStatsTable");
+  table.empty();
+
+  // The audio process first, then the devices.
+  var components = Object.keys(response).sort(function(a, b){
+    if(a == "audio") return -1;
+    if(b == "audio") return 1;
+    return a.localeCompare(b);
+  });
+
+  for(var i = 0; i < components.length; i++){
+    var component = components[i];
+    var stages = Object.keys(response[component]).sort(function(a, b){
+      return stageOrder.indexOf(a) - stageOrder.indexOf(b);
+    });
+
+    for(var j = 0; j < stages.length; j++){
+      var stats = response[component][stages[j]];
+      var row = $("<tr></tr>");
+      row.append($("<td></td>").text(component));
+      row.append($("<td></td>").text(stages[j]));
+      row.append($("<td></td>").text(stats.p50.toFixed(1) + " ms"));
+      row.append($("<td></td>").text(stats.p95.toFixed(1) + " ms"));
+      row.append($("<td></td>").text(stats.p99.toFixed(1) + " ms"));
+      row.append($("<td></td>").text(stats.max.toFixed(1) + " ms"));
+      row.append($("<td></td>").text(stats.count));
+      table.append(row);
+    }
+  }
+
+  if(components.length == 0){
+    table.append($("<tr><td colspan='7'>No latency data yet. Is the audio running?</td></tr>"));
+  }
+}
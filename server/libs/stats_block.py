@@ -0,0 +1,99 @@
+from multiprocessing import RawArray, Lock
+from time import monotonic
+import numpy as np
+
+
+class StatsBlock():
+    """
+    Shared memory block with rows of float stats. Every row belongs to a name, e.g. "audio/dsp".
+
+    A process claims a row by its name the first time it writes it and then writes the row without a lock.
+    A torn read of a row only shows mixed values for one refresh of the web interface or one scrape,
+    so the readers do not lock either. Writing and reading never block the real-time loops.
+    """
+
+    NAME_LENGTH = 64
+    # Rows that were not updated for this time are hidden, e.g. the rows of a deleted device.
+    MAX_ROW_AGE = 30
+
+    def __init__(self, row_size, max_rows=64):
+        self.row_size = row_size
+        self.max_rows = max_rows
+
+        self._rows_array = RawArray("d", max_rows * row_size)
+        self._update_times_array = RawArray("d", max_rows)
+        self._names_array = RawArray("c", max_rows * self.NAME_LENGTH)
+        self._lock = Lock()
+
+        # Row index of every name this process writes. Private to the process.
+        self._row_indexes = {}
+
+        self._create_views()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Rebuild the numpy views inside the child process, so they point to the shared memory.
+        del state["_rows"]
+        del state["_update_times"]
+        state["_row_indexes"] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._create_views()
+
+    def _create_views(self):
+        self._rows = np.frombuffer(self._rows_array, dtype=np.float64).reshape(self.max_rows, self.row_size)
+        self._update_times = np.frombuffer(self._update_times_array, dtype=np.float64)
+
+    def write_row(self, name, values):
+        """
+        Write the values of a row. Use NaN for values that are unknown.
+        """
+        index = self._get_row_index(name)
+        self._rows[index] = values
+        self._update_times[index] = monotonic()
+
+    def read_rows(self):
+        """
+        Returns a list of (name, values) of all rows that were updated within MAX_ROW_AGE seconds.
+        """
+        rows = []
+        current_time = monotonic()
+
+        for index in range(self.max_rows):
+            if current_time - self._update_times[index] > self.MAX_ROW_AGE:
+                continue
+            name = self._get_name(index)
+            if name:
+                rows.append((name, self._rows[index].copy()))
+
+        return rows
+
+    def _get_name(self, index):
+        start = index * self.NAME_LENGTH
+        return self._names_array[start:start + self.NAME_LENGTH].rstrip(b"\0").decode("utf-8", "ignore")
+
+    def _get_row_index(self, name):
+        if name in self._row_indexes:
+            return self._row_indexes[name]
+
+        encoded_name = name.encode("utf-8")[:self.NAME_LENGTH]
+
+        with self._lock:
+            names = [self._get_name(index) for index in range(self.max_rows)]
+            if name in names:
+                index = names.index(name)
+            elif "" in names:
+                index = names.index("")
+            else:
+                # All rows are used. Take the row that was not updated for the longest time.
+                index = int(np.argmin(self._update_times))
+
+            start = index * self.NAME_LENGTH
+            self._names_array[start:start + self.NAME_LENGTH] = encoded_name.ljust(self.NAME_LENGTH, b"\0")
+            self._rows[index] = np.nan
+            self._update_times[index] = monotonic()
+
+        self._row_indexes[name] = index
+        return index
@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, jsonify, send_file
 from waitress import serve
 from time import sleep
 import logging
@@ -13,7 +13,7 @@ server = Flask(__name__)
 
 
 class Webserver():
-    def start(self, config_lock, notification_queue_in, notification_queue_out, effects_queue):
+    def start(self, config_lock, notification_queue_in, notification_queue_out, effects_queue, latency_stats, process_stats):
         self.logger = logging.getLogger(__name__)
 
         self._config_lock = config_lock
@@ -21,7 +21,7 @@ class Webserver():
         self.notification_queue_out = notification_queue_out
         self.effects_queue = effects_queue
 
-        self.webserver_executer = WebserverExecuter(config_lock, notification_queue_in, notification_queue_out, effects_queue)
+        self.webserver_executer = WebserverExecuter(config_lock, notification_queue_in, notification_queue_out, effects_queue, latency_stats, process_stats)
         Webserver.instance = self
 
         config_instance = ConfigService.instance(self._config_lock)
@@ -56,6 +56,8 @@ class Webserver():
 
     @server.route('/export_config')
     def export_config():  # pylint: disable=E0211
+        # Write pending changes, so the exported file is up to date.
+        ConfigService.instance(Webserver.instance._config_lock).flush()
         Webserver.instance.logger.debug(f"Send file: {Webserver.instance.export_config_path}")
         return send_file(Webserver.instance.export_config_path, as_attachment=True, cache_timeout=-1)
 
@@ -305,6 +307,54 @@ class Webserver():
             else:
                 return jsonify(data_out)
 
+    # /GetAudioSources
+    #
+    # return
+    # {
+    # "<audioSourceID1>" = <audioSourceName1>
+    # "<audioSourceID2>" = <audioSourceName2>
+    # ...
+    # }
+    @server.route('/GetAudioSources', methods=['GET'])
+    def GetAudioSources():  # pylint: disable=E0211
+        if request.method == 'GET':
+            data_out = dict()
+
+            audio_sources = Webserver.instance.webserver_executer.GetAudioSources()
+            data_out = audio_sources
+
+            if data_out is None:
+                return "Could not find audio_sources.", 403
+            else:
+                return jsonify(data_out)
+
+    # /GetLatencyStats
+    #
+    # Latency in milliseconds from the audio capture to the end of each stage.
+    # return
+    # {
+    # "<component>" = {
+    #   "<stage>" = {"count": <count>, "p50": <p50>, "p95": <p95>, "p99": <p99>, "max": <max>, "sum": <sum>}
+    # }
+    # }
+    @server.route('/GetLatencyStats', methods=['GET'])
+    def GetLatencyStats():  # pylint: disable=E0211
+        if request.method == 'GET':
+            data_out = Webserver.instance.webserver_executer.GetLatencyStats()
+
+            if data_out is None:
+                return "Could not find latency_stats.", 403
+            else:
+                return jsonify(data_out)
+
+    # /metrics
+    #
+    # FPS, latency, queue depths, drops, errors and memory of all processes in the Prometheus text format.
+    @server.route('/metrics', methods=['GET'])
+    def metrics():  # pylint: disable=E0211
+        metrics_text = Webserver.instance.webserver_executer.GetMetrics()
+        return Response(metrics_text, mimetype="text/plain; version=0.0.4")
+
     # /SetEffectSetting
     # {
     # "device" = <deviceID>
@@ -5,17 +5,21 @@ from libs.notification_enum import NotificationEnum  # pylint: disable=E0611, E0
 from libs.notification_item import NotificationItem  # pylint: disable=E0611, E0401
 from libs.config_service import ConfigService  # pylint: disable=E0611, E0401
 from libs.effects_enum import EffectsEnum  # pylint: disable=E0611, E0401
+from libs.effect_setting_item import EffectSettingItem  # pylint: disable=E0611, E0401
 from libs.effect_item import EffectItem  # pylint: disable=E0611, E0401
+from libs.process_stats import ProcessStats, get_rss_bytes  # pylint: disable=E0611, E0401
 
 
 class WebserverExecuter():
-    def __init__(self, config_lock, notification_queue_in, notification_queue_out, effects_queue):
+    def __init__(self, config_lock, notification_queue_in, notification_queue_out, effects_queue, latency_stats, process_stats):
         self.logger = logging.getLogger(__name__)
 
         self._config_lock = config_lock
         self.notification_queue_in = notification_queue_in
         self.notification_queue_out = notification_queue_out
         self.effects_queue = effects_queue
+        self._latency_stats = latency_stats
+        self._process_stats = process_stats
 
         # Initial config load.
         self._config_instance = ConfigService.instance(self._config_lock)
@@ -56,7 +60,8 @@ class WebserverExecuter():
 
         self.SaveConfig()
 
-        self.RefreshDevice(device)
+        # Update the running effect without restarting the device.
+        self.PutSettingsIntoEffectQueue(device, effect, settings)
 
     def SetEffectSettingForAll(self, effect, settings):
         for device_key in self._config["device_configs"]:
@@ -65,7 +70,7 @@ class WebserverExecuter():
 
         self.SaveConfig()
 
-        self.RefreshDevice("all_devices")
+        self.PutSettingsIntoEffectQueue("all_devices", effect, settings)
 
     def GetColors(self):
         colors = dict()
@@ -91,6 +96,60 @@ class WebserverExecuter():
             logging_levels[logging_level_ID] = self._config["logging_levels"][logging_level_ID]
         return logging_levels
 
+    def GetAudioSources(self):
+        audio_sources = dict()
+        audio_sources["audio_source_pyaudio"] = "Sound Card (PyAudio)"
+        audio_sources["audio_source_file"] = "Audio File (WAV/PCM)"
+        audio_sources["audio_source_synthetic"] = "Synthetic Signal"
+        audio_sources["audio_source_pipe"] = "PCM Pipe (FIFO)"
+        return audio_sources
+
+    def GetLatencyStats(self):
+        return self._latency_stats.read()
+
+    def GetMetrics(self):
+        """
+        Returns the stats of all processes in the Prometheus text format.
+        The other processes publish their stats once per second, so a scrape only reads the shared memory.
+        """
+        # The config is written by the webserver process, so it reports its own counters now.
+        self._process_stats.write("webserver", "", {
+            "config_saves": self._config_instance.save_count,
+            "config_save_seconds": self._config_instance.save_duration_total,
+            "rss_bytes": get_rss_bytes()
+        })
+
+        lines = []
+        process_stats = self._process_stats.read()
+
+        for metric_name, metric_type, metric_help in ProcessStats.METRICS:
+            full_name = f"mlsc_{metric_name}_total" if metric_type == "counter" else f"mlsc_{metric_name}"
+            samples = [(process, device, values[metric_name]) for process, device, values in process_stats if metric_name in values]
+            if not samples:
+                continue
+
+            lines.append(f"# HELP {full_name} {metric_help}")
+            lines.append(f"# TYPE {full_name} {metric_type}")
+            for process, device, value in samples:
+                lines.append(f'{full_name}{{process="{self.EscapeLabel(process)}",device="{self.EscapeLabel(device)}"}} {float(value)!r}')
+
+        latency_stats = self._latency_stats.read()
+        if latency_stats:
+            lines.append("# HELP mlsc_latency_seconds Time from the audio capture to the end of the stage.")
+            lines.append("# TYPE mlsc_latency_seconds summary")
+            for component, stages in latency_stats.items():
+                for stage, stats in stages.items():
+                    labels = f'component="{self.EscapeLabel(component)}",stage="{self.EscapeLabel(stage)}"'
+                    for quantile, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+                        lines.append(f'mlsc_latency_seconds{{{labels},quantile="{quantile}"}} {stats[key] / 1000!r}')
+                    lines.append(f"mlsc_latency_seconds_sum{{{labels}}} {stats['sum'] / 1000!r}")
+                    lines.append(f"mlsc_latency_seconds_count{{{labels}}} {stats['count']}")
+
+        return "\n".join(lines) + "\n"
+
+    def EscapeLabel(self, value):
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
     def GetGeneralSetting(self, setting_key):
         return self._config["general_settings"][setting_key]
 
@@ -105,6 +164,9 @@ class WebserverExecuter():
         output_types = dict()
         output_types["output_raspi"] = "Output Raspberry Pi"
         output_types["output_udp"] = "Output Network via UDP"
+        output_types["output_mqtt"] = "Output Network via MQTT"
+        output_types["output_e131"] = "Output E1.31 (sACN)"
+        output_types["output_artnet"] = "Output Art-Net"
         return output_types
 
     # Return setting_value
@@ -183,6 +245,12 @@ class WebserverExecuter():
         self.logger.debug("EnumItem put into queue.")
         self.logger.debug(f"Effect queue id Webserver {id(self.effects_queue)}")
 
+    def PutSettingsIntoEffectQueue(self, device, effect, settings):
+        self.logger.debug("Preparing new EffectSettingItem...")
+        effect_setting_item = EffectSettingItem(effect, dict(settings), device)
+        self.effects_queue.put(effect_setting_item)
+        self.logger.debug(f"EffectSettingItem put into queue: {effect_setting_item.effect_id} {effect_setting_item.device_id}")
+
     def PutIntoNotificationQueue(self, notificication, device):
         self.logger.debug("Preparing new Notification...")
         notification_item = NotificationItem(notificication, device)
@@ -191,6 +259,8 @@ class WebserverExecuter():
         self.logger.debug("Notification Item put into queue.")
 
     def RefreshDevice(self, deviceId):
+        # The devices load the config from the file, so pending changes have to be written first.
+        self._config_instance.flush()
         self.PutIntoNotificationQueue(NotificationEnum.config_refresh, deviceId)
 
     def ValidateDataIn(self, dictionary, keys):
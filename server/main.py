@@ -14,6 +14,9 @@ from libs.audio_process_service import AudioProcessService
 from libs.notification_service import NotificationService
 from libs.device_manager import DeviceManager
 from libs.config_service import ConfigService
+from libs.shared_audio_data import SharedAudioData
+from libs.latency_stats import LatencyStats
+from libs.process_stats import ProcessStats
 from libs.webserver import Webserver
 
 from multiprocessing import Process, Queue, Lock
@@ -47,7 +50,15 @@ class Main():
         # Prepare the queue for the output
         self._output_queue = Queue(2)
         self._effects_queue = Queue(100)
-        self._audio_queue = Queue(2)
+
+        # Shared memory block for the audio data. The audio process writes it, every effect reads it directly.
+        self._shared_audio_data = SharedAudioData()
+
+        # Shared memory block for the latency stats of the audio process and the devices. The webserver shows them.
+        self._latency_stats = LatencyStats()
+
+        # Shared memory block for the counters of all processes, e.g. FPS and dropped frames. The webserver exports them.
+        self._process_stats = ProcessStats()
 
         # Prepare all notification queues
         self._notification_queue_audio_in = Queue(100)
@@ -68,7 +79,9 @@ class Main():
                 self._notification_queue_device_manager_in,
                 self._notification_queue_device_manager_out,
                 self._effects_queue,
-                self._audio_queue,
+                self._shared_audio_data,
+                self._latency_stats,
+                self._process_stats,
             ))
         self._device_manager_process.start()
 
@@ -95,7 +108,9 @@ class Main():
                 self._config_lock,
                 self._notification_queue_webserver_in,
                 self._notification_queue_webserver_out,
-                self._effects_queue
+                self._effects_queue,
+                self._latency_stats,
+                self._process_stats
             ))
         self._webserver_process.start()
 
@@ -107,7 +122,9 @@ class Main():
                 self._config_lock,
                 self._notification_queue_audio_in,
                 self._notification_queue_audio_out,
-                self._audio_queue
+                self._shared_audio_data,
+                self._latency_stats,
+                self._process_stats
             ))
         self._audio_process.start()
 
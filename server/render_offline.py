@@ -0,0 +1,118 @@
+# Offline Renderer
+# ----------------
+#
+# Renders an effect from a WAV file into a frame file, as fast as possible.
+# No sound card, webserver or other processes are needed.
+#
+# Example:
+#   python3 render_offline.py music.wav effect_wavelength -o wavelength.npz
+#
+# The .npz file contains "frames" (uint8, frame count x 3 x LED_Count) and "frame_times" (seconds).
+
+from sys import version_info
+import sys
+
+if version_info < (3, 6):
+    sys.exit("Error: MLSC requires Python 3.6 or greater.")
+
+from libs.offline_renderer import OfflineRenderer
+from libs.effect_service import EffectService
+
+from time import perf_counter
+import numpy as np
+import argparse
+import logging
+import json
+import os
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "libs", "config_template.json")
+
+
+def parse_setting(text):
+    """
+    Parse a "key=value" effect setting. The value is read as JSON, e.g. 2, true or "Rainbow", or else as text.
+    """
+    key, separator, value = text.partition("=")
+    if not separator:
+        raise argparse.ArgumentTypeError(f'Expected key=value, got "{text}"')
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render an effect from a WAV file into a frame file, faster than real time.")
+    parser.add_argument("audio_file", help="16 bit WAV file or raw int16 mono PCM with the DEFAULT_SAMPLE_RATE.")
+    parser.add_argument("effect", help='Effect name, e.g. "effect_gradient" or "gradient".')
+    parser.add_argument("-o", "--output", help="Output .npz file. Without it, only the timing is shown.")
+    parser.add_argument("-c", "--config", help="Config file. Default: The config template, so the output does not depend on local settings.")
+    parser.add_argument("-d", "--device", help="Device id inside the config. Default: The default device of the config.")
+    parser.add_argument("--fps", type=float, help="Frames per second. Default: The FPS of the device.")
+    parser.add_argument("--led-count", type=int, help="Number of LEDs. LED_Mid is set to the half.")
+    parser.add_argument("--duration", type=float, help="Seconds to render. Default: The length of the audio file.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the effects that use random numbers.")
+    parser.add_argument("-s", "--set", dest="settings", action="append", type=parse_setting, default=[], metavar="KEY=VALUE", help="Change a setting of the effect. Can be used multiple times.")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(asctime)s - %(levelname)-8s - %(name)-15s - %(message)s", level=logging.WARNING)
+
+    with open(args.config or TEMPLATE_PATH, "r") as config_file:
+        config = json.load(config_file)
+
+    if args.device is None:
+        device_config = config["default_device"]
+    else:
+        device_config = config["device_configs"][args.device]
+
+    if args.led_count is not None:
+        device_config["LED_Count"] = args.led_count
+        device_config["LED_Mid"] = args.led_count // 2
+
+    effect_id = args.effect if args.effect.startswith("effect_") else "effect_" + args.effect
+    available_effects = [effect_enum.name for effect_enum in EffectService().get_available_effects()]
+    if effect_id not in available_effects:
+        parser.error(f'Unknown effect: "{args.effect}". Available effects: {", ".join(available_effects)}')
+
+    # Change the settings first, because some effects prepare their arrays when they are created.
+    for key, value in args.settings:
+        if key not in device_config["effects"].get(effect_id, {}):
+            parser.error(f'Unknown setting of {effect_id}: "{key}"')
+        device_config["effects"][effect_id][key] = value
+
+    renderer = OfflineRenderer(config, device_config, effect_id, fps=args.fps, seed=args.seed)
+
+    sample_rate = int(config["general_settings"]["DEFAULT_SAMPLE_RATE"])
+    samples = OfflineRenderer.load_samples(args.audio_file, sample_rate)
+
+    start_time = perf_counter()
+    frames, frame_times = renderer.render(samples, args.duration)
+    render_duration = perf_counter() - start_time
+
+    if args.output is not None:
+        np.savez_compressed(
+            args.output,
+            frames=frames,
+            frame_times=frame_times,
+            fps=renderer.fps,
+            effect=effect_id,
+            led_count=renderer.led_count
+        )
+
+    effect_times = np.array(renderer.effect_times) * 1000
+    dsp_times = np.array(renderer.dsp_times) * 1000
+    video_duration = len(frames) / renderer.fps
+
+    print(f"Effect: {effect_id} | Frames: {len(frames)} | LEDs: {renderer.led_count} | FPS: {renderer.fps:g}")
+    if len(effect_times):
+        print(f"Effect: {np.mean(effect_times):.3f} ms/frame (p50 {np.percentile(effect_times, 50):.3f}, p95 {np.percentile(effect_times, 95):.3f}, max {np.max(effect_times):.3f})")
+    if len(dsp_times):
+        print(f"DSP: {np.mean(dsp_times):.3f} ms/buffer (p50 {np.percentile(dsp_times, 50):.3f}, p95 {np.percentile(dsp_times, 95):.3f}, max {np.max(dsp_times):.3f})")
+    if render_duration > 0:
+        print(f"Rendered {video_duration:.1f} s in {render_duration:.2f} s ({video_duration / render_duration:.1f}x real time)")
+    if args.output is not None:
+        print(f"Frames written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()